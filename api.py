@@ -0,0 +1,206 @@
+import json
+from datetime import datetime
+
+from flask import Blueprint, Response, abort, request
+from werkzeug.exceptions import HTTPException
+
+import search
+from conditional import (
+    conditional,
+    venue_validators,
+    artist_validators,
+    venues_validators,
+    artists_validators,
+    shows_validators
+)
+from models import Venue, Artist, Show
+from pagination import paginate
+from queries import (
+    venue_items,
+    artist_items,
+    upcoming_shows,
+    get_venue,
+    get_artist,
+    venue_shows,
+    artist_shows
+)
+from readmodels import VenueItem, ArtistItem, ShowTile
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+#----------------------------------------------------------------------------#
+# JSON API.
+#----------------------------------------------------------------------------#
+
+# /api/v1 serves the same data as the HTML pages, through the same query
+# layer, cursors and conditional GET validators. Every endpoint accepts
+# `fields=a,b` to trim the payload; listings take `after`, `before` and
+# `limit` like the HTML pager and return the cursors as `next` and `prev`.
+# Listings and search also take `genre`.
+
+api = Blueprint('api', __name__, url_prefix='/api/v1')
+
+VENUE_FIELDS = ('id', 'name', 'city', 'state', 'num_upcoming_shows')
+ARTIST_FIELDS = ('id', 'name', 'num_upcoming_shows')
+SHOW_FIELDS = ShowTile._fields
+
+
+def _default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError('%r is not JSON serializable' % (value,))
+
+
+def dumps(payload):
+    """Compact JSON bytes, through orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload, separators=(',', ':'), ensure_ascii=False, default=_default).encode('utf-8')
+
+
+def _json(payload, status=200):
+    return Response(dumps(payload), status=status, mimetype='application/json')
+
+
+def _fields(available):
+    requested = request.args.get('fields')
+    if not requested:
+        return available
+    fields = [field.strip() for field in requested.split(',') if field.strip()]
+    unknown = set(fields).difference(available)
+    if unknown:
+        abort(400, 'Unknown fields: %s. Available: %s.' % (', '.join(sorted(unknown)), ', '.join(available)))
+    return fields
+
+
+def _listing(query, keys, row_type, available):
+    fields = _fields(available)
+    page = paginate(
+        query,
+        keys,
+        after=request.args.get('after'),
+        before=request.args.get('before'),
+        limit=request.args.get('limit', type=int),
+        row_type=row_type
+    )
+    return _json({
+        'data': [{field: getattr(row, field) for field in fields} for row in page.items],
+        'next': page.next_cursor,
+        'prev': page.prev_cursor
+    })
+
+
+def _detail(data):
+    fields = _fields(tuple(data))
+    return _json({field: data[field] for field in fields})
+
+
+def _search(model):
+    term = request.args.get('q', '')
+    page = request.args.get('page', 1, type=int)
+    count, rows = search.search(model, term, page, genre=request.args.get('genre'))
+    return _json({
+        'count': min(count, search.MAX_COUNT),
+        'more': count > search.MAX_COUNT,
+        'page': page,
+        'has_next': count > page * search.PER_PAGE,
+        'data': [{'id': row.id, 'name': row.name} for row in rows]
+    })
+
+
+# The app's own 404/500 pages are registered by status code, which Flask
+# prefers to a class handler, so those codes are registered here too.
+@api.errorhandler(HTTPException)
+@api.errorhandler(404)
+@api.errorhandler(500)
+def api_error(error):
+    return _json({'error': {'status': error.code, 'message': error.description}}, error.code)
+
+
+#  Venues
+#  ----------------------------------------------------------------
+
+@api.route('/venues')
+@conditional(venues_validators)
+def venues():
+    return _listing(venue_items(request.args.get('genre')), (Venue.id,), VenueItem, VENUE_FIELDS)
+
+
+@api.route('/venues/search')
+def search_venues():
+    return _search(Venue)
+
+
+@api.route('/venues/<int:venue_id>')
+@conditional(venue_validators)
+def venue(venue_id):
+    venue = get_venue(venue_id)
+    upcoming, past = venue_shows(venue_id, datetime.now())
+    return _detail({
+        'id': venue.id,
+        'name': venue.name,
+        'genres': list(venue.genres),
+        'address': venue.address,
+        'city': venue.Location.city,
+        'state': venue.Location.state,
+        'phone': venue.phone,
+        'website': venue.website,
+        'facebook_link': venue.facebook_link,
+        'seeking_talent': venue.seeking_talent,
+        'seeking_description': venue.seeking_description,
+        'image_link': venue.image_link,
+        'upcoming_shows': [show._asdict() for show in upcoming],
+        'past_shows': [show._asdict() for show in past],
+        'upcoming_shows_count': len(upcoming),
+        'past_shows_count': len(past)
+    })
+
+
+#  Artists
+#  ----------------------------------------------------------------
+
+@api.route('/artists')
+@conditional(artists_validators)
+def artists():
+    return _listing(artist_items(request.args.get('genre')), (Artist.id,), ArtistItem, ARTIST_FIELDS)
+
+
+@api.route('/artists/search')
+def search_artists():
+    return _search(Artist)
+
+
+@api.route('/artists/<int:artist_id>')
+@conditional(artist_validators)
+def artist(artist_id):
+    artist = get_artist(artist_id)
+    upcoming, past = artist_shows(artist_id, datetime.now())
+    return _detail({
+        'id': artist.id,
+        'name': artist.name,
+        'genres': list(artist.genres),
+        'city': artist.city,
+        'state': artist.state,
+        'phone': artist.phone,
+        'website': artist.website,
+        'facebook_link': artist.facebook_link,
+        'seeking_venue': artist.seeking_venue,
+        'seeking_description': artist.seeking_description,
+        'image_link': artist.image_link,
+        'upcoming_shows': [show._asdict() for show in upcoming],
+        'past_shows': [show._asdict() for show in past],
+        'upcoming_shows_count': len(upcoming),
+        'past_shows_count': len(past)
+    })
+
+
+#  Shows
+#  ----------------------------------------------------------------
+
+@api.route('/shows')
+@conditional(shows_validators)
+def shows():
+    return _listing(upcoming_shows(datetime.now()), (Show.start_time, Show.id), ShowTile, SHOW_FIELDS)
@@ -2,55 +2,156 @@
 # Imports
 #----------------------------------------------------------------------------#
 import sys
-import json
-import dateutil.parser
-import babel
+from datetime import datetime
+from functools import lru_cache
 from flask import (
+  Blueprint,
   Flask,
+  current_app,
   render_template,
   request,
   Response, 
   flash,
   redirect,
-  url_for
+  url_for,
+  stream_with_context
+)
+from models import db, Venue, Artist, Show, Revision, SHOW_DEFAULT_DURATION, SHOW_MAX_DURATION
+import genres
+import search
+import suggest
+from cache import cache
+from importer import import_command
+import exporter
+import counters
+import pool
+import instrumentation
+import locations
+import availability
+import migration
+import templating
+from api import api, dumps
+from conditional import (
+  conditional,
+  venues_validators,
+  venue_validators,
+  artists_validators,
+  artist_validators,
+  shows_validators
+)
+from pagination import paginate
+from readmodels import ShowTile, VenueItem, ArtistItem
+from queries import (
+  venue_areas,
+  venue_items,
+  artist_items,
+  upcoming_shows,
+  get_venue,
+  get_artist,
+  venue_shows,
+  artist_shows,
+  artist_ids_for_venue,
+  venue_ids_for_artist
 )
-from flask_moment import Moment
-from flask_sqlalchemy import SQLAlchemy
-from flask_migrate import Migrate
-from models import db, Venue, Artist, Show, Location
 import logging
 from logging import Formatter, FileHandler
-from flask_wtf import Form
-from forms import *
+
+# Forms (WTForms), dateutil, babel and Flask-Migrate are imported where they
+# are first needed, so a worker boots with only what serving requests takes.
+
 #----------------------------------------------------------------------------#
 # App Config.
 #----------------------------------------------------------------------------#
 
-app = Flask(__name__)
-moment = Moment(app)
-app.config.from_object('config')
-db.init_app(app)
-migrate = Migrate(app, db)
+main = Blueprint('main', __name__)
+
+def create_app(config='config', overrides=None):
+  app = Flask(__name__)
+  app.config.from_object(config)
+  if overrides:
+    # Settings that tests and benchmarks change for their own app.
+    app.config.update(overrides)
+  pool.init_app(app)
+  db.init_app(app)
+  migration.init_app(app)
+  cache.init_app(app)
+  templating.init_app(app)
+  genres.init_app(app)
+  locations.init_app(app)
+  search.init_app(app)
+  suggest.init_app(app)
+  instrumentation.init_app(app)
+  app.cli.add_command(import_command)
+  app.cli.add_command(exporter.export_command)
+  app.cli.add_command(counters.rollover_command)
+  app.register_blueprint(main)
+  app.register_blueprint(api)
+
+  if not app.debug:
+    file_handler = FileHandler('error.log')
+    file_handler.setFormatter(
+        Formatter('%(asctime)s %(levelname)s: %(message)s [in %(pathname)s:%(lineno)d]')
+    )
+    app.logger.setLevel(logging.INFO)
+    file_handler.setLevel(logging.INFO)
+    app.logger.addHandler(file_handler)
+    app.logger.info('errors')
+
+  return app
 
 #----------------------------------------------------------------------------#
 # Filters.
 #----------------------------------------------------------------------------#
 
+DATETIME_FORMATS = {
+  'full': "EEEE MMMM, d, y 'at' h:mma",
+  'medium': "EE MM, dd, y h:mma"
+}
+
+# Pattern parsing and locale/timezone lookup are done once per distinct
+# value rather than once per rendered show.
+@lru_cache(maxsize=64)
+def datetime_pattern(format):
+  import babel.dates
+  return babel.dates.parse_pattern(DATETIME_FORMATS.get(format, format))
+
+@lru_cache(maxsize=8)
+def datetime_locale(name):
+  import babel
+  return babel.Locale.parse(name)
+
+@lru_cache(maxsize=8)
+def datetime_timezone(name):
+  import babel.dates
+  return babel.dates.get_timezone(name) if name else None
+
+@main.app_template_filter('datetime')
 def format_datetime(value, format='medium'):
-  date = dateutil.parser.parse(value)
-  if format == 'full':
-      format="EEEE MMMM, d, y 'at' h:mma"
-  elif format == 'medium':
-      format="EE MM, dd, y h:mma"
-  return babel.dates.format_datetime(date, format)
-
-app.jinja_env.filters['datetime'] = format_datetime
+  if not isinstance(value, datetime):
+    import dateutil.parser
+    value = dateutil.parser.parse(value)
+  config = current_app.config
+  timezone = datetime_timezone(config['DATETIME_TIMEZONE'])
+  if timezone is not None:
+    # Show times are stored as naive server-local times.
+    value = value.astimezone(timezone)
+  return datetime_pattern(format).apply(value, datetime_locale(config['DATETIME_LOCALE']))
+
+def stream_template(template_name, **context):
+  # Render a template incrementally so long listings start reaching the
+  # client before the whole page has been built.
+  app = current_app._get_current_object()
+  app.update_template_context(context)
+  template = app.jinja_env.get_template(template_name)
+  stream = template.stream(context)
+  stream.enable_buffering(5)
+  return stream
 
 #----------------------------------------------------------------------------#
 # Controllers.
 #----------------------------------------------------------------------------#
 
-@app.route('/')
+@main.route('/')
 def index():
   return render_template('pages/home.html')
 
@@ -58,60 +159,57 @@ def index():
 #  Venues
 #  ----------------------------------------------------------------
 
-@app.route('/venues')
+@main.route('/venues')
+@conditional(venues_validators)
+@cache.cached('venues')
 def venues():
-  data = []
-  locations = Location.query.order_by(Location.city.desc())
-
-  for location in locations:
-    if len(location.venues) > 0:
-      data.append({
-        "city": location.city,
-        "state": location.state,
-        "venues": location.venues
-      })
-      
-  return render_template('pages/venues.html', areas=data);
-
-@app.route('/venues/search', methods=['POST'])
+  areas = venue_areas(request.args.get('genre'))
+  return Response(stream_with_context(stream_template('pages/venues.html', areas=areas)))
+
+@main.route('/venues/available')
+def available_venues():
+  start, end = availability.window(request.args.get('from'), request.args.get('to'))
+  page = None
+  if start is not None:
+    page = paginate(
+      venue_items(request.args.get('genre')).filter(availability.free(Venue, start, end)),
+      (Venue.id,),
+      after=request.args.get('after'),
+      before=request.args.get('before'),
+      limit=request.args.get('limit', type=int),
+      row_type=VenueItem
+    )
+
+  return render_template('pages/available_venues.html', page=page, start=start, end=end)
+
+@main.route('/venues/search', methods=['GET', 'POST'])
 def search_venues():
-  search_term = request.form.get('search_term', '')
-  venues = Venue.query.filter(Venue.name.ilike(f'%{search_term}%')).all()
+  search_term = request.values.get('search_term', '')
+  page = request.values.get('page', 1, type=int)
+  genre = request.values.get('genre')
+  count, venues = search.search(Venue, search_term, page, genre=genre)
 
   response={
-    "count": len(venues),
-    "data": venues
+    "count": min(count, search.MAX_COUNT),
+    "more": count > search.MAX_COUNT,
+    "data": venues,
+    "page": page,
+    "has_next": count > page * search.PER_PAGE
   }
 
-  return render_template('pages/search_venues.html', results=response, search_term=request.form.get('search_term', ''))
+  return render_template('pages/search_venues.html', results=response, search_term=search_term, genre=genre)
 
-@app.route('/venues/<int:venue_id>')
+@main.route('/venues/<int:venue_id>')
+@conditional(venue_validators)
+@cache.cached('venue', 'venue_id')
 def show_venue(venue_id):
-  venue = Venue.query.get(venue_id)
-  shows = venue.shows
-  past_shows = []
-  upcoming_shows = []
-
-  for show in shows:
-    if show.start_time > datetime.now():
-      upcoming_shows.append({
-        "artist_id": show.artist_id,
-        "artist_name": show.Artist.name,
-        "artist_image_link": show.Artist.image_link,
-        "start_time": show.start_time.strftime("%m/%d/%Y, %H:%M")
-      })
-    else:
-      past_shows.append({
-        "artist_id": show.artist_id,
-        "artist_name": show.Artist.name,
-        "artist_image_link": show.Artist.image_link,
-        "start_time": show.start_time.strftime("%m/%d/%Y, %H:%M")
-      })
-  
+  venue = get_venue(venue_id)
+  upcoming_shows, past_shows = venue_shows(venue_id, datetime.now())
+
   data={
     "id": venue.id,
     "name": venue.name,
-    "genres": venue.genres,
+    "genres": list(venue.genres),
     "address": venue.address,
     "city": venue.Location.city,
     "state": venue.Location.state,
@@ -132,13 +230,15 @@ def show_venue(venue_id):
 #  Create Venue
 #  ----------------------------------------------------------------
 
-@app.route('/venues/create', methods=['GET'])
+@main.route('/venues/create', methods=['GET'])
 def create_venue_form():
+  from forms import VenueForm
   form = VenueForm()
   return render_template('forms/new_venue.html', form=form)
 
-@app.route('/venues/create', methods=['POST'])
+@main.route('/venues/create', methods=['POST'])
 def create_venue_submission():
+  from forms import VenueForm
 
   venue = {}
   venue['name'] = request.form['name'].strip()
@@ -151,21 +251,8 @@ def create_venue_submission():
   venue['image_link'] = request.form['image_link'].strip()
 
   error = False
-  location = {}
   try:
-    city = venue['city']
-    location = Location.query.filter_by(city=city).first()
-
-    if location is None:
-      new_location = Location(
-          city=venue['city'],
-          state=venue['state']
-        )
-      db.session.add(new_location)
-      db.session.commit()
-    
-    existing_location = Location.query.filter_by(city=city).first()
-
+    # The location upsert and the venue insert commit together.
     new_venue = Venue(
       name = venue['name'],
       address = venue['address'],
@@ -173,11 +260,15 @@ def create_venue_submission():
       genres = venue['genres'],
       facebook_link = venue['facebook_link'],
       image_link = venue['image_link'],
-      location_id = existing_location.id
+      location_id = locations.resolve(venue['city'], venue['state'])
     )
-    
+
     db.session.add(new_venue)
     db.session.commit()
+    search.index(Venue, new_venue.id, new_venue.name)
+    suggest.add('venue', new_venue.id, new_venue.name)
+    suggest.add_city(venue['city'], venue['state'])
+    cache.invalidate('venues')
 
     flash('Venue ' + request.form['name'] + ' was successfully listed!')
   except:
@@ -190,74 +281,70 @@ def create_venue_submission():
     if error:
       return render_template('forms/new_venue.html', form=VenueForm())
     else:
-      return redirect(url_for('venues'))
+      return redirect(url_for('.venues'))
 
-@app.route('/venues/<venue_id>', methods=['DELETE'])
+@main.route('/venues/<int:venue_id>', methods=['DELETE'])
 def delete_venue(venue_id):
   try:
+    artist_ids = artist_ids_for_venue(venue_id)
     Venue.query.filter_by(id=venue_id).delete()
+    counters.refresh(artist_ids=artist_ids, venue_ids=[])
+    Revision.bump('Venue')
     db.session.commit()
+    search.forget(Venue, venue_id)
+    suggest.remove('venue', venue_id)
+    cache.invalidate('venues', 'artists', 'shows', venue=[venue_id], artist=artist_ids)
   except:
     db.session.rollback()
   finally:
     db.session.close()
-  return redirect(url_for('venues'))
+  return redirect(url_for('.venues'))
 
 #  Artists
 #  ----------------------------------------------------------------
-@app.route('/artists')
+@main.route('/artists')
+@conditional(artists_validators)
+@cache.cached('artists')
 def artists():
-  data = []
-  artists = Artist.query.order_by(Artist.id.asc())
-
-  for artist in artists:
-    data.append({
-      "id": artist.id,
-      "name": artist.name
-    })
-      
-  return render_template('pages/artists.html', artists=data)
-
-@app.route('/artists/search', methods=['POST'])
+  page = paginate(
+    artist_items(request.args.get('genre')),
+    (Artist.id,),
+    after=request.args.get('after'),
+    before=request.args.get('before'),
+    limit=request.args.get('limit', type=int),
+    row_type=ArtistItem
+  )
+
+  return render_template('pages/artists.html', artists=page.items, page=page)
+
+@main.route('/artists/search', methods=['GET', 'POST'])
 def search_artists():
-
-  search_term = request.form.get('search_term', '')
-  artists = Artist.query.filter(Artist.name.ilike(f'%{search_term}%')).all()
+  search_term = request.values.get('search_term', '')
+  page = request.values.get('page', 1, type=int)
+  genre = request.values.get('genre')
+  count, artists = search.search(Artist, search_term, page, genre=genre)
 
   response={
-    "count": len(artists),
-    "data": artists
+    "count": min(count, search.MAX_COUNT),
+    "more": count > search.MAX_COUNT,
+    "data": artists,
+    "page": page,
+    "has_next": count > page * search.PER_PAGE
   }
 
-  return render_template('pages/search_artists.html', results=response, search_term=request.form.get('search_term', ''))
+  return render_template('pages/search_artists.html', results=response, search_term=search_term, genre=genre)
 
-@app.route('/artists/<int:artist_id>')
+@main.route('/artists/<int:artist_id>')
+@conditional(artist_validators)
+@cache.cached('artist', 'artist_id')
 def show_artist(artist_id):
-  artist = Artist.query.get(artist_id)
-  shows = artist.shows
-  past_shows = []
-  upcoming_shows = []
-
-  for show in shows:
-    if show.start_time > datetime.now():
-      upcoming_shows.append({
-        "venue_id": show.venue_id,
-        "venue_name": show.Venue.name,
-        "venue_image_link": show.Venue.image_link,
-        "start_time": show.start_time.strftime("%m/%d/%Y, %H:%M")
-      })
-    else:
-      past_shows.append({
-        "venue_id": show.venue_id,
-        "venue_name": show.Venue.name,
-        "venue_image_link": show.Venue.image_link,
-        "start_time": show.start_time.strftime("%m/%d/%Y, %H:%M")
-      })
-  
+  artist = get_artist(artist_id)
+  upcoming_shows, past_shows = artist_shows(artist_id, datetime.now())
+
   data={
     "id": artist.id,
     "name": artist.name,
-    "genres": artist.genres,
+    "genres": list(artist.genres),
     "city": artist.city,
     "state": artist.state,
     "phone": artist.phone,
@@ -276,8 +363,9 @@ def show_artist(artist_id):
 
 #  Update
 #  ----------------------------------------------------------------
-@app.route('/artists/<int:artist_id>/edit', methods=['GET'])
+@main.route('/artists/<int:artist_id>/edit', methods=['GET'])
 def edit_artist(artist_id):
+  from forms import ArtistForm
   form = ArtistForm()
 
   artists = Artist.query.get(artist_id)
@@ -305,8 +393,9 @@ def edit_artist(artist_id):
   
   return render_template('forms/edit_artist.html', form=form, artist=artist)
 
-@app.route('/artists/<int:artist_id>/edit', methods=['POST'])
+@main.route('/artists/<int:artist_id>/edit', methods=['POST'])
 def edit_artist_submission(artist_id):
+  from forms import ArtistForm
   artist = {}
   artist['name'] = request.form['name'].strip()
   artist['city'] = request.form['city'].title().strip()
@@ -329,6 +418,10 @@ def edit_artist_submission(artist_id):
     edit_artist.image_link = artist['image_link']
 
     db.session.commit()
+    search.index(Artist, artist_id, artist['name'])
+    suggest.add('artist', artist_id, artist['name'])
+    suggest.add_city(artist['city'], artist['state'])
+    cache.invalidate('artists', 'shows', artist=[artist_id], venue=venue_ids_for_artist(artist_id))
     flash('Artist ' + artist['name'] + ' was successfully updated!')
 
   except:
@@ -341,10 +434,11 @@ def edit_artist_submission(artist_id):
     if error:
       return render_template('forms/new_artist.html', form=ArtistForm())
     else:
-      return redirect(url_for('show_artist', artist_id=artist_id))
+      return redirect(url_for('.show_artist', artist_id=artist_id))
 
-@app.route('/venues/<int:venue_id>/edit', methods=['GET'])
+@main.route('/venues/<int:venue_id>/edit', methods=['GET'])
 def edit_venue(venue_id):
+  from forms import VenueForm
   form = VenueForm()
 
   venues = Venue.query.get(venue_id)
@@ -375,8 +469,9 @@ def edit_venue(venue_id):
 
   return render_template('forms/edit_venue.html', form=form, venue=venue)
 
-@app.route('/venues/<int:venue_id>/edit', methods=['POST'])
+@main.route('/venues/<int:venue_id>/edit', methods=['POST'])
 def edit_venue_submission(venue_id):
+  from forms import VenueForm
   venue = {}
   venue['name'] = request.form['name'].strip()
   venue['city'] = request.form['city'].title().strip()
@@ -388,15 +483,11 @@ def edit_venue_submission(venue_id):
   venue['image_link'] = request.form['image_link'].strip()
 
   error = False
-  location = {}
   try:
-    city = venue['city']
-    location = Location.query.filter_by(city=city).first()
-
     edit_venue = Venue.query.get(venue_id)
 
     edit_venue.name = venue['name']
-    edit_venue.city = location.id
+    edit_venue.location_id = locations.resolve(venue['city'], venue['state'])
     edit_venue.address = venue['address']
     edit_venue.phone = venue['phone']
     edit_venue.genres = venue['genres']
@@ -404,6 +495,10 @@ def edit_venue_submission(venue_id):
     edit_venue.image_link = venue['image_link']
 
     db.session.commit()
+    search.index(Venue, venue_id, venue['name'])
+    suggest.add('venue', venue_id, venue['name'])
+    suggest.add_city(venue['city'], venue['state'])
+    cache.invalidate('venues', 'shows', venue=[venue_id], artist=artist_ids_for_venue(venue_id))
     flash('Venue ' + venue['name'] + ' was successfully updated!')
 
   except:
@@ -416,19 +511,21 @@ def edit_venue_submission(venue_id):
     if error:
       return render_template('forms/new_venue.html', form=VenueForm())
     else:
-      return redirect(url_for('show_venue', venue_id=venue_id))
+      return redirect(url_for('.show_venue', venue_id=venue_id))
 
 #  Create Artist
 #  ----------------------------------------------------------------
 
-@app.route('/artists/create', methods=['GET'])
+@main.route('/artists/create', methods=['GET'])
 def create_artist_form():
+  from forms import ArtistForm
   form = ArtistForm()
   return render_template('forms/new_artist.html', form=form)
 
-@app.route('/artists/create', methods=['POST'])
+@main.route('/artists/create', methods=['POST'])
 def create_artist_submission():
   # called upon submitting the new artist listing form
+  from forms import ArtistForm
   artist = {}
   artist['name'] = request.form['name'].strip()
   artist['city'] = request.form['city'].title().strip()
@@ -453,6 +550,10 @@ def create_artist_submission():
 
     db.session.add(new_artist)
     db.session.commit()
+    search.index(Artist, new_artist.id, new_artist.name)
+    suggest.add('artist', new_artist.id, new_artist.name)
+    suggest.add_city(artist['city'], artist['state'])
+    cache.invalidate('artists')
 
     # on successful db insert, flash success
     flash('Artist ' + request.form['name'] + ' was successfully listed!')
@@ -466,57 +567,66 @@ def create_artist_submission():
     if error:
       return render_template('forms/new_artist.html', form=ArtistForm())
     else:
-      return redirect(url_for('artists'))
+      return redirect(url_for('.artists'))
 
 #  Shows
 #  ----------------------------------------------------------------
 
-@app.route('/shows')
+@main.route('/shows')
+@conditional(shows_validators)
+@cache.cached('shows')
 def shows():
   # displays list of shows at /shows
-  shows = Show.query.order_by(Show.start_time).filter(Show.start_time >= datetime.now())
-  data = []
-  
-  for show in shows:
-    data.append({
-      "venue_id": show.venue_id,
-      "venue_name": show.Venue.name,
-      "artist_id": show.artist_id,
-      "artist_name": show.Artist.name,
-      "artist_image_link": show.Artist.image_link,
-      "start_time": show.start_time.strftime("%m/%d/%Y, %H:%M")
-    })
-
-  return render_template('pages/shows.html', shows=data)
-
-@app.route('/shows/create')
+  page = paginate(
+    upcoming_shows(datetime.now()),
+    (Show.start_time, Show.id),
+    after=request.args.get('after'),
+    before=request.args.get('before'),
+    limit=request.args.get('limit', type=int),
+    row_type=ShowTile
+  )
+
+  return render_template('pages/shows.html', shows=page.items, page=page)
+
+@main.route('/shows/create')
 def create_shows():
   # renders form. do not touch.
+  from forms import ShowForm
   form = ShowForm()
   return render_template('forms/new_show.html', form=form)
 
-@app.route('/shows/create', methods=['POST'])
+@main.route('/shows/create', methods=['POST'])
 def create_show_submission():
   # called to create new shows in the db, upon submitting new show listing form
+  from forms import ShowForm
+  import dateutil.parser
   show = {}
   show['artist_id'] = request.form['artist_id'].strip()
   show['venue_id'] = request.form['venue_id'].strip()
   show['start_time'] = request.form['start_time'].strip()
+  show['duration'] = request.form.get('duration', SHOW_DEFAULT_DURATION, type=int)
 
   error = False
 
   try:
-    new_show = Show(
-        artist_id = show['artist_id'],
-        venue_id = show['venue_id'],
-        start_time = show['start_time']
+    new_show = availability.book(
+        venue_id = int(show['venue_id']),
+        artist_id = int(show['artist_id']),
+        start = dateutil.parser.parse(show['start_time']),
+        duration = show['duration']
       )
 
-    db.session.add(new_show)
+    db.session.flush()
+    counters.refresh(venue_ids=[new_show.venue_id], artist_ids=[new_show.artist_id])
     db.session.commit()
+    cache.invalidate('venues', 'artists', 'shows', venue=[new_show.venue_id], artist=[new_show.artist_id])
 
     # on successful db insert, flash success
     flash('Show was successfully listed!')
+  except availability.Conflict as conflict:
+    error = True
+    db.session.rollback()
+    flash('Show could not be listed, it overlaps ' + str(conflict) + '.')
   except:
     error = True
     db.session.rollback()
@@ -527,38 +637,150 @@ def create_show_submission():
     if error:
       return render_template('forms/new_show.html', form=ShowForm())
     else:
-      return redirect(url_for('shows'))
+      return redirect(url_for('.shows'))
 
-@app.errorhandler(404)
+#  Batch shows
+#  ----------------------------------------------------------------
+
+MAX_BATCH_SHOWS = 500
+BATCH_COLUMNS = ('artist_id', 'venue_id', 'start_time', 'duration')
+BATCH_FORMAT = ('Each show needs an artist_id, a venue_id, a start_time and '
+                'optionally a duration of 1 to %d minutes.' % SHOW_MAX_DURATION)
+
+def parse_booking(record):
+  # (venue_id, artist_id, start, duration) as availability.book_many takes them.
+  import dateutil.parser
+  duration = int(record.get('duration') or SHOW_DEFAULT_DURATION)
+  if not 0 < duration <= SHOW_MAX_DURATION:
+    raise ValueError(duration)
+  return int(record['venue_id']), int(record['artist_id']), dateutil.parser.parse(str(record['start_time'])), duration
+
+def schedule_shows(records):
+  # Books every valid record in one transaction and returns a result per
+  # record; a rejected record does not stop the others.
+  results = [None] * len(records)
+  bookings = []
+  positions = []
+  for position, record in enumerate(records):
+    try:
+      bookings.append(parse_booking(record))
+      positions.append(position)
+    except (KeyError, TypeError, ValueError, OverflowError):
+      results[position] = {'row': position + 1, 'status': 'invalid', 'id': None, 'message': BATCH_FORMAT}
+
+  try:
+    booked = availability.book_many(bookings)
+    venue_ids = sorted({booking[0] for booking, id in zip(bookings, booked) if isinstance(id, int)})
+    artist_ids = sorted({booking[1] for booking, id in zip(bookings, booked) if isinstance(id, int)})
+    counters.refresh(venue_ids=venue_ids, artist_ids=artist_ids)
+    db.session.commit()
+    if venue_ids:
+      cache.invalidate('venues', 'artists', 'shows', venue=venue_ids, artist=artist_ids)
+  except:
+    db.session.rollback()
+    print(sys.exc_info())
+    booked = [RuntimeError('An error occurred, nothing in this batch was listed.')] * len(bookings)
+  finally:
+    db.session.close()
+
+  for position, outcome in zip(positions, booked):
+    if isinstance(outcome, availability.Conflict):
+      result = {'status': 'conflict', 'id': None, 'message': 'Overlaps ' + str(outcome) + '.'}
+    elif isinstance(outcome, Exception):
+      result = {'status': 'missing' if isinstance(outcome, LookupError) else 'error', 'id': None, 'message': str(outcome) + '.'}
+    else:
+      result = {'status': 'booked', 'id': outcome, 'message': None}
+    results[position] = dict({'row': position + 1}, **result)
+  return results
+
+@main.route('/shows/batch')
+def create_shows_batch():
+  from forms import ShowBatchForm
+  form = ShowBatchForm()
+  return render_template('forms/new_shows.html', form=form, results=None)
+
+@main.route('/shows/batch', methods=['POST'])
+def create_shows_batch_submission():
+  # Takes the form's lines, or a JSON list of objects with the same
+  # columns, which is answered with JSON.
+  from forms import ShowBatchForm
+  if request.is_json:
+    records = request.get_json(silent=True)
+    if not isinstance(records, list) or not all(isinstance(record, dict) for record in records):
+      return Response(dumps({'error': 'Expected a JSON list of shows.'}), status=400, mimetype='application/json')
+  else:
+    records = [dict(zip(BATCH_COLUMNS, (value.strip() for value in line.split(','))))
+               for line in request.form.get('shows', '').splitlines() if line.strip()]
+
+  if len(records) > MAX_BATCH_SHOWS:
+    message = 'At most %d shows can be listed at once.' % MAX_BATCH_SHOWS
+    if request.is_json:
+      return Response(dumps({'error': message}), status=400, mimetype='application/json')
+    flash(message)
+    return render_template('forms/new_shows.html', form=ShowBatchForm(), results=None)
+
+  results = schedule_shows(records)
+  booked = sum(1 for result in results if result['status'] == 'booked')
+  if request.is_json:
+    payload = {'booked': booked, 'rejected': len(results) - booked, 'results': results}
+    return Response(dumps(payload), mimetype='application/json')
+
+  flash('%d of %d shows were listed.' % (booked, len(results)))
+  return render_template('forms/new_shows.html', form=ShowBatchForm(), results=results)
+
+#  Suggest
+#  ----------------------------------------------------------------
+
+URLS = {'venue': '.show_venue', 'artist': '.show_artist'}
+
+@main.route('/suggest')
+def suggest_names():
+  # Type-ahead for the search boxes, answered from this worker's in-memory
+  # prefix index without touching the database.
+  limit = min(request.args.get('limit', 10, type=int), suggest.MAX_LIMIT)
+  matches = suggest.get().search(request.args.get('q', ''), max(limit, 0))
+  suggestions = [{
+    'type': kind,
+    'id': id if kind in URLS else None,
+    'label': label,
+    'url': url_for(URLS[kind], **{kind + '_id': id}) if kind in URLS else None
+  } for kind, id, label in matches]
+
+  return Response(dumps({'q': request.args.get('q', ''), 'suggestions': suggestions}), mimetype='application/json')
+
+#  Export
+#  ----------------------------------------------------------------
+
+@main.route('/export/<any(venues, artists, shows):entity>.<any(jsonl, csv):format>')
+def export(entity, format):
+  chunks = exporter.encode(entity, format)
+  headers = {'Vary': 'Accept-Encoding'}
+  if request.accept_encodings['gzip']:
+    chunks = exporter.gzipped(chunks)
+    headers['Content-Encoding'] = 'gzip'
+
+  return Response(stream_with_context(chunks), mimetype=exporter.MIMETYPES[format], headers=headers)
+
+@main.app_errorhandler(404)
 def not_found_error(error):
     return render_template('errors/404.html'), 404
 
-@app.errorhandler(500)
+@main.app_errorhandler(500)
 def server_error(error):
     return render_template('errors/500.html'), 500
 
 
-if not app.debug:
-    file_handler = FileHandler('error.log')
-    file_handler.setFormatter(
-        Formatter('%(asctime)s %(levelname)s: %(message)s [in %(pathname)s:%(lineno)d]')
-    )
-    app.logger.setLevel(logging.INFO)
-    file_handler.setLevel(logging.INFO)
-    app.logger.addHandler(file_handler)
-    app.logger.info('errors')
-
 #----------------------------------------------------------------------------#
 # Launch.
 #----------------------------------------------------------------------------#
 
 # Default port:
 if __name__ == '__main__':
-    app.run()
+    create_app().run()
 
 # Or specify port manually:
 '''
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 5000))
-    app.run(host='0.0.0.0', port=port)
+    create_app().run(host='0.0.0.0', port=port)
 '''
@@ -0,0 +1,24 @@
+import os
+
+from app import create_app
+
+#----------------------------------------------------------------------------#
+# ASGI entry point.
+#----------------------------------------------------------------------------#
+
+# Run with an ASGI server, e.g. `uvicorn asgi:application`. asgiref's
+# WsgiToAsgi reads the request body on the event loop, runs the Flask
+# handler on a thread pool and sends each chunk as the handler yields it,
+# so streamed pages and /export downloads stay streamed. A slow client
+# therefore ties up a coroutine while the body is read, not a worker thread
+# and the database connection it holds.
+#
+# asgiref sizes that thread pool from the ASGI_THREADS environment variable
+# when it is imported, so the configured value is exported first.
+
+app = create_app()
+os.environ['ASGI_THREADS'] = str(app.config['ASGI_THREADS'])
+
+from asgiref.wsgi import WsgiToAsgi  # noqa: E402
+
+application = WsgiToAsgi(app)
@@ -0,0 +1,185 @@
+from datetime import datetime, timedelta
+
+from werkzeug.exceptions import BadRequest
+
+from bulk import bulk_insert
+from models import db, Venue, Artist, Show, SHOW_MAX_DURATION
+
+#----------------------------------------------------------------------------#
+# Availability.
+#----------------------------------------------------------------------------#
+
+# A show occupies [start_time, start_time + duration minutes). Overlap with a
+# window [start, end) is a range condition on start_time alone, because no
+# show is longer than SHOW_MAX_DURATION: only shows starting in
+# (start - SHOW_MAX_DURATION, end) can overlap it, and those are read with
+# the (venue_id|artist_id, start_time) and start_time indexes. The exact end
+# time is then checked on that short range.
+
+# Longest window /venues/available accepts, which bounds the rows it reads.
+MAX_WINDOW = timedelta(days=31)
+# Bookings whose overlap ranges book_many() reads per query; SQLite caps the
+# depth of the ORed expression.
+RANGES_PER_QUERY = 100
+
+KEYS = {
+    Venue: Show.venue_id,
+    Artist: Show.artist_id
+}
+
+
+class Conflict(ValueError):
+    """A show would overlap others booked at the same venue or for the same artist."""
+
+    def __init__(self, shows):
+        self.shows = shows
+        super(Conflict, self).__init__('; '.join(
+            '%s (venue %d, artist %d) from %s for %d minutes' % (
+                'show %d' % show.id if show.id else 'a show earlier in this batch',
+                show.venue_id, show.artist_id, show.start_time.strftime('%Y-%m-%d %H:%M'), show.duration)
+            for show in shows))
+
+
+def _ends():
+    # SQL for start_time + duration minutes.
+    if db.engine.dialect.name == 'postgresql':
+        return Show.start_time + db.func.make_interval(0, 0, 0, 0, 0, Show.duration)
+    return db.func.datetime(Show.start_time, '+' + db.cast(Show.duration, db.String) + ' minutes')
+
+
+def overlapping(start, end):
+    """Criterion for shows that overlap [start, end)."""
+    return db.and_(
+        Show.start_time > start - timedelta(minutes=SHOW_MAX_DURATION),
+        Show.start_time < end,
+        _ends() > start
+    )
+
+
+def conflicts(venue_id, artist_id, start, duration):
+    """Shows at `venue_id` or for `artist_id` that overlap a new booking."""
+    window = overlapping(start, start + timedelta(minutes=duration))
+    query = Show.query.filter(window)
+    # A UNION rather than an OR, so each side is one range scan on its own
+    # (key, start_time) index.
+    return query.filter(Show.venue_id == venue_id) \
+        .union(query.filter(Show.artist_id == artist_id)) \
+        .order_by(Show.start_time).all()
+
+
+def free(model, start, end):
+    """Criterion for venues or artists with no show overlapping [start, end)."""
+    key = KEYS[model]
+    return model.id.notin_(db.select([key]).where(overlapping(start, end)))
+
+
+def book(venue_id, artist_id, start, duration):
+    """Add a Show to the session, or raise Conflict if either party is busy.
+
+    The venue and artist rows are locked first, always in that order, so two
+    bookings for the same venue or artist cannot both pass the check; the
+    locks are held until the caller commits.
+    """
+    for model, id in ((Venue, venue_id), (Artist, artist_id)):
+        if db.session.query(model.id).filter(model.id == id).with_for_update().scalar() is None:
+            raise LookupError('%s %s does not exist' % (model.__name__, id))
+
+    overlaps = conflicts(venue_id, artist_id, start, duration)
+    if overlaps:
+        raise Conflict(overlaps)
+
+    show = Show(venue_id=venue_id, artist_id=artist_id, start_time=start, duration=duration)
+    db.session.add(show)
+    return show
+
+
+def book_many(bookings):
+    """Book many shows in the caller's transaction.
+
+    `bookings` are (venue_id, artist_id, start, duration) tuples. Returns one
+    result per booking, in order: the new Show id, or the LookupError or
+    Conflict that rejected it. Bookings are checked against the shows already
+    booked and against the accepted bookings before them; the accepted ones
+    are then written with one bulk INSERT.
+
+    Every venue and then every artist involved is locked with one IN query
+    each, in id order, which keeps to book()'s venue-then-artist order so a
+    batch and single bookings cannot deadlock. The shows they overlap are
+    read with one more query per RANGES_PER_QUERY bookings.
+    """
+    if not bookings:
+        return []
+
+    found = {}
+    for model, position in ((Venue, 0), (Artist, 1)):
+        ids = sorted({booking[position] for booking in bookings})
+        found[model] = {id for id, in db.session.query(model.id)
+                        .filter(model.id.in_(ids)).order_by(model.id).with_for_update()}
+
+    busy = {}
+
+    def occupy(show):
+        end = show.start_time + timedelta(minutes=show.duration)
+        for key in ((Venue, show.venue_id), (Artist, show.artist_id)):
+            busy.setdefault(key, []).append((show.start_time, end, show))
+
+    # One (key, start_time) range per booking and party, ORed together so
+    # each is still an index range scan.
+    seen = set()
+    for offset in range(0, len(bookings), RANGES_PER_QUERY):
+        ranges = []
+        for venue_id, artist_id, start, duration in bookings[offset:offset + RANGES_PER_QUERY]:
+            window = overlapping(start, start + timedelta(minutes=duration))
+            ranges.append(db.and_(Show.venue_id == venue_id, window))
+            ranges.append(db.and_(Show.artist_id == artist_id, window))
+        for show in Show.query.filter(db.or_(*ranges)):
+            if show.id not in seen:
+                seen.add(show.id)
+                occupy(show)
+
+    results = []
+    accepted = []
+    for venue_id, artist_id, start, duration in bookings:
+        end = start + timedelta(minutes=duration)
+        if venue_id not in found[Venue]:
+            results.append(LookupError('Venue %s does not exist' % venue_id))
+            continue
+        if artist_id not in found[Artist]:
+            results.append(LookupError('Artist %s does not exist' % artist_id))
+            continue
+        overlaps = []
+        for key in ((Venue, venue_id), (Artist, artist_id)):
+            for show_start, show_end, show in busy.get(key, ()):
+                if show_start < end and show_end > start and show not in overlaps:
+                    overlaps.append(show)
+        if overlaps:
+            results.append(Conflict(sorted(overlaps, key=lambda show: show.start_time)))
+            continue
+        # A transient Show, never added to the session, so later bookings
+        # in the batch are checked against this one.
+        occupy(Show(venue_id=venue_id, artist_id=artist_id, start_time=start, duration=duration))
+        accepted.append(len(results))
+        results.append(None)
+
+    if accepted:
+        rows = [dict(zip(('venue_id', 'artist_id', 'start_time', 'duration'), bookings[index]))
+                for index in accepted]
+        for index, id in zip(accepted, bulk_insert(Show.__table__, rows, returning=True)):
+            results[index] = id
+    return results
+
+
+def window(start, end):
+    """Parse ?from=&to= into datetimes; (None, None) when both are absent."""
+    if not start and not end:
+        return None, None
+    try:
+        start = datetime.fromisoformat(start)
+        end = datetime.fromisoformat(end)
+    except (TypeError, ValueError):
+        raise BadRequest('from and to must be ISO 8601 date-times.')
+    if end <= start:
+        raise BadRequest('to must be later than from.')
+    if end - start > MAX_WINDOW:
+        raise BadRequest('The window cannot be longer than %d days.' % MAX_WINDOW.days)
+    return start, end
@@ -0,0 +1,72 @@
+"""Latency of /venues/available and show conflict checks on a large Show table.
+
+    python -m benchmarks.bench_availability postgresql://localhost/fyyur_bench --shows 2000000
+
+Seeds the database if it holds no venues, then times evening windows at
+random dates across the seeded range: the /venues/available page through
+the test client, and availability.conflicts() for a random venue and
+artist. Both read only the shows starting within SHOW_MAX_DURATION of the
+window, so their cost follows shows per day rather than the table size.
+"""
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+
+from benchmarks.seed import seed
+from benchmarks.support import load_app, count_statements, percentile
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('database_url')
+    parser.add_argument('--venues', type=int, default=1000)
+    parser.add_argument('--artists', type=int, default=1000)
+    parser.add_argument('--shows', type=int, default=200000)
+    parser.add_argument('--requests', type=int, default=200)
+    args = parser.parse_args()
+
+    app = load_app(args.database_url)
+    with app.app_context():
+        import availability
+        from models import db, Venue, Artist
+
+        if not db.session.query(Venue.id).first():
+            seed(venues=args.venues, artists=args.artists, shows=args.shows)
+        venue_ids = [id for id, in db.session.query(Venue.id)]
+        artist_ids = [id for id, in db.session.query(Artist.id)]
+        engine = db.engine
+
+        rng = random.Random(0)
+        today = datetime.now().replace(hour=19, minute=0, second=0, microsecond=0)
+        # seed() spreads shows over two years either side of now.
+        evenings = [today + timedelta(days=rng.randint(-700, 700)) for _ in range(args.requests)]
+
+        conflict_samples = []
+        for evening in evenings:
+            started = time.perf_counter()
+            availability.conflicts(rng.choice(venue_ids), rng.choice(artist_ids), evening, 180)
+            conflict_samples.append((time.perf_counter() - started) * 1000.0)
+            db.session.rollback()
+
+    client = app.test_client()
+    page_samples = []
+    with count_statements(engine) as statements:
+        for evening in evenings:
+            path = '/venues/available?from=%s&to=%s' % (
+                evening.strftime('%Y-%m-%dT%H:%M'), (evening + timedelta(hours=4)).strftime('%Y-%m-%dT%H:%M'))
+            started = time.perf_counter()
+            response = client.get(path)
+            page_samples.append((time.perf_counter() - started) * 1000.0)
+            if response.status_code != 200:
+                raise SystemExit('%s answered %d' % (path, response.status_code))
+
+    print('%-22s %9s %9s %9s' % ('', 'p50 ms', 'p95 ms', 'p99 ms'))
+    for label, samples in (('/venues/available', page_samples), ('conflicts()', conflict_samples)):
+        print('%-22s %9.2f %9.2f %9.2f' % (
+            label, percentile(samples, 50), percentile(samples, 95), percentile(samples, 99)))
+    print('statements per /venues/available: %d' % (len(statements) // len(evenings)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+"""Throughput of listing a tour show by show against one batch request.
+
+    python -m benchmarks.bench_batch_shows postgresql://localhost/fyyur_bench --tour 100 --rounds 5
+
+Each round books a --tour date tour for a random artist, one show a night at
+rotating venues in an empty stretch of the calendar: first through one
+/shows/create POST per show, as the form allows, then through a single JSON
+POST to /shows/batch. Reports shows listed per second and SQL statements per
+show for both, and exits non-zero if either path failed to list a show.
+"""
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+
+from benchmarks.seed import seed
+from benchmarks.support import load_app, count_statements
+
+
+def tour(rng, artist_ids, venue_ids, first_night, length):
+    artist_id = rng.choice(artist_ids)
+    return [{
+        'artist_id': artist_id,
+        'venue_id': rng.choice(venue_ids),
+        'start_time': (first_night + timedelta(days=night)).strftime('%Y-%m-%d %H:%M'),
+        'duration': 150
+    } for night in range(length)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('database_url')
+    parser.add_argument('--tour', type=int, default=100, help='shows per tour')
+    parser.add_argument('--rounds', type=int, default=5)
+    args = parser.parse_args()
+
+    app = load_app(args.database_url)
+    with app.app_context():
+        from models import db, Venue, Artist, Show
+
+        if not db.session.query(Venue.id).first():
+            seed(venues=200, artists=200, shows=20000)
+        venue_ids = [id for id, in db.session.query(Venue.id)]
+        artist_ids = [id for id, in db.session.query(Artist.id)]
+        latest = db.session.query(db.func.max(Show.start_time)).scalar() or datetime.now()
+        engine = db.engine
+
+    rng = random.Random(0)
+    # Tours start after every show already booked, a year apart, so no
+    # booking conflicts and both paths do the same work.
+    first_night = datetime(latest.year + 1, 1, 1, 20)
+    client = app.test_client()
+    totals = {'single': [0.0, 0, 0], 'batch': [0.0, 0, 0]}
+
+    for _ in range(args.rounds):
+        shows = tour(rng, artist_ids, venue_ids, first_night, args.tour)
+        first_night += timedelta(days=366)
+        with count_statements(engine) as statements:
+            started = time.perf_counter()
+            for show in shows:
+                client.post('/shows/create', data=show)
+            totals['single'][0] += time.perf_counter() - started
+        totals['single'][1] += len(shows)
+        totals['single'][2] += len(statements)
+        with app.app_context():
+            listed = db.session.query(Show.id).filter(Show.start_time >= shows[0]['start_time']).count()
+        if listed != len(shows):
+            raise SystemExit('/shows/create listed %d of %d shows' % (listed, len(shows)))
+
+        shows = tour(rng, artist_ids, venue_ids, first_night, args.tour)
+        first_night += timedelta(days=366)
+        with count_statements(engine) as statements:
+            started = time.perf_counter()
+            response = client.post('/shows/batch', json=shows)
+            totals['batch'][0] += time.perf_counter() - started
+        result = response.get_json()
+        if response.status_code != 200 or result['booked'] != len(shows):
+            raise SystemExit('/shows/batch listed %s of %d shows' % (result and result['booked'], len(shows)))
+        totals['batch'][1] += len(shows)
+        totals['batch'][2] += len(statements)
+
+    print('%-22s %12s %16s' % ('', 'shows/s', 'statements/show'))
+    for label, (elapsed, count, statements) in totals.items():
+        print('%-22s %12.0f %16.2f' % (label, count / elapsed, statements / float(count)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+"""Per-call cost of the `datetime` template filter, before and after.
+
+    python -m benchmarks.bench_datetime_filter --calls 10000
+
+"before" is the original filter: the controller formats with strftime, and
+the filter re-parses that string with dateutil and has babel parse the
+pattern and locale on every call. "after" is app.format_datetime on a real
+datetime with the cached pattern and locale.
+"""
+import argparse
+import os
+import sys
+import timeit
+from datetime import datetime
+
+from benchmarks.support import ROOT
+
+
+def original_filter(value, format='medium'):
+    import babel.dates
+    import dateutil.parser
+
+    date = dateutil.parser.parse(value)
+    if format == 'full':
+        format = "EEEE MMMM, d, y 'at' h:mma"
+    elif format == 'medium':
+        format = "EE MM, dd, y h:mma"
+    return babel.dates.format_datetime(date, format, locale='en_US')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--calls', type=int, default=10000)
+    args = parser.parse_args()
+
+    os.environ.setdefault('DATABASE_URL', 'sqlite://')
+    sys.path.insert(0, ROOT)
+    from app import create_app, format_datetime
+
+    start_time = datetime(2027, 5, 21, 21, 30)
+    as_string = start_time.strftime("%m/%d/%Y, %H:%M")
+    with create_app().app_context():
+        assert original_filter(as_string, 'full') == format_datetime(start_time, 'full')
+
+        for label, call in (
+            ('before', lambda: original_filter(start_time.strftime("%m/%d/%Y, %H:%M"), 'full')),
+            ('after', lambda: format_datetime(start_time, 'full')),
+        ):
+            seconds = min(timeit.repeat(call, number=args.calls, repeat=3))
+            print('%-7s %8.2f us/call' % (label, seconds / args.calls * 1e6))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+"""Render time of the venue, artist and show forms, per request.
+
+    python -m benchmarks.bench_forms postgresql://localhost/fyyur_bench --requests 200
+
+Times each form page through the test client, with its size, then the
+state and genre selects alone: once with WTForms' Select widget, which
+formats and escapes every <option> on each render, and once with
+forms.CachedSelect, which joins option markup prepared per choice list.
+Both widgets must produce the same HTML.
+"""
+import argparse
+
+from benchmarks.seed import seed
+from benchmarks.support import load_app, percentile, timed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('database_url')
+    parser.add_argument('--requests', type=int, default=200)
+    args = parser.parse_args()
+
+    app = load_app(args.database_url)
+    with app.app_context():
+        from models import db, Venue, Artist
+
+        if not db.session.query(Venue.id).first():
+            seed(locations=10, venues=10, artists=10, shows=100)
+        venue_id = db.session.query(db.func.min(Venue.id)).scalar()
+        artist_id = db.session.query(db.func.min(Artist.id)).scalar()
+
+    client = app.test_client()
+    print('%-24s %9s %9s %9s' % ('page', 'p50 ms', 'p95 ms', 'bytes'))
+    for path in ('/venues/create', '/venues/%d/edit' % venue_id,
+                 '/artists/create', '/artists/%d/edit' % artist_id, '/shows/create'):
+        size = len(client.get(path).get_data())
+        samples = timed(lambda: client.get(path).get_data(), args.requests)
+        print('%-24s %9.2f %9.2f %9d' % (path, percentile(samples, 50), percentile(samples, 95), size))
+
+    from wtforms.widgets import Select
+    from forms import VenueForm
+
+    with app.test_request_context('/venues/create'):
+        form = VenueForm()
+        form.state.process_data('NY')
+        form.genres.process_data(['Jazz', 'Rock n Roll'])
+        fields = (form.state, form.genres)
+        widgets = {
+            'Select': [Select(), Select(multiple=True)],
+            'CachedSelect': [field.widget for field in fields]
+        }
+        rendered = {}
+        print('\n%-24s %9s' % ('state + genres selects', 'us'))
+        for label, (state, genres) in widgets.items():
+            render = lambda: state(form.state) + genres(form.genres)
+            rendered[label] = render()
+            samples = timed(render, args.requests * 10)
+            print('%-24s %9.1f' % (label, percentile(samples, 50) * 1e3))
+        if rendered['Select'] != rendered['CachedSelect']:
+            raise SystemExit('CachedSelect output differs from Select')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+"""Show query plans and latency for the show pages with and without the Show indexes.
+
+    python -m benchmarks.bench_indexes postgresql://localhost/fyyur_bench --seed
+
+Each route is requested through the Flask test client. The statements it
+issues are captured and EXPLAINed, and the route is then timed. This runs
+once with the indexes from migration 8d2e4f6a1b93 dropped and once with them
+in place.
+"""
+import argparse
+
+from benchmarks.seed import seed
+from benchmarks.support import load_app, count_statements, percentile, timed
+
+INDEXES = ('ix_Show_venue_id_start_time', 'ix_Show_artist_id_start_time', 'ix_Show_start_time')
+
+
+def _explain(engine, statement, parameters):
+    prefix = 'EXPLAIN ANALYZE ' if engine.dialect.name == 'postgresql' else 'EXPLAIN QUERY PLAN '
+    conn = engine.raw_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute(prefix + statement, parameters)
+        return [' '.join(str(col) for col in row) for row in cursor.fetchall()]
+    finally:
+        conn.close()
+
+
+def _run(app, urls, repeat):
+    from models import db
+
+    client = app.test_client()
+    results = {}
+    for url in urls:
+        with count_statements(db.engine) as statements:
+            client.get(url)
+        plans = [_explain(db.engine, *statement) for statement in statements
+                 if statement[0].lstrip().upper().startswith('SELECT')]
+        samples = timed(lambda: client.get(url), repeat)
+        results[url] = (len(statements), plans, samples)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('database_url')
+    parser.add_argument('--seed', action='store_true', help='seed the database first')
+    parser.add_argument('--shows', type=int, default=50000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    app = load_app(args.database_url)
+    with app.app_context():
+        from models import db, Show
+
+        if args.seed:
+            seed(shows=args.shows)
+        venue_id, artist_id = db.session.query(Show.venue_id, Show.artist_id) \
+            .group_by(Show.venue_id, Show.artist_id) \
+            .order_by(db.func.count().desc()).first()
+        db.session.remove()
+        urls = ('/shows', '/venues/%d' % venue_id, '/artists/%d' % artist_id)
+        indexes = [index for index in Show.__table__.indexes if index.name in INDEXES]
+
+        for index in indexes:
+            index.drop(bind=db.engine)
+        try:
+            without = _run(app, urls, args.repeat)
+        finally:
+            for index in indexes:
+                index.create(bind=db.engine)
+        with_indexes = _run(app, urls, args.repeat)
+
+    for url in urls:
+        print('=' * 78)
+        print(url)
+        for label, results in (('without indexes', without), ('with indexes', with_indexes)):
+            count, plans, samples = results[url]
+            print('-- %s: %d statements, p50 %.2f ms, p95 %.2f ms' % (
+                label, count, percentile(samples, 50), percentile(samples, 95)))
+            for plan in plans:
+                for line in plan:
+                    print('   ' + line)
+                print()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+"""Parallel venue creates for the same new city must share one Location.
+
+    python -m benchmarks.bench_locations postgresql://localhost/fyyur_bench --threads 16 --rounds 20
+
+Each round picks a city no venue has used yet and releases --threads
+workers at once, each posting /venues/create for it through its own test
+client. Afterwards the round's venues must all exist and point at a single
+Location row for that (city, state). Prints create latency and the SQL
+statements one create issues, and exits non-zero on the first round that
+lost a venue or produced a duplicate location.
+"""
+import argparse
+import threading
+import time
+import uuid
+
+from benchmarks.support import load_app, count_statements, percentile
+
+
+def form(name, city):
+    return {
+        'name': name,
+        'city': city,
+        'state': 'CA',
+        'address': '1 Main St',
+        'phone': '555-555-5555',
+        'genres': ['Jazz'],
+        'facebook_link': 'https://www.facebook.com/venue',
+        'image_link': 'https://example.com/venue.png'
+    }
+
+
+def race(app, city, threads):
+    """Post one venue per thread for `city`, all released together."""
+    barrier = threading.Barrier(threads)
+    samples = []
+    failures = []
+    lock = threading.Lock()
+    names = ['%s venue %d' % (city, number) for number in range(threads)]
+
+    def worker(name):
+        client = app.test_client()
+        barrier.wait()
+        started = time.perf_counter()
+        response = client.post('/venues/create', data=form(name, city))
+        elapsed = (time.perf_counter() - started) * 1000.0
+        with lock:
+            samples.append(elapsed)
+            if response.status_code != 302:
+                failures.append(name)
+
+    workers = [threading.Thread(target=worker, args=(name,)) for name in names]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    return names, samples, failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('database_url')
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--rounds', type=int, default=20)
+    args = parser.parse_args()
+
+    app = load_app(args.database_url)
+    with app.app_context():
+        import genres
+        from models import db, Venue, Location
+
+        genres.ensure_defaults()
+        db.session.commit()
+        engine = db.engine
+
+    samples = []
+    for round in range(args.rounds):
+        city = ('Racetown %s' % uuid.uuid4().hex[:8]).title()
+        names, round_samples, failures = race(app, city, args.threads)
+        samples.extend(round_samples)
+
+        with app.app_context():
+            location_ids = [id for id, in db.session.query(Location.id).filter_by(city=city, state='CA')]
+            venue_locations = {location_id for location_id, in
+                               db.session.query(Venue.location_id).filter(Venue.name.in_(names))}
+            created = db.session.query(Venue.id).filter(Venue.name.in_(names)).count()
+        if failures or created != len(names):
+            raise SystemExit('round %d: %d of %d venues created' % (round, created, len(names)))
+        if len(location_ids) != 1 or venue_locations != set(location_ids):
+            raise SystemExit('round %d: %d locations for %s, venues point at %s' % (
+                round, len(location_ids), city, sorted(venue_locations)))
+
+    # One more create for an existing city, now cached, to show its cost.
+    client = app.test_client()
+    with count_statements(engine) as statements:
+        client.post('/venues/create', data=form('%s venue cached' % city, city))
+
+    print('%d rounds x %d parallel creates: one Location per city' % (args.rounds, args.threads))
+    print('create p50 %.2f ms  p99 %.2f ms' % (percentile(samples, 50), percentile(samples, 99)))
+    print('statements for a create in a known city: %d' % len(statements))
+    for statement, _ in statements:
+        print('  ' + ' '.join(statement.split())[:100])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+"""Throughput and checkout waits as the connection pool size varies.
+
+    python -m benchmarks.bench_pool --threads 32 --sizes 1,2,4,8,16,32
+
+Runs --threads workers against a local stand-in database: a SQLite file
+behind pool.TimedQueuePool whose every statement is delayed by --latency
+milliseconds, a sleep that releases the GIL just as a round trip to a
+remote PostgreSQL would. Each simulated request checks a connection out,
+runs --queries statements and returns it. For each pool size this prints
+requests per second and checkout wait percentiles, the wait /__metrics
+reports as db_pool_checkout_wait_seconds. QueuePool hands connections out
+in no particular order, so once threads outnumber connections the median
+can stay low while the tail grows.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+from benchmarks.support import ROOT, percentile
+
+
+def run(pool_size, threads, queries, latency, duration, path):
+    from sqlalchemy import create_engine, event, text
+    from pool import TimedQueuePool
+
+    engine = create_engine(
+        'sqlite:///%s' % path,
+        poolclass=TimedQueuePool,
+        pool_size=pool_size,
+        max_overflow=0,
+        pool_timeout=60,
+        connect_args={'check_same_thread': False}
+    )
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def delay(conn, cursor, statement, parameters, context, executemany):
+        time.sleep(latency / 1000.0)
+
+    waits = []
+    completed = [0]
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def worker():
+        local_waits = []
+        done = 0
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            with engine.connect() as conn:
+                local_waits.append(time.perf_counter() - started)
+                for _ in range(queries):
+                    conn.execute(text('SELECT count(*) FROM t')).scalar()
+            done += 1
+        with lock:
+            waits.extend(local_waits)
+            completed[0] += done
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    started = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    engine.dispose()
+    return completed[0] / elapsed, waits
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--threads', type=int, default=32)
+    parser.add_argument('--sizes', default='1,2,4,8,16,32')
+    parser.add_argument('--queries', type=int, default=3, help='statements per request')
+    parser.add_argument('--latency', type=float, default=2.0, help='ms per statement')
+    parser.add_argument('--duration', type=float, default=3.0, help='seconds per pool size')
+    args = parser.parse_args()
+
+    os.environ.setdefault('DATABASE_URL', 'sqlite://')
+    sys.path.insert(0, ROOT)
+    import sqlite3
+
+    path = os.path.join(tempfile.mkdtemp(), 'pool.db')
+    with sqlite3.connect(path) as conn:
+        conn.execute('CREATE TABLE t (id INTEGER PRIMARY KEY)')
+        conn.executemany('INSERT INTO t (id) VALUES (?)', [(i,) for i in range(100)])
+
+    print('%6s %10s %12s %12s %12s' % ('pool', 'req/s', 'wait p50 ms', 'wait p95 ms', 'wait p99 ms'))
+    for size in [int(size) for size in args.sizes.split(',')]:
+        throughput, waits = run(size, args.threads, args.queries, args.latency, args.duration, path)
+        print('%6d %10.0f %12.2f %12.2f %12.2f' % (
+            size, throughput,
+            percentile(waits, 50) * 1e3, percentile(waits, 95) * 1e3, percentile(waits, 99) * 1e3))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+"""Memory and render cost of view payload rows: dicts vs. read-model tuples.
+
+    python -m benchmarks.bench_readmodels --rows 100000
+
+Builds the shows-listing payload from raw DB-API tuples three ways: the dict
+per show the views used to build, the KeyedTuple rows Query returns, and the
+readmodels.ShowTile namedtuple the views now pass on. For each it reports the
+build time, the peak memory tracemalloc sees while building, and the time to
+render the show tile markup over every row. The tile is rendered without the
+datetime filter so attribute lookups are not drowned out by babel.
+"""
+import argparse
+import gc
+import os
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+from benchmarks.support import ROOT
+
+TILE = '''{% for show in shows %}
+<div class="tile tile-show">
+  <img src="{{ show.artist_image_link }}" alt="Artist Image" />
+  <h4>{{ show.start_time }}</h4>
+  <h5><a href="/artists/{{ show.artist_id }}">{{ show.artist_name }}</a></h5>
+  <p>playing at</p>
+  <h5><a href="/venues/{{ show.venue_id }}">{{ show.venue_name }}</a></h5>
+</div>
+{% endfor %}'''
+
+
+def raw_rows(count):
+    start = datetime(2027, 1, 1, 20)
+    return [
+        (i, i % 500, 'Venue %d' % (i % 500), i % 2000, 'Artist %d' % (i % 2000),
+         'https://images.example.com/artists/%d.jpg' % (i % 2000), start + timedelta(hours=i))
+        for i in range(count)
+    ]
+
+
+def build_dicts(rows, fields):
+    return [dict(zip(fields, row)) for row in rows]
+
+
+def build_keyed(rows, fields):
+    from sqlalchemy.util import KeyedTuple
+    return [KeyedTuple(row, fields) for row in rows]
+
+
+def build_tiles(rows, fields):
+    from readmodels import ShowTile
+    return list(map(ShowTile._make, rows))
+
+
+def measure(build, rows, fields, template):
+    gc.collect()
+    tracemalloc.start()
+    started = time.perf_counter()
+    payload = build(rows, fields)
+    build_seconds = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    started = time.perf_counter()
+    template.render(shows=payload)
+    render_seconds = time.perf_counter() - started
+    return build_seconds, peak, render_seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=100000)
+    args = parser.parse_args()
+
+    os.environ.setdefault('DATABASE_URL', 'sqlite://')
+    sys.path.insert(0, ROOT)
+    from jinja2 import Environment
+    from readmodels import ShowTile
+
+    fields = list(ShowTile._fields)
+    template = Environment(autoescape=True).from_string(TILE)
+    rows = raw_rows(args.rows)
+
+    print('%-10s %10s %10s %12s %10s' % ('payload', 'build ms', 'peak MiB', 'bytes/row', 'render ms'))
+    for label, build in (('dict', build_dicts), ('keyed', build_keyed), ('ShowTile', build_tiles)):
+        build_seconds, peak, render_seconds = measure(build, rows, fields, template)
+        print('%-10s %10.1f %10.1f %12.0f %10.1f' % (
+            label, build_seconds * 1e3, peak / 2 ** 20, peak / args.rows, render_seconds * 1e3))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,284 @@
+"""Latency, throughput and query counts for every route, against a baseline.
+
+    python -m benchmarks.bench_routes postgresql://localhost/fyyur_bench --save --baseline baseline.json
+    python -m benchmarks.bench_routes postgresql://localhost/fyyur_bench --check --baseline baseline.json
+
+Seeds the database if it holds no venues, then drives each route through
+the Flask test client (--requests timed requests after a warm-up) and,
+with --http, through a threaded HTTP load generator against a local
+server (--concurrency clients for --duration seconds per route). The
+response cache is off unless --cache is given, so every request does the
+real work.
+
+Write routes run against a venue and artist of the benchmark's own: each
+create, edit and booking posts fresh data, and DELETE removes venues made
+for it. They are left out of --http, which replays one fixed request.
+Only /__cache, /__metrics and /static are not covered.
+
+--save writes the results to --baseline. --check compares against it and
+exits non-zero when a route's p50 grows by more than --threshold, or when
+it issues more SQL statements than the baseline recorded: statement counts
+are fixed per route, so any increase is an N+1 creeping back in. Timings
+depend on the machine and database, so there is no default baseline: save
+one per environment and pass its path to both.
+"""
+import argparse
+import itertools
+import json
+import os
+import sys
+import threading
+import time
+import urllib.parse
+import urllib.request
+from datetime import datetime, timedelta
+
+from benchmarks.bench_locations import form
+from benchmarks.seed import seed
+from benchmarks.support import load_app, count_statements, percentile
+
+
+def routes(venue_id, artist_id, fixtures):
+    """(name, method, path, form data, status) for each route, keyed by route
+    rule and, for writes, method. A callable path or form is called for
+    every request."""
+    evening = (datetime.now() + timedelta(days=7)).replace(hour=19, minute=0, second=0, microsecond=0)
+    window = 'from=%s&to=%s' % (evening.strftime('%Y-%m-%dT%H:%M'), (evening + timedelta(hours=4)).strftime('%Y-%m-%dT%H:%M'))
+    own_venue, own_artist, doomed = fixtures['venue'], fixtures['artist'], iter(fixtures['doomed'])
+    # Bookings start after every seeded show and never overlap each other.
+    slots = itertools.count()
+    first_slot = datetime(datetime.now().year + 5, 1, 1, 20)
+
+    def show(slot):
+        return '%s, %s, %s, 60' % (own_artist, own_venue, (first_slot + timedelta(hours=3 * slot)).strftime('%Y-%m-%d %H:%M'))
+
+    def booking():
+        artist_id, venue_id, start_time, duration = show(next(slots)).split(', ')
+        return {'artist_id': artist_id, 'venue_id': venue_id, 'start_time': start_time, 'duration': duration}
+
+    return [
+        ('/', 'GET', '/', None, 200),
+        ('/venues', 'GET', '/venues', None, 200),
+        ('/venues/search', 'POST', '/venues/search', {'search_term': 'Venue 1'}, 200),
+        ('/venues/available', 'GET', '/venues/available?' + window, None, 200),
+        ('/venues/<id>', 'GET', '/venues/%d' % venue_id, None, 200),
+        ('/venues/<id>/edit', 'GET', '/venues/%d/edit' % venue_id, None, 200),
+        ('/venues/create', 'GET', '/venues/create', None, 200),
+        ('POST /venues/create', 'POST', '/venues/create', lambda: form('Bench venue', 'Benchtown'), 302),
+        ('POST /venues/<id>/edit', 'POST', '/venues/%d/edit' % own_venue, lambda: form('Bench venue', 'Benchtown'), 302),
+        ('DELETE /venues/<id>', 'DELETE', lambda: '/venues/%d' % next(doomed), None, 302),
+        ('/artists', 'GET', '/artists', None, 200),
+        ('/artists/search', 'POST', '/artists/search', {'search_term': 'Artist 1'}, 200),
+        ('/artists/<id>', 'GET', '/artists/%d' % artist_id, None, 200),
+        ('/artists/<id>/edit', 'GET', '/artists/%d/edit' % artist_id, None, 200),
+        ('/artists/create', 'GET', '/artists/create', None, 200),
+        ('POST /artists/create', 'POST', '/artists/create', lambda: form('Bench artist', 'Benchtown'), 302),
+        ('POST /artists/<id>/edit', 'POST', '/artists/%d/edit' % own_artist, lambda: form('Bench artist', 'Benchtown'), 302),
+        ('/shows', 'GET', '/shows', None, 200),
+        ('/shows/create', 'GET', '/shows/create', None, 200),
+        ('POST /shows/create', 'POST', '/shows/create', booking, 302),
+        ('/shows/batch', 'GET', '/shows/batch', None, 200),
+        ('POST /shows/batch', 'POST', '/shows/batch',
+         lambda: {'shows': '\n'.join(show(next(slots)) for _ in range(10))}, 200),
+        ('/suggest', 'GET', '/suggest?q=venue+1', None, 200),
+        ('/export/<entity>.<format>', 'GET', '/export/venues.csv', None, 200),
+        ('/api/v1/venues', 'GET', '/api/v1/venues', None, 200),
+        ('/api/v1/venues/<id>', 'GET', '/api/v1/venues/%d' % venue_id, None, 200),
+        ('/api/v1/artists', 'GET', '/api/v1/artists', None, 200),
+        ('/api/v1/artists/<id>', 'GET', '/api/v1/artists/%d' % artist_id, None, 200),
+        ('/api/v1/shows', 'GET', '/api/v1/shows', None, 200),
+        ('/api/v1/venues/search', 'GET', '/api/v1/venues/search?q=Venue+1', None, 200),
+        ('/api/v1/artists/search', 'GET', '/api/v1/artists/search?q=Artist+1', None, 200)
+    ]
+
+
+def fixtures(doomed):
+    """A venue and artist for the write routes, and `doomed` venues for
+    DELETE to remove; must run inside an app context."""
+    from models import db, Venue, Artist, Location
+
+    location_id = db.session.query(db.func.min(Location.id)).scalar()
+    venue = Venue(name='Bench venue', genres=['Jazz'], location_id=location_id)
+    artist = Artist(name='Bench artist', city='Benchtown', state='CA', genres=['Jazz'])
+    victims = [Venue(name='Doomed venue', location_id=location_id) for _ in range(doomed)]
+    db.session.add_all([venue, artist] + victims)
+    db.session.commit()
+    return {'venue': venue.id, 'artist': artist.id, 'doomed': [victim.id for victim in victims]}
+
+
+def bench_client(app, engine, method, path, data, status, requests):
+    client = app.test_client()
+    resolve = lambda value: value() if callable(value) else value
+    call = lambda: client.open(resolve(path), method=method, data=resolve(data))
+    for _ in range(3):
+        response = call()
+        if response.status_code != status:
+            raise SystemExit('%s %s answered %d, not %d' % (method, resolve(path), response.status_code, status))
+
+    samples = []
+    queries = 0
+    started = time.perf_counter()
+    for _ in range(requests):
+        with count_statements(engine) as statements:
+            request_started = time.perf_counter()
+            call().get_data()
+            samples.append((time.perf_counter() - request_started) * 1000.0)
+        queries = max(queries, len(statements))
+    elapsed = time.perf_counter() - started
+    return {
+        'p50_ms': percentile(samples, 50),
+        'p95_ms': percentile(samples, 95),
+        'p99_ms': percentile(samples, 99),
+        'rps': requests / elapsed,
+        'queries': queries
+    }
+
+
+def bench_http(base_url, method, path, data, concurrency, duration):
+    body = urllib.parse.urlencode(data).encode() if data else None
+    samples = []
+    errors = [0]
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def client():
+        local = []
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            try:
+                request = urllib.request.Request(base_url + path, data=body, method=method)
+                with urllib.request.urlopen(request) as response:
+                    response.read()
+                local.append((time.perf_counter() - started) * 1000.0)
+            except OSError:
+                with lock:
+                    errors[0] += 1
+        with lock:
+            samples.extend(local)
+
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    return {
+        'http_p50_ms': percentile(samples, 50),
+        'http_p99_ms': percentile(samples, 99),
+        'http_rps': len(samples) / elapsed,
+        'http_errors': errors[0]
+    }
+
+
+def serve(app):
+    from werkzeug.serving import WSGIRequestHandler, make_server
+
+    class QuietHandler(WSGIRequestHandler):
+        def log_request(self, *args, **kwargs):
+            pass
+
+    server = make_server('127.0.0.1', 0, app, threaded=True, request_handler=QuietHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, 'http://127.0.0.1:%d' % server.server_port
+
+
+def compare(results, baseline, threshold):
+    """Return one message per regression against `baseline`."""
+    failures = []
+    for name, result in sorted(results.items()):
+        before = baseline.get(name)
+        if before is None:
+            continue
+        if result['queries'] > before['queries']:
+            failures.append('%s: %d SQL statements, baseline %d' % (name, result['queries'], before['queries']))
+        limit = before['p50_ms'] * (1 + threshold)
+        if result['p50_ms'] > limit:
+            failures.append('%s: p50 %.2f ms, baseline %.2f ms (+%d%% allowed)' % (
+                name, result['p50_ms'], before['p50_ms'], threshold * 100))
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('database_url')
+    parser.add_argument('--locations', type=int, default=100)
+    parser.add_argument('--venues', type=int, default=1000)
+    parser.add_argument('--artists', type=int, default=1000)
+    parser.add_argument('--shows', type=int, default=50000)
+    parser.add_argument('--requests', type=int, default=50, help='timed test-client requests per route')
+    parser.add_argument('--http', action='store_true', help='also load each route over HTTP')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--duration', type=float, default=5.0, help='seconds of HTTP load per route')
+    parser.add_argument('--cache', action='store_true', help='turn the in-memory response cache on')
+    parser.add_argument('--routes', help='comma-separated route names to run; default all')
+    parser.add_argument('--baseline', help='results file that --save writes and --check reads')
+    parser.add_argument('--save', action='store_true', help='write the results as the new baseline')
+    parser.add_argument('--check', action='store_true', help='fail on regressions against the baseline')
+    parser.add_argument('--threshold', type=float, default=0.25, help='allowed p50 growth, as a fraction')
+    args = parser.parse_args()
+    if (args.save or args.check) and not args.baseline:
+        parser.error('--save and --check need --baseline')
+
+    # One process, so the in-memory cache is as good as the shared one.
+    app = load_app(args.database_url, CACHE_BACKEND='memory' if args.cache else 'none')
+
+    with app.app_context():
+        from models import db, Venue, Artist
+
+        if not db.session.query(Venue.id).first():
+            seed(args.locations, args.venues, args.artists, args.shows)
+        venue_id = db.session.query(db.func.min(Venue.id)).scalar()
+        artist_id = db.session.query(db.func.min(Artist.id)).scalar()
+        engine = db.engine
+        # Every request of the DELETE route, warm-up included, removes one.
+        own = fixtures(args.requests + 3)
+
+    # Requests run outside that app context, so each gets a fresh session as
+    # it would in production.
+    selected = routes(venue_id, artist_id, own)
+    if args.routes:
+        names = set(args.routes.split(','))
+        selected = [route for route in selected if route[0] in names]
+
+    server = base_url = None
+    if args.http:
+        server, base_url = serve(app)
+
+    results = {}
+    print('%-24s %9s %9s %9s %9s %7s' % ('route', 'p50 ms', 'p95 ms', 'p99 ms', 'req/s', 'queries')
+          + ('  %9s %9s %9s' % ('http p50', 'http p99', 'http r/s') if args.http else ''))
+    for name, method, path, data, status in selected:
+        result = bench_client(app, engine, method, path, data, status, args.requests)
+        line = '%-24s %9.2f %9.2f %9.2f %9.0f %7d' % (
+            name, result['p50_ms'], result['p95_ms'], result['p99_ms'], result['rps'], result['queries'])
+        if server is not None and not (callable(path) or callable(data)):
+            result.update(bench_http(base_url, method, path, data, args.concurrency, args.duration))
+            line += '  %9.2f %9.2f %9.0f' % (result['http_p50_ms'], result['http_p99_ms'], result['http_rps'])
+            if result['http_errors']:
+                line += '  (%d errors)' % result['http_errors']
+        print(line)
+        results[name] = result
+
+    if server is not None:
+        server.shutdown()
+
+    if args.save:
+        with open(args.baseline, 'w') as out:
+            json.dump(results, out, indent=2, sort_keys=True)
+        print('Baseline written to %s' % args.baseline)
+
+    if args.check:
+        if not os.path.exists(args.baseline):
+            raise SystemExit('No baseline at %s; run with --save first.' % args.baseline)
+        with open(args.baseline) as source:
+            failures = compare(results, json.load(source), args.threshold)
+        for failure in failures:
+            print('REGRESSION %s' % failure)
+        if failures:
+            sys.exit(1)
+        print('No regressions against %s' % args.baseline)
+
+
+if __name__ == '__main__':
+    main()
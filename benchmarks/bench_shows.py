@@ -0,0 +1,70 @@
+"""Compare the old per-show ORM loop with the projection behind /shows.
+
+    python -m benchmarks.bench_shows postgresql://localhost/fyyur_bench --shows 10000
+
+Seeds `--shows` upcoming shows across many venues and artists. It then
+times both ways of building the listing rows and counts the statements
+each one issues, starting from an empty session each time.
+"""
+import argparse
+import random
+from datetime import datetime, timedelta
+
+from benchmarks.seed import seed
+from benchmarks.support import load_app, count_statements, percentile, timed
+
+
+def orm_rows(now):
+    # What shows() used to do: load Show entities, then lazy-load the
+    # Venue and Artist of each one.
+    from models import Show
+
+    return [(show.venue_id, show.Venue.name, show.artist_id, show.Artist.name,
+             show.Artist.image_link, show.start_time)
+            for show in Show.query.filter(Show.start_time >= now).order_by(Show.start_time)]
+
+
+def projection_rows(now):
+    from models import Show
+    from queries import upcoming_shows
+
+    return upcoming_shows(now).order_by(Show.start_time, Show.id).all()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('database_url')
+    parser.add_argument('--shows', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    app = load_app(args.database_url)
+    with app.app_context():
+        from models import db, Venue, Artist, Show
+
+        seed(venues=2000, artists=2000, shows=0)
+        venue_ids = [id for id, in db.session.query(Venue.id)]
+        artist_ids = [id for id, in db.session.query(Artist.id)]
+        rng = random.Random(0)
+        now = datetime.now()
+        db.session.execute(Show.__table__.insert(), [{
+            'venue_id': rng.choice(venue_ids),
+            'artist_id': rng.choice(artist_ids),
+            'start_time': now + timedelta(hours=rng.randint(1, 8760))
+        } for _ in range(args.shows)])
+        db.session.commit()
+
+        for label, build in (('ORM + lazy loads', orm_rows), ('projection', projection_rows)):
+            def run():
+                db.session.remove()
+                return build(now)
+
+            with count_statements(db.engine) as statements:
+                rows = run()
+            samples = timed(run, args.repeat)
+            print('%-18s %6d rows  %6d statements  p50 %9.2f ms  p95 %9.2f ms' % (
+                label, len(rows), len(statements), percentile(samples, 50), percentile(samples, 95)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+"""Cold-start time of a worker: importing the app and calling create_app().
+
+    python -m benchmarks.bench_startup --runs 10 --target 750
+
+Starts --runs fresh interpreters, each running
+
+    python -X importtime -c "from app import create_app; create_app()"
+
+and reports the wall time of the whole process and of the import and
+create_app() steps inside it. The -X importtime profile of the last run is
+summarised as the --top modules with the largest cumulative import time.
+Exits non-zero when the median process time exceeds --target milliseconds,
+so a heavy module-level import shows up as a failure rather than as slower
+autoscaling.
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+from benchmarks.support import ROOT, percentile
+
+SCRIPT = '''
+import time
+started = time.perf_counter()
+from app import create_app
+imported = time.perf_counter()
+create_app()
+print('%f %f' % (imported - started, time.perf_counter() - imported))
+'''
+
+
+def run_once(env):
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', SCRIPT],
+        cwd=ROOT, env=env, stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True, check=True)
+    wall = time.perf_counter() - started
+    imported, created = (float(value) for value in result.stdout.split())
+    return wall, imported, created, result.stderr
+
+
+def top_imports(profile, count):
+    """(cumulative us, module) for the imports the script and app.py make
+    directly, from an -X importtime log."""
+    imports = []
+    for line in profile.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        # One space of indent marks the script's own imports, three the
+        # modules those import in turn.
+        depth = (len(name) - len(name.lstrip())) // 2
+        if depth <= 1:
+            imports.append((int(cumulative), name.strip()))
+    return sorted(imports, reverse=True)[:count]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--top', type=int, default=15, help='slowest top-level imports to list')
+    parser.add_argument('--target', type=float, default=750.0, help='median process time budget, in ms')
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    env.setdefault('DATABASE_URL', 'sqlite://')
+    env['PYTHONDONTWRITEBYTECODE'] = ''
+
+    samples = [run_once(env) for _ in range(args.runs)]
+    for label, index in (('process', 0), ('import app', 1), ('create_app()', 2)):
+        values = [sample[index] * 1e3 for sample in samples]
+        print('%-14s p50 %8.1f ms  max %8.1f ms' % (label, percentile(values, 50), max(values)))
+
+    print('\nslowest imports (cumulative):')
+    for cumulative, name in top_imports(samples[-1][3], args.top):
+        print('  %8.1f ms  %s' % (cumulative / 1e3, name))
+
+    median = percentile([sample[0] * 1e3 for sample in samples], 50)
+    if median > args.target:
+        print('\nFAIL: median start-up %.1f ms is over the %.0f ms target' % (median, args.target))
+        sys.exit(1)
+    print('\nOK: median start-up %.1f ms, target %.0f ms' % (median, args.target))
+
+
+if __name__ == '__main__':
+    main()
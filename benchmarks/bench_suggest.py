@@ -0,0 +1,97 @@
+"""Prefix lookups in the /suggest index: build cost, memory and latency.
+
+    python -m benchmarks.bench_suggest postgresql://localhost/fyyur_bench --venues 20000 --artists 20000
+
+Seeds the database if it is empty, then builds the suggestion index and
+reports its build time, entry count and the memory it allocated. Runs
+--queries lookups for prefixes of random venue, artist and city labels,
+cut at a random word and length, against the index and then through the
+/suggest endpoint, and times incremental adds and removes. Exits non-zero
+when the p99 of an index lookup exceeds --target milliseconds.
+"""
+import argparse
+import random
+import sys
+import time
+import tracemalloc
+
+from benchmarks.seed import seed
+from benchmarks.support import load_app, percentile, timed
+
+
+def prefixes(labels, count, rng):
+    queries = []
+    for _ in range(count):
+        words = rng.choice(labels).split()
+        text = ' '.join(words[rng.randrange(len(words)):])
+        queries.append(text[:rng.randint(1, len(text))])
+    return queries
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('database_url')
+    parser.add_argument('--venues', type=int, default=20000)
+    parser.add_argument('--artists', type=int, default=20000)
+    parser.add_argument('--queries', type=int, default=20000)
+    parser.add_argument('--target', type=float, default=1.0, help='index lookup p99 budget, in ms')
+    args = parser.parse_args()
+
+    app = load_app(args.database_url)
+    with app.app_context():
+        from models import db, Venue
+        import suggest
+
+        if not db.session.query(Venue.id).first():
+            seed(locations=500, venues=args.venues, artists=args.artists, shows=0)
+
+        started = time.perf_counter()
+        suggest.build()
+        built = (time.perf_counter() - started) * 1e3
+        # Again under tracemalloc, which slows the build down too much to
+        # time it at the same go.
+        tracemalloc.start()
+        index = suggest.build()
+        allocated = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        stats = index.stats()
+        print('build %.1f ms, %d labels, %d entries, %d dropped, %.1f MB'
+              % (built, stats['labels'], stats['entries'], stats['dropped'], allocated / 2.0 ** 20))
+
+    rng = random.Random(0)
+    labels = list(index._labels.values())
+    queries = prefixes(labels, args.queries, rng)
+
+    queue = iter(queries * 2)
+    lookups = timed(lambda: index.search(next(queue), 10), args.queries)
+
+    client = app.test_client()
+    queue = iter(queries)
+    requests = timed(lambda: client.get('/suggest', query_string={'q': next(queue)}).get_data(),
+                     min(args.queries, 5000))
+
+    ids = iter(range(10 ** 9, 2 * 10 ** 9))
+    added = []
+
+    def add():
+        added.append(next(ids))
+        index.add('venue', added[-1], 'Benchmark Venue %d' % added[-1])
+
+    adds = timed(add, 1000)
+    removes = timed(lambda: index.remove('venue', added.pop()), 1000)
+
+    print('\n%-22s %9s %9s %9s' % ('', 'p50 us', 'p99 us', 'max us'))
+    for label, samples in (('index lookup', lookups), ('GET /suggest', requests),
+                           ('add', adds), ('remove', removes)):
+        print('%-22s %9.1f %9.1f %9.1f' % (label, percentile(samples, 50) * 1e3,
+                                           percentile(samples, 99) * 1e3, max(samples) * 1e3))
+
+    p99 = percentile(lookups, 99)
+    if p99 > args.target:
+        print('\nFAIL: lookup p99 %.3f ms is over the %.3f ms target' % (p99, args.target))
+        sys.exit(1)
+    print('\nOK: lookup p99 %.3f ms, target %.3f ms' % (p99, args.target))
+
+
+if __name__ == '__main__':
+    main()
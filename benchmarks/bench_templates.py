@@ -0,0 +1,69 @@
+"""Template load time with and without bytecode, and tile rendering with fragments.
+
+    python -m benchmarks.bench_templates --rows 300
+
+Loads every template into a fresh Jinja environment, as a new worker would:
+once compiling from source and once from a FileSystemBytecodeCache filled
+beforehand. It then renders pages/shows.html over --rows ShowTile rows with
+a cold and a warm fragment cache, the warm case being what every request
+after the first one pays.
+"""
+import argparse
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+from benchmarks.support import ROOT, percentile, timed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=300)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    os.environ.setdefault('DATABASE_URL', 'sqlite://')
+    os.environ['TEMPLATE_CACHE_DIR'] = tempfile.mkdtemp()
+    sys.path.insert(0, ROOT)
+    from jinja2 import Environment, FileSystemBytecodeCache
+    from app import create_app
+    from pagination import Page
+    from readmodels import ShowTile
+
+    app = create_app()
+    names = app.jinja_env.list_templates(extensions=['html'])
+
+    def load(bytecode_cache):
+        env = Environment(loader=app.jinja_env.loader, bytecode_cache=bytecode_cache)
+        env.filters.update(app.jinja_env.filters)
+        for name in names:
+            env.get_template(name)
+
+    bytecode = FileSystemBytecodeCache(os.environ['TEMPLATE_CACHE_DIR'])
+    load(bytecode)
+    print('%-30s %9s' % ('', 'p50 ms'))
+    print('%-30s %9.2f' % ('load %d templates, compiled' % len(names), percentile(timed(lambda: load(None), args.repeat), 50)))
+    print('%-30s %9.2f' % ('load %d templates, bytecode' % len(names), percentile(timed(lambda: load(bytecode), args.repeat), 50)))
+
+    start = datetime(2027, 1, 1, 20)
+    shows = [ShowTile(i, i % 50, 'Venue %d' % (i % 50), i % 200, 'Artist %d' % (i % 200),
+                      'https://example.com/artists/%d.jpg' % (i % 200), start + timedelta(hours=i))
+             for i in range(args.rows)]
+    page = Page(shows, None, None)
+
+    def render():
+        with app.test_request_context('/shows'):
+            app.jinja_env.get_template('pages/shows.html').render(shows=shows, page=page)
+
+    def cold():
+        app.extensions['fragments'].clear()
+        render()
+
+    render()
+    print('%-30s %9.2f' % ('shows.html, fragments cold', percentile(timed(cold, args.repeat), 50)))
+    print('%-30s %9.2f' % ('shows.html, fragments warm', percentile(timed(render, args.repeat), 50)))
+
+
+if __name__ == '__main__':
+    main()
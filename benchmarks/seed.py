@@ -0,0 +1,114 @@
+"""Seed a database with a synthetic catalogue of configurable size.
+
+    python -m benchmarks.seed postgresql://localhost/fyyur_bench --shows 200000
+"""
+import argparse
+import random
+from datetime import datetime, timedelta
+
+from benchmarks.support import load_app
+
+STATES = ('CA', 'IL', 'LA', 'MA', 'NY', 'OR', 'TX', 'WA')
+CHUNK = 5000
+
+
+def _chunks(rows):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == CHUNK:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _insert(table, rows):
+    from models import db
+
+    for chunk in _chunks(rows):
+        db.session.execute(table.insert(), chunk)
+    db.session.commit()
+
+
+def seed(locations=100, venues=1000, artists=1000, shows=50000, random_seed=0):
+    """Insert the requested volumes; must run inside an app context.
+
+    Every optional column is filled so detail pages render in full, and the
+    upcoming/past counters are refreshed once the shows are in.
+    """
+    import counters
+    import genres
+    from models import db, Venue, Artist, Show, Location, VenueGenre, ArtistGenre
+
+    rng = random.Random(random_seed)
+    now = datetime.now().replace(second=0, microsecond=0)
+
+    genres.ensure_defaults()
+    genre_ids = sorted(genres.ids().values())
+
+    _insert(Location.__table__, ({
+        'city': 'City %d' % i,
+        'state': STATES[i % len(STATES)]
+    } for i in range(locations)))
+    location_ids = [id for id, in db.session.query(Location.id)]
+
+    _insert(Venue.__table__, ({
+        'name': 'Venue %d' % i,
+        'address': '%d Main St' % i,
+        'phone': '555-%04d' % (i % 10000),
+        'website': 'https://venue%d.example.com' % i,
+        'image_link': 'https://example.com/venues/%d.jpg' % i,
+        'facebook_link': 'https://facebook.com/venue%d' % i,
+        'seeking_talent': i % 3 == 0,
+        'seeking_description': 'Looking for local acts.' if i % 3 == 0 else None,
+        'location_id': rng.choice(location_ids)
+    } for i in range(venues)))
+    venue_ids = [id for id, in db.session.query(Venue.id)]
+    _insert(VenueGenre, ({'venue_id': id, 'genre_id': genre_id}
+                         for id in venue_ids for genre_id in rng.sample(genre_ids, 2)))
+
+    _insert(Artist.__table__, ({
+        'name': 'Artist %d' % i,
+        'city': 'City %d' % (i % max(locations, 1)),
+        'state': STATES[i % len(STATES)],
+        'phone': '555-%04d' % (i % 10000),
+        'website': 'https://artist%d.example.com' % i,
+        'image_link': 'https://example.com/artists/%d.jpg' % i,
+        'facebook_link': 'https://facebook.com/artist%d' % i,
+        'seeking_venue': i % 4 == 0,
+        'seeking_description': 'Touring next season.' if i % 4 == 0 else None
+    } for i in range(artists)))
+    artist_ids = [id for id, in db.session.query(Artist.id)]
+    _insert(ArtistGenre, ({'artist_id': id, 'genre_id': genre_id}
+                          for id in artist_ids for genre_id in rng.sample(genre_ids, 2)))
+
+    # Shows spread over two years either side of now, so every page has
+    # both past and upcoming rows.
+    _insert(Show.__table__, ({
+        'venue_id': rng.choice(venue_ids),
+        'artist_id': rng.choice(artist_ids),
+        'start_time': now + timedelta(hours=rng.randint(-17520, 17520))
+    } for _ in range(shows)))
+
+    counters.refresh()
+    db.session.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('database_url')
+    parser.add_argument('--locations', type=int, default=100)
+    parser.add_argument('--venues', type=int, default=1000)
+    parser.add_argument('--artists', type=int, default=1000)
+    parser.add_argument('--shows', type=int, default=50000)
+    parser.add_argument('--random-seed', type=int, default=0)
+    args = parser.parse_args()
+
+    app = load_app(args.database_url)
+    with app.app_context():
+        seed(args.locations, args.venues, args.artists, args.shows, args.random_seed)
+
+
+if __name__ == '__main__':
+    main()
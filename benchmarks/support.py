@@ -0,0 +1,69 @@
+import os
+import sys
+import time
+from contextlib import contextmanager
+
+#----------------------------------------------------------------------------#
+# Benchmark support.
+#----------------------------------------------------------------------------#
+
+# Benchmarks build their own app against a throwaway database, so they never
+# touch the DATABASE_URL configured for development.
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def load_app(database_url, **config):
+    """Import the app bound to `database_url` and create the schema; `config`
+    overrides settings, e.g. CACHE_BACKEND='none'."""
+    os.environ['DATABASE_URL'] = database_url
+    if ROOT not in sys.path:
+        sys.path.insert(0, ROOT)
+
+    from app import create_app
+    from models import db
+
+    # config.py reads DATABASE_URL once per process; set the URI as well so
+    # a second app can use another database.
+    app = create_app(overrides=dict(
+        SQLALCHEMY_DATABASE_URI=database_url, TESTING=True, WTF_CSRF_ENABLED=False, **config))
+    with app.app_context():
+        if db.engine.dialect.name == 'postgresql':
+            db.engine.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        db.create_all()
+    return app
+
+
+@contextmanager
+def count_statements(engine):
+    """Collect every (statement, parameters) pair sent to `engine`."""
+    from sqlalchemy import event
+
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    event.listen(engine, 'before_cursor_execute', record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, 'before_cursor_execute', record)
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def timed(fn, repeat):
+    """Call `fn` `repeat` times and return the wall times in milliseconds."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000.0)
+    return samples
@@ -0,0 +1,48 @@
+from datetime import datetime
+
+from models import db
+
+#----------------------------------------------------------------------------#
+# Bulk insert.
+#----------------------------------------------------------------------------#
+
+# Multi-row inserts shared by `flask import` and availability.book_many().
+
+
+def bulk_insert(table, rows, returning=False):
+    """Insert `rows` (dicts with the same keys) without committing, and
+    return their new ids, in order, when `returning` is set.
+
+    PostgreSQL gets a single multi-row INSERT ... VALUES per batch through
+    psycopg2; other databases use a DBAPI executemany, or one INSERT per row
+    when the ids are needed.
+    """
+    if 'updated_at' in table.c:
+        now = datetime.utcnow()
+        for row in rows:
+            row.setdefault('updated_at', now)
+
+    if db.engine.dialect.name == 'postgresql':
+        from psycopg2.extras import execute_values
+
+        quote = db.engine.dialect.identifier_preparer.quote
+        ids = None
+        if returning:
+            # PostgreSQL does not promise RETURNING rows in VALUES order, so
+            # the ids are drawn from the table's sequence first and written
+            # with the rows: each row gets the id it was handed.
+            ids = [id for id, in db.session.execute(
+                db.text("SELECT nextval(pg_get_serial_sequence(:table, 'id')) FROM generate_series(1, :count)"),
+                {'table': quote(table.name), 'count': len(rows)})]
+            rows = [dict(row, id=id) for row, id in zip(rows, ids)]
+        columns = list(rows[0])
+        cursor = db.session.connection().connection.cursor()
+        prefix = 'INSERT INTO %s (%s) VALUES ' % (quote(table.name), ', '.join(quote(c) for c in columns))
+        values = [tuple(row[c] for c in columns) for row in rows]
+        execute_values(cursor, prefix + '%s', values, page_size=len(rows))
+        return ids
+
+    if not returning:
+        db.session.execute(table.insert(), rows)
+        return None
+    return [db.session.execute(table.insert(), row).inserted_primary_key[0] for row in rows]
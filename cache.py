@@ -0,0 +1,280 @@
+import json
+import os
+import socket
+import socketserver
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from functools import wraps
+
+import click
+from flask import Response, current_app, g, jsonify, make_response, request, session
+from flask.cli import with_appcontext
+
+#----------------------------------------------------------------------------#
+# Response cache.
+#----------------------------------------------------------------------------#
+
+# Whole-page cache for the read-heavy GET pages. Entries are grouped per route
+# ('venues') or per entity ('venue:3'); a group's keys embed a generation
+# token, so invalidating a group is a single delete of that token and every
+# page cached under the old one becomes unreachable. Pages under
+# conditional() are keyed by their ETag as well, so state that changes
+# without a write, such as a show starting, is never answered from a page
+# rendered before it.
+
+
+class LRUCache(object):
+    """Thread-safe in-process store with LRU eviction and a per-entry TTL."""
+
+    def __init__(self, max_entries=1024, ttl=300):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, key, value, ttl=None):
+        expires = time.monotonic() + (ttl or self.ttl)
+        with self._lock:
+            self._entries[key] = (value, expires)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions
+            }
+
+
+class SocketCache(object):
+    """Client for an LRUCache shared by all workers through `flask cache-server`.
+
+    Requests and replies are JSON lines over a Unix socket. If the server is
+    unreachable every lookup is a miss, so pages are rendered as usual; after
+    a failed call the client waits `retry` seconds before connecting again.
+    """
+
+    def __init__(self, path, timeout=0.5, retry=1.0):
+        self.path = path
+        self.timeout = timeout
+        self.retry = retry
+        self.errors = 0
+        self._down_until = 0.0
+        self._local = threading.local()
+
+    def _call(self, op, *args):
+        try:
+            stream = getattr(self._local, 'stream', None)
+            if stream is None:
+                if time.monotonic() < self._down_until:
+                    return None
+                sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                sock.settimeout(self.timeout)
+                sock.connect(self.path)
+                stream = self._local.stream = sock.makefile('rwb')
+            stream.write(json.dumps([op, args]).encode() + b'\n')
+            stream.flush()
+            return json.loads(stream.readline())
+        except (OSError, ValueError):
+            self.errors += 1
+            self._down_until = time.monotonic() + self.retry
+            stream = getattr(self._local, 'stream', None)
+            if stream is not None:
+                stream.close()
+            self._local.stream = None
+            return None
+
+    def get(self, key):
+        return self._call('get', key)
+
+    def set(self, key, value, ttl=None):
+        self._call('set', key, value, ttl)
+
+    def delete(self, key):
+        self._call('delete', key)
+
+    def stats(self):
+        stats = self._call('stats') or {}
+        stats['errors'] = self.errors
+        return stats
+
+
+class _CacheServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class _CacheHandler(socketserver.StreamRequestHandler):
+    operations = ('get', 'set', 'delete', 'stats')
+
+    def handle(self):
+        for line in self.rfile:
+            try:
+                op, args = json.loads(line)
+                result = getattr(self.server.store, op)(*args) if op in self.operations else None
+            except (ValueError, TypeError):
+                result = None
+            self.wfile.write(json.dumps(result).encode() + b'\n')
+            self.wfile.flush()
+
+
+def serve(path, max_entries, ttl):
+    if os.path.exists(path):
+        os.unlink(path)
+    server = _CacheServer(path, _CacheHandler)
+    server.store = LRUCache(max_entries, ttl)
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        os.unlink(path)
+
+
+@click.command('cache-server')
+@with_appcontext
+def serve_command():
+    """Run the shared response cache for the 'socket' backend."""
+    config = current_app.config
+    click.echo('Serving response cache on %s' % config['CACHE_SOCKET'])
+    serve(config['CACHE_SOCKET'], config['CACHE_MAX_ENTRIES'], config['CACHE_TTL'])
+
+
+class _AppCache(object):
+    """One app's backend and page counts, kept in its extensions so two
+    apps in a process never share a cache."""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.hits = self.misses = 0
+
+
+class ResponseCache(object):
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        config = app.config
+        backend = config.get('CACHE_BACKEND', 'socket')
+        if backend == 'memory':
+            if config.get('WEB_CONCURRENCY', 1) > 1:
+                raise RuntimeError(
+                    "CACHE_BACKEND 'memory' cannot be invalidated across %d workers; "
+                    "use 'socket' with `flask cache-server`." % config['WEB_CONCURRENCY'])
+            backend = LRUCache(config.get('CACHE_MAX_ENTRIES', 1024), config.get('CACHE_TTL', 300))
+        elif backend == 'socket':
+            backend = SocketCache(config['CACHE_SOCKET'])
+        else:
+            backend = None
+        app.extensions['response_cache'] = _AppCache(backend)
+        app.cli.add_command(serve_command)
+        app.add_url_rule('/__cache', 'cache_stats', self.stats_view)
+
+    @property
+    def backend(self):
+        """The current app's backend, or None when caching is off."""
+        return current_app.extensions['response_cache'].backend
+
+    def cached(self, name, arg=None):
+        """Cache a GET view under the group `name`, or `name:<arg>` when the
+        page belongs to one entity, e.g. cached('venue', 'venue_id')."""
+        def decorator(view):
+            @wraps(view)
+            def wrapper(**kwargs):
+                state = current_app.extensions['response_cache']
+                backend = state.backend
+                # Pages carrying a flashed message are one-offs for this user.
+                if backend is None or request.method != 'GET' or '_flashes' in session:
+                    return view(**kwargs)
+
+                group = name if arg is None else '%s:%s' % (name, kwargs[arg])
+                key = '%s:%s:%s:%s' % (group, self._generation(backend, group), g.get('etag', ''),
+                                       request.query_string.decode())
+                hit = backend.get(key)
+                if hit is not None:
+                    state.hits += 1
+                    return Response(hit[0], mimetype=hit[1])
+                state.misses += 1
+
+                response = make_response(view(**kwargs))
+                if response.status_code == 200:
+                    if response.is_streamed:
+                        response.response = self._store_after(backend, key, response.response, response.mimetype)
+                    else:
+                        backend.set(key, [response.get_data(as_text=True), response.mimetype])
+                return response
+            return wrapper
+        return decorator
+
+    def invalidate(self, *names, **entities):
+        """Drop every cached page of the given route groups and entities,
+        e.g. invalidate('venues', venue=[3], artist=[1, 2])."""
+        backend = self.backend
+        if backend is None:
+            return
+        groups = list(names)
+        for kind, ids in entities.items():
+            groups.extend('%s:%s' % (kind, id) for id in ids)
+        for group in groups:
+            backend.delete('gen:' + group)
+
+    def stats(self):
+        """Page hits and misses in this process, plus the backend's own
+        entry, eviction and error counts."""
+        state = current_app.extensions['response_cache']
+        return {
+            'hits': state.hits,
+            'misses': state.misses,
+            'backend': state.backend.stats() if state.backend is not None else {}
+        }
+
+    def stats_view(self):
+        return jsonify(self.stats())
+
+    def _generation(self, backend, group):
+        # A missing token (never set, invalidated or evicted) is replaced by a
+        # fresh one, which can only ever cause misses, never stale hits.
+        token = backend.get('gen:' + group)
+        if token is None:
+            token = uuid.uuid4().hex[:12]
+            backend.set('gen:' + group, token)
+        return token
+
+    def _store_after(self, backend, key, chunks, mimetype):
+        # Streamed pages are stored once the last chunk has gone out.
+        body = []
+        for chunk in chunks:
+            body.append(chunk if isinstance(chunk, str) else chunk.decode())
+            yield chunk
+        backend.set(key, [''.join(body), mimetype])
+
+
+cache = ResponseCache()
@@ -0,0 +1,170 @@
+import glob
+import hashlib
+import os
+from datetime import datetime, timezone
+from functools import wraps
+
+from flask import Response, g, make_response, request, session
+from models import db, Venue, Artist, Show, Revision
+
+#----------------------------------------------------------------------------#
+# Conditional GET.
+#----------------------------------------------------------------------------#
+
+# Pages declare the state they are rendered from as a short list of values:
+# max(updated_at) of the tables they read, which is an index lookup, the
+# Revision counters that deletes bump (a delete cannot raise a max), and the
+# start time of the last show to have crossed into the past, since that
+# moves a show from "upcoming" to "past". Listings never count rows here;
+# a count is a full scan on every request, cached or not. The strong ETag is
+# a digest of those values and Last-Modified is the latest of their
+# timestamps, so a matching If-None-Match or If-Modified-Since is answered
+# with a 304 before the view or its template runs.
+#
+# The ETag is also left in g.etag for the response cache, which keys pages
+# by it: a page cached before the state changed is never served under the
+# new tag, so a client cannot revalidate a stale body.
+
+basedir = os.path.abspath(os.path.dirname(__file__))
+
+
+def _release_salt():
+    # Markup can change with the code even when the data does not, so tags
+    # from a previous deploy must not validate. Hashing the sources (rather
+    # than e.g. the process start time) keeps tags identical across workers
+    # and hosts.
+    digest = hashlib.sha1()
+    paths = glob.glob(os.path.join(basedir, '*.py')) + \
+        glob.glob(os.path.join(basedir, 'templates', '**', '*.html'), recursive=True)
+    for path in sorted(paths):
+        with open(path, 'rb') as source:
+            digest.update(source.read())
+    return digest.hexdigest()
+
+
+RELEASE = _release_salt()
+
+
+def _utc(value):
+    if value is None:
+        return None
+    if value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def _crossed(start_time):
+    # Show times are naive local times, unlike updated_at.
+    return start_time.astimezone(timezone.utc).replace(tzinfo=None) if start_time else None
+
+
+def conditional(validators):
+    """Decorate a GET view with ETag/Last-Modified handling.
+
+    `validators(now, **view_args)` returns the list of values the page is
+    rendered from, or None to skip validation (e.g. for a 404).
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(**kwargs):
+            values = validators(datetime.now(), **kwargs)
+            if values is None:
+                return view(**kwargs)
+
+            etag = g.etag = hashlib.sha1(repr([RELEASE, request.full_path] + values).encode()).hexdigest()
+            stamps = [value for value in values if isinstance(value, datetime)]
+            last_modified = max(stamps).replace(microsecond=0) if stamps else None
+
+            if request.if_none_match:
+                not_modified = request.if_none_match.contains(etag)
+            else:
+                since = _utc(request.if_modified_since)
+                not_modified = since is not None and last_modified is not None and last_modified <= since
+
+            # A pending flashed message has to be rendered, so never 304 it.
+            if not_modified and '_flashes' not in session:
+                response = Response(status=304)
+            else:
+                response = make_response(view(**kwargs))
+                if response.status_code != 200:
+                    return response
+
+            response.set_etag(etag)
+            if last_modified is not None:
+                response.last_modified = last_modified
+            response.cache_control.no_cache = True
+            return response
+        return wrapper
+    return decorator
+
+
+#  Validators
+#  ----------------------------------------------------------------
+
+def _scalar(column, *criteria):
+    select = db.select([column])
+    for criterion in criteria:
+        select = select.where(criterion)
+    return select.as_scalar()
+
+
+def _shows_state(now, partner, join, criterion):
+    row = db.session.query(
+        db.func.max(Show.updated_at),
+        db.func.max(partner.updated_at),
+        db.func.count(Show.id),
+        db.func.max(db.case([(Show.start_time <= now, Show.start_time)]))
+    ).join(partner, join).filter(criterion).one()
+    return [row[0], row[1], row[2], _crossed(row[3])]
+
+
+def venue_validators(now, venue_id):
+    updated_at = db.session.query(Venue.updated_at).filter(Venue.id == venue_id).scalar()
+    if updated_at is None:
+        return None
+    return [updated_at] + _shows_state(now, Artist, Show.artist_id == Artist.id, Show.venue_id == venue_id)
+
+
+def artist_validators(now, artist_id):
+    updated_at = db.session.query(Artist.updated_at).filter(Artist.id == artist_id).scalar()
+    if updated_at is None:
+        return None
+    return [updated_at] + _shows_state(now, Venue, Show.venue_id == Venue.id, Show.artist_id == artist_id)
+
+
+def venues_validators(now):
+    # Locations are never updated or deleted, and a venue moving to a new
+    # one bumps its own updated_at.
+    row = db.session.query(
+        _scalar(db.func.max(Venue.updated_at)),
+        Revision.of('Venue'),
+        _scalar(db.func.max(Show.updated_at)),
+        Revision.of('Show'),
+        _scalar(db.func.max(Show.start_time), Show.start_time <= now)
+    ).one()
+    return list(row[:4]) + [_crossed(row[4])]
+
+
+def artists_validators(now):
+    # The listing badges upcoming shows from the Artist counters, which
+    # change with the shows (see counters.py) rather than with updated_at.
+    row = db.session.query(
+        _scalar(db.func.max(Artist.updated_at)),
+        Revision.of('Artist'),
+        _scalar(db.func.max(Show.updated_at)),
+        Revision.of('Show')
+    ).one()
+    return list(row)
+
+
+def shows_validators(now):
+    row = db.session.query(
+        _scalar(db.func.max(Show.updated_at)),
+        Revision.of('Show'),
+        _scalar(db.func.max(Venue.updated_at)),
+        Revision.of('Venue'),
+        _scalar(db.func.max(Artist.updated_at)),
+        Revision.of('Artist'),
+        _scalar(db.func.max(Show.start_time), Show.start_time <= now)
+    ).one()
+    return list(row[:6]) + [_crossed(row[6])]
@@ -17,3 +17,72 @@ DATABASE_URL = os.getenv('DATABASE_URL')
 # TODO IMPLEMENT DATABASE URL
 SQLALCHEMY_DATABASE_URI = DATABASE_URL
 SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+# Connection pool. Size, overflow and checkout timeout (seconds) apply to the
+# QueuePool used for PostgreSQL; SQLite gets Flask-SQLAlchemy's own pool.
+# Connections are replaced after DB_POOL_RECYCLE seconds and, with pre-ping,
+# tested on checkout, so a restarted or idle-timed-out server costs a
+# reconnect instead of a failed request. Pool state is on /__metrics.
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', 5))
+DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', 10))
+DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', 30))
+DB_POOL_RECYCLE = int(os.getenv('DB_POOL_RECYCLE', 1800))
+DB_POOL_PRE_PING = os.getenv('DB_POOL_PRE_PING', 'true').lower() in ('1', 'true', 'yes')
+
+SQLALCHEMY_ENGINE_OPTIONS = {
+    'pool_recycle': DB_POOL_RECYCLE,
+    'pool_pre_ping': DB_POOL_PRE_PING
+}
+if DATABASE_URL and not DATABASE_URL.startswith('sqlite'):
+    SQLALCHEMY_ENGINE_OPTIONS.update(
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT
+    )
+
+# Response cache for the read-heavy pages: 'socket' shares one LRU between
+# all workers through `flask cache-server`, 'memory' keeps an LRU per worker
+# process, anything else disables caching. While the cache server is not
+# running every lookup is a miss, so pages are rendered as if uncached. An
+# invalidation only reaches the cache it is sent to, so 'memory' is refused
+# when WEB_CONCURRENCY (the number of workers, as gunicorn reads it) is more
+# than one; per-worker caches would serve stale pages for up to CACHE_TTL.
+CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'socket')
+WEB_CONCURRENCY = int(os.getenv('WEB_CONCURRENCY', 1))
+CACHE_SOCKET = os.getenv('CACHE_SOCKET', os.path.join(basedir, 'cache.sock'))
+CACHE_MAX_ENTRIES = int(os.getenv('CACHE_MAX_ENTRIES', 1024))
+CACHE_TTL = int(os.getenv('CACHE_TTL', 300))
+
+# Compiled template bytecode is cached in TEMPLATE_CACHE_DIR (empty to turn
+# it off); `flask compile-templates` fills it before workers start. Rendered
+# fragments such as show tiles are kept per worker, up to
+# FRAGMENT_CACHE_MAX_ENTRIES for FRAGMENT_CACHE_TTL seconds each.
+TEMPLATE_CACHE_DIR = os.getenv('TEMPLATE_CACHE_DIR', os.path.join(basedir, '.jinja_cache'))
+FRAGMENT_CACHE_MAX_ENTRIES = int(os.getenv('FRAGMENT_CACHE_MAX_ENTRIES', 10000))
+FRAGMENT_CACHE_TTL = int(os.getenv('FRAGMENT_CACHE_TTL', 3600))
+
+# /suggest answers from a per-worker prefix index of venue, artist and city
+# names holding at most SUGGEST_MAX_ENTRIES keys (a label has one per word,
+# up to four). It is rebuilt in the background every SUGGEST_TTL seconds to
+# pick up writes made by other workers.
+SUGGEST_MAX_ENTRIES = int(os.getenv('SUGGEST_MAX_ENTRIES', 100000))
+SUGGEST_TTL = int(os.getenv('SUGGEST_TTL', 300))
+
+# Locale and timezone used by the `datetime` template filter. Show times are
+# stored as naive server-local times; leave DATETIME_TIMEZONE empty to print
+# them unconverted.
+DATETIME_LOCALE = os.getenv('DATETIME_LOCALE', 'en_US')
+DATETIME_TIMEZONE = os.getenv('DATETIME_TIMEZONE', '')
+
+# Threads the ASGI entry point (asgi.py) runs request handlers on. Keep it at
+# or below DB_POOL_SIZE + DB_MAX_OVERFLOW, since each busy thread holds a
+# connection.
+ASGI_THREADS = int(os.getenv('ASGI_THREADS', 10))
+
+# Per-request profiling (route, status, wall/template/SQL time, statement
+# count and the INSTRUMENTATION_SLOWEST slowest statements), logged as JSON
+# lines to INSTRUMENTATION_LOG (stderr when empty) and kept as histograms
+# on /__metrics. Off by default.
+INSTRUMENTATION = os.getenv('INSTRUMENTATION', '').lower() in ('1', 'true', 'yes')
+INSTRUMENTATION_LOG = os.getenv('INSTRUMENTATION_LOG', '')
+INSTRUMENTATION_SLOWEST = int(os.getenv('INSTRUMENTATION_SLOWEST', 3))
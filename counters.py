@@ -0,0 +1,87 @@
+from datetime import datetime
+
+import click
+from flask.cli import with_appcontext
+
+from cache import cache
+from models import db, Venue, Artist, Show, Revision
+
+#----------------------------------------------------------------------------#
+# Show counters.
+#----------------------------------------------------------------------------#
+
+# Venue and Artist carry denormalised upcoming/past show counts and the time
+# of their next show, so listings can badge and sort without reading Show.
+# The Show write paths refresh the rows they touch; shows that merely cross
+# into the past are picked up by `flask rollover-shows`, run periodically
+# (e.g. from cron every few minutes).
+#
+# A refresh leaves updated_at alone, so the listings' validators see new
+# counters through the shows that changed them: max(Show.updated_at) for new
+# shows and the Show revision for deleted ones. A rollover changes counters
+# with no show changing, so it bumps the Venue and Artist revisions itself.
+
+def _values(model, foreign_key, now):
+    shows = Show.__table__
+    owned = foreign_key == model.id
+    return {
+        'upcoming_shows_count': db.select([db.func.count(shows.c.id)])
+            .where(db.and_(owned, Show.start_time > now)).as_scalar(),
+        'past_shows_count': db.select([db.func.count(shows.c.id)])
+            .where(db.and_(owned, Show.start_time <= now)).as_scalar(),
+        'next_show_time': db.select([db.func.min(Show.start_time)])
+            .where(db.and_(owned, Show.start_time > now)).as_scalar(),
+        # Counters are derived data; keep them from bumping updated_at.
+        'updated_at': model.updated_at
+    }
+
+
+def refresh(venue_ids=None, artist_ids=None, now=None):
+    """Recompute the counters of the given venues and artists.
+
+    Pass None to recompute every row of that table, or an empty list to
+    leave it alone. Runs in the caller's transaction.
+    """
+    now = now or datetime.now()
+    for model, foreign_key, ids in ((Venue, Show.venue_id, venue_ids),
+                                    (Artist, Show.artist_id, artist_ids)):
+        if ids is not None and not ids:
+            continue
+        statement = model.__table__.update().values(_values(model, foreign_key, now))
+        if ids is not None:
+            statement = statement.where(model.id.in_(ids))
+        db.session.execute(statement)
+
+
+def rollover(now=None):
+    """Refresh only the rows whose next show has started since the last run.
+
+    Returns the (venue_ids, artist_ids) refreshed.
+    """
+    now = now or datetime.now()
+    venue_ids, artist_ids = (
+        [id for id, in db.session.query(model.id).filter(model.next_show_time <= now)]
+        for model in (Venue, Artist))
+    refresh(venue_ids=venue_ids, artist_ids=artist_ids, now=now)
+    return venue_ids, artist_ids
+
+
+@click.command('rollover-shows')
+@click.option('--all', 'everything', is_flag=True,
+              help='Recompute every venue and artist, not just the ones due.')
+@with_appcontext
+def rollover_command(everything):
+    """Move shows that have started from the upcoming to the past counters."""
+    if everything:
+        refresh()
+        Revision.bump('Venue', 'Artist')
+        db.session.commit()
+        cache.invalidate('venues', 'artists', 'shows')
+        return
+
+    venue_ids, artist_ids = rollover()
+    if venue_ids or artist_ids:
+        Revision.bump(*[name for name, ids in (('Venue', venue_ids), ('Artist', artist_ids)) if ids])
+    db.session.commit()
+    # /shows lists only upcoming shows, so it changes with every rollover.
+    cache.invalidate('venues', 'artists', 'shows', venue=venue_ids, artist=artist_ids)
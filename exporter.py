@@ -0,0 +1,133 @@
+import csv
+import io
+import json
+import sys
+import zlib
+from datetime import datetime
+from itertools import islice
+
+import click
+from flask.cli import with_appcontext
+
+import genres
+from models import db, Venue, Artist, Show, Location, DATETIME_FORMAT
+
+#----------------------------------------------------------------------------#
+# Bulk export.
+#----------------------------------------------------------------------------#
+
+# Catalogue dumps for `flask export` and /export/<entity>.<format>. Rows are
+# read through a server-side cursor in fixed-size batches and encoded one
+# chunk at a time, so memory stays flat however many rows are exported.
+# Genres are looked up for a whole chunk at once and exported last, and
+# datetimes are written in models.DATETIME_FORMAT, which `flask import`
+# reads back.
+
+CHUNK_ROWS = 1000
+FORMATS = ('jsonl', 'csv')
+MIMETYPES = {'jsonl': 'application/x-ndjson', 'csv': 'text/csv'}
+
+
+def _venues():
+    return db.session.query(
+        Venue.id, Venue.name, Location.city, Location.state, Venue.address,
+        Venue.phone, Venue.website, Venue.image_link,
+        Venue.facebook_link, Venue.seeking_talent, Venue.seeking_description,
+        Venue.updated_at
+    ).join(Location, Venue.location_id == Location.id).order_by(Venue.id)
+
+
+def _artists():
+    return db.session.query(
+        Artist.id, Artist.name, Artist.city, Artist.state, Artist.phone,
+        Artist.website, Artist.image_link, Artist.facebook_link,
+        Artist.seeking_venue, Artist.seeking_description, Artist.updated_at
+    ).order_by(Artist.id)
+
+
+def _shows():
+    return db.session.query(
+        Show.id, Show.venue_id, Show.artist_id, Show.start_time, Show.duration, Show.updated_at
+    ).order_by(Show.id)
+
+
+# entity -> (query, model whose genres are exported)
+ENTITIES = {
+    'venues': (_venues, Venue),
+    'artists': (_artists, Artist),
+    'shows': (_shows, None)
+}
+
+
+def _value(value):
+    return value.strftime(DATETIME_FORMAT) if isinstance(value, datetime) else value
+
+
+def encode(entity, format):
+    """Yield the export of `entity` as text chunks of CHUNK_ROWS rows."""
+    build, model = ENTITIES[entity]
+    query = build()
+    columns = [column['name'] for column in query.column_descriptions]
+    if model is not None:
+        columns.append('genres')
+    buffer = io.StringIO()
+    writer = csv.writer(buffer) if format == 'csv' else None
+    if writer is not None:
+        writer.writerow(columns)
+
+    rows = iter(query.execution_options(stream_results=True).yield_per(CHUNK_ROWS))
+    while True:
+        chunk = list(islice(rows, CHUNK_ROWS))
+        if not chunk:
+            break
+        if model is not None:
+            names = genres.names_by_id(model, [row.id for row in chunk])
+            chunk = [tuple(row) + (names[row.id],) for row in chunk]
+        for row in chunk:
+            if writer is not None:
+                # Lists use the same ';' separator `flask import` reads.
+                writer.writerow([';'.join(value) if isinstance(value, list) else _value(value) for value in row])
+            else:
+                buffer.write(json.dumps(dict(zip(columns, map(_value, row))), separators=(',', ':')))
+                buffer.write('\n')
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+    # The CSV header of an empty export.
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def gzipped(chunks, level=6):
+    """Compress a stream of text chunks into a gzip stream on the fly."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode('utf-8'))
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+@click.command('export')
+@click.argument('entity', type=click.Choice(sorted(ENTITIES)))
+@click.option('--format', default='jsonl', type=click.Choice(FORMATS), show_default=True)
+@click.option('--gzip', 'compress', is_flag=True, help='Gzip the output.')
+@click.option('--output', '-o', type=click.Path(dir_okay=False),
+              help='File to write to; defaults to stdout.')
+@with_appcontext
+def export_command(entity, format, compress, output):
+    """Stream every venue, artist or show out as JSONL or CSV."""
+    chunks = encode(entity, format)
+    if compress:
+        chunks = gzipped(chunks)
+    else:
+        chunks = (chunk.encode('utf-8') for chunk in chunks)
+
+    out = open(output, 'wb') if output else sys.stdout.buffer
+    try:
+        for chunk in chunks:
+            out.write(chunk)
+    finally:
+        if output:
+            out.close()
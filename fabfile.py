@@ -1,15 +1,29 @@
+import os
+
 from fabric.api import local, settings, abort
 from fabric.contrib.console import confirm
 
+# Database the route benchmarks seed and run against, and the results saved
+# there with `python -m benchmarks.bench_routes <url> --save --baseline <file>`.
+# Without a baseline the route benchmarks are skipped.
+BENCH_DATABASE_URL = os.getenv('BENCH_DATABASE_URL', 'postgresql://localhost/fyyur_bench')
+BENCH_BASELINE = os.getenv('BENCH_BASELINE', '')
+
 # prepare for deployment
 
 
 def test():
     with settings(warn_only=True):
-        result = local(
-            "python test_tasks.py -v && python test_users.py -v", capture=True
-        )
-    if result.failed and not confirm("Tests failed. Continue?"):
+        results = [
+            local("python -m unittest discover -p 'test_*.py' -v", capture=True),
+            local("python -m benchmarks.bench_startup", capture=True)
+        ]
+        if BENCH_BASELINE:
+            results.append(local(
+                "python -m benchmarks.bench_routes {} --check --baseline {}".format(
+                    BENCH_DATABASE_URL, BENCH_BASELINE), capture=True
+            ))
+    if any(result.failed for result in results) and not confirm("Tests failed. Continue?"):
         abort("Aborted at user request.")
 
 
@@ -40,7 +54,7 @@ def heroku():
 
 def heroku_test():
     local(
-        "heroku run python test_tasks.py -v && heroku run python test_users.py -v"
+        "heroku run python -m unittest discover -p 'test_*.py' -v"
     )
 
 
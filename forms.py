@@ -1,7 +1,57 @@
 from datetime import datetime
+import dateutil.parser
 from flask_wtf import Form
-from wtforms import StringField, SelectField, SelectMultipleField, DateTimeField
-from wtforms.validators import DataRequired, AnyOf, URL
+from wtforms import StringField, SelectField, SelectMultipleField, DateTimeField, IntegerField, TextAreaField
+from wtforms.validators import DataRequired, InputRequired, AnyOf, URL, NumberRange
+from wtforms.widgets import Select, html_params
+from markupsafe import Markup
+from genres import choices as genre_choices
+from models import SHOW_DEFAULT_DURATION, SHOW_MAX_DURATION, DATETIME_FORMAT
+from reference import STATE_CHOICES, options
+
+class CachedSelect(Select):
+    """Select widget that joins pre-rendered <option> markup (see
+    reference.options) instead of formatting every option per render. The
+    output is the same as Select's."""
+
+    def __call__(self, field, **kwargs):
+        kwargs.setdefault('id', field.id)
+        if self.multiple:
+            kwargs['multiple'] = True
+        if 'required' not in kwargs and 'required' in getattr(field, 'flags', []):
+            kwargs['required'] = True
+        if self.multiple:
+            selected = set(field.data or ())
+        else:
+            selected = {field.data}
+        html = ['<select %s>' % html_params(name=field.name, **kwargs)]
+        html.extend(markup_on if value in selected else markup
+                    for value, markup, markup_on in options(tuple(field.choices)))
+        html.append('</select>')
+        return Markup(''.join(html))
+
+class ShowTimeField(DateTimeField):
+    """DateTimeField that reads times the way the show views do, with
+    dateutil, so '2020-05-21 21:30' and ISO 8601 are accepted as well as
+    the rendered format. The export format is tried first, since a large
+    import is mostly in it and strptime is much cheaper."""
+
+    def process_formdata(self, valuelist):
+        text = ' '.join(valuelist).strip()
+        if not text:
+            # Left to InputRequired, which reports it as missing.
+            self.data = None
+            return
+        try:
+            self.data = datetime.strptime(text, DATETIME_FORMAT)
+            return
+        except ValueError:
+            pass
+        try:
+            self.data = dateutil.parser.parse(text)
+        except (ValueError, OverflowError):
+            self.data = None
+            raise ValueError('Not a valid date and time: %r' % text)
 
 class ShowForm(Form):
     artist_id = StringField(
@@ -12,10 +62,23 @@ class ShowForm(Form):
         'venue_id',
         validators=[DataRequired()]
     )
-    start_time = DateTimeField(
+    start_time = ShowTimeField(
         'start_time',
-        validators=[DataRequired()],
-        default= datetime.today()
+        validators=[InputRequired()],
+        # Called for each form, so the default is the time it is shown.
+        default=datetime.today
+    )
+    duration = IntegerField(
+        'duration',
+        validators=[DataRequired(), NumberRange(min=1, max=SHOW_MAX_DURATION)],
+        default=SHOW_DEFAULT_DURATION
+    )
+
+class ShowBatchForm(Form):
+    # One show per line: artist_id, venue_id, start_time[, duration].
+    shows = TextAreaField(
+        'shows',
+        validators=[DataRequired()]
     )
 
 class VenueForm(Form):
@@ -27,59 +90,8 @@ class VenueForm(Form):
     )
     state = SelectField(
         'state', validators=[DataRequired()],
-        choices=[
-            ('AL', 'AL'),
-            ('AK', 'AK'),
-            ('AZ', 'AZ'),
-            ('AR', 'AR'),
-            ('CA', 'CA'),
-            ('CO', 'CO'),
-            ('CT', 'CT'),
-            ('DE', 'DE'),
-            ('DC', 'DC'),
-            ('FL', 'FL'),
-            ('GA', 'GA'),
-            ('HI', 'HI'),
-            ('ID', 'ID'),
-            ('IL', 'IL'),
-            ('IN', 'IN'),
-            ('IA', 'IA'),
-            ('KS', 'KS'),
-            ('KY', 'KY'),
-            ('LA', 'LA'),
-            ('ME', 'ME'),
-            ('MT', 'MT'),
-            ('NE', 'NE'),
-            ('NV', 'NV'),
-            ('NH', 'NH'),
-            ('NJ', 'NJ'),
-            ('NM', 'NM'),
-            ('NY', 'NY'),
-            ('NC', 'NC'),
-            ('ND', 'ND'),
-            ('OH', 'OH'),
-            ('OK', 'OK'),
-            ('OR', 'OR'),
-            ('MD', 'MD'),
-            ('MA', 'MA'),
-            ('MI', 'MI'),
-            ('MN', 'MN'),
-            ('MS', 'MS'),
-            ('MO', 'MO'),
-            ('PA', 'PA'),
-            ('RI', 'RI'),
-            ('SC', 'SC'),
-            ('SD', 'SD'),
-            ('TN', 'TN'),
-            ('TX', 'TX'),
-            ('UT', 'UT'),
-            ('VT', 'VT'),
-            ('VA', 'VA'),
-            ('WA', 'WA'),
-            ('WV', 'WV'),
-            ('WI', 'WI'),
-            ('WY', 'WY'),
-        ]
+        choices=STATE_CHOICES,
+        widget=CachedSelect()
     )
     address = StringField(
         'address', validators=[DataRequired()]
@@ -91,34 +103,19 @@ class VenueForm(Form):
         'image_link'
     )
     genres = SelectMultipleField(
-        # TODO implement enum restriction
+        # Choices come from the Genre table; see __init__.
         'genres', validators=[DataRequired()],
-        choices=[
-            ('Alternative', 'Alternative'),
-            ('Blues', 'Blues'),
-            ('Classical', 'Classical'),
-            ('Country', 'Country'),
-            ('Electronic', 'Electronic'),
-            ('Folk', 'Folk'),
-            ('Funk', 'Funk'),
-            ('Hip-Hop', 'Hip-Hop'),
-            ('Heavy Metal', 'Heavy Metal'),
-            ('Instrumental', 'Instrumental'),
-            ('Jazz', 'Jazz'),
-            ('Musical Theatre', 'Musical Theatre'),
-            ('Pop', 'Pop'),
-            ('Punk', 'Punk'),
-            ('R&B', 'R&B'),
-            ('Reggae', 'Reggae'),
-            ('Rock n Roll', 'Rock n Roll'),
-            ('Soul', 'Soul'),
-            ('Other', 'Other'),
-        ]
+        choices=(),
+        widget=CachedSelect(multiple=True)
     )
     facebook_link = StringField(
         'facebook_link', validators=[URL()]
     )
 
+    def __init__(self, *args, **kwargs):
+        super(VenueForm, self).__init__(*args, **kwargs)
+        self.genres.choices = genre_choices()
+
 class ArtistForm(Form):
     name = StringField(
         'name', validators=[DataRequired()]
@@ -128,59 +125,8 @@ class ArtistForm(Form):
     )
     state = SelectField(
         'state', validators=[DataRequired()],
-        choices=[
-            ('AL', 'AL'),
-            ('AK', 'AK'),
-            ('AZ', 'AZ'),
-            ('AR', 'AR'),
-            ('CA', 'CA'),
-            ('CO', 'CO'),
-            ('CT', 'CT'),
-            ('DE', 'DE'),
-            ('DC', 'DC'),
-            ('FL', 'FL'),
-            ('GA', 'GA'),
-            ('HI', 'HI'),
-            ('ID', 'ID'),
-            ('IL', 'IL'),
-            ('IN', 'IN'),
-            ('IA', 'IA'),
-            ('KS', 'KS'),
-            ('KY', 'KY'),
-            ('LA', 'LA'),
-            ('ME', 'ME'),
-            ('MT', 'MT'),
-            ('NE', 'NE'),
-            ('NV', 'NV'),
-            ('NH', 'NH'),
-            ('NJ', 'NJ'),
-            ('NM', 'NM'),
-            ('NY', 'NY'),
-            ('NC', 'NC'),
-            ('ND', 'ND'),
-            ('OH', 'OH'),
-            ('OK', 'OK'),
-            ('OR', 'OR'),
-            ('MD', 'MD'),
-            ('MA', 'MA'),
-            ('MI', 'MI'),
-            ('MN', 'MN'),
-            ('MS', 'MS'),
-            ('MO', 'MO'),
-            ('PA', 'PA'),
-            ('RI', 'RI'),
-            ('SC', 'SC'),
-            ('SD', 'SD'),
-            ('TN', 'TN'),
-            ('TX', 'TX'),
-            ('UT', 'UT'),
-            ('VT', 'VT'),
-            ('VA', 'VA'),
-            ('WA', 'WA'),
-            ('WV', 'WV'),
-            ('WI', 'WI'),
-            ('WY', 'WY'),
-        ]
+        choices=STATE_CHOICES,
+        widget=CachedSelect()
     )
     phone = StringField(
         # TODO implement validation logic for state
@@ -190,33 +136,18 @@ class ArtistForm(Form):
         'image_link'
     )
     genres = SelectMultipleField(
-        # TODO implement enum restriction
+        # Choices come from the Genre table; see __init__.
         'genres', validators=[DataRequired()],
-        choices=[
-            ('Alternative', 'Alternative'),
-            ('Blues', 'Blues'),
-            ('Classical', 'Classical'),
-            ('Country', 'Country'),
-            ('Electronic', 'Electronic'),
-            ('Folk', 'Folk'),
-            ('Funk', 'Funk'),
-            ('Hip-Hop', 'Hip-Hop'),
-            ('Heavy Metal', 'Heavy Metal'),
-            ('Instrumental', 'Instrumental'),
-            ('Jazz', 'Jazz'),
-            ('Musical Theatre', 'Musical Theatre'),
-            ('Pop', 'Pop'),
-            ('Punk', 'Punk'),
-            ('R&B', 'R&B'),
-            ('Reggae', 'Reggae'),
-            ('Rock n Roll', 'Rock n Roll'),
-            ('Soul', 'Soul'),
-            ('Other', 'Other'),
-        ]
+        choices=(),
+        widget=CachedSelect(multiple=True)
     )
     facebook_link = StringField(
         # TODO implement enum restriction
         'facebook_link', validators=[URL()]
     )
 
+    def __init__(self, *args, **kwargs):
+        super(ArtistForm, self).__init__(*args, **kwargs)
+        self.genres.choices = genre_choices()
+
 # TODO IMPLEMENT NEW ARTIST FORM AND NEW SHOW FORM
@@ -0,0 +1,97 @@
+import threading
+import time
+
+from flask import current_app
+
+from models import db, Genre, VenueGenre, ArtistGenre, Venue, Artist
+
+#----------------------------------------------------------------------------#
+# Genres.
+#----------------------------------------------------------------------------#
+
+# Genres live in the Genre table, linked to venues and artists through
+# VenueGenre/ArtistGenre. The form choices are read from the table and kept
+# per app for CHOICES_TTL seconds, or until a genre is added here.
+
+DEFAULT_GENRES = (
+    'Alternative', 'Blues', 'Classical', 'Country', 'Electronic', 'Folk',
+    'Funk', 'Hip-Hop', 'Heavy Metal', 'Instrumental', 'Jazz',
+    'Musical Theatre', 'Pop', 'Punk', 'R&B', 'Reggae', 'Rock n Roll', 'Soul',
+    'Other'
+)
+CHOICES_TTL = 300
+
+LINKS = {
+    Venue: (VenueGenre, VenueGenre.c.venue_id),
+    Artist: (ArtistGenre, ArtistGenre.c.artist_id)
+}
+
+
+class _Choices(object):
+    """One app's cached choices, in app.extensions['genres']."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.choices = None
+        self.expires = 0.0
+
+
+def choices():
+    """(name, name) pairs for the genre select fields, by name."""
+    cached = current_app.extensions['genres']
+    with cached.lock:
+        if cached.choices is None or cached.expires < time.monotonic():
+            cached.choices = tuple((name, name) for name, in db.session.query(Genre.name).order_by(Genre.name))
+            cached.expires = time.monotonic() + CHOICES_TTL
+        return cached.choices
+
+
+def invalidate():
+    cached = current_app.extensions['genres']
+    with cached.lock:
+        cached.choices = None
+
+
+def init_app(app):
+    app.extensions['genres'] = _Choices()
+
+
+def ids():
+    """name -> Genre.id for every genre."""
+    return {name: id for id, name in db.session.query(Genre.id, Genre.name)}
+
+
+def ensure_defaults():
+    """Insert any of DEFAULT_GENRES the table is missing."""
+    existing = ids()
+    missing = [{'name': name} for name in DEFAULT_GENRES if name not in existing]
+    if missing:
+        db.session.execute(Genre.__table__.insert(), missing)
+        invalidate()
+
+
+def tagged(model, genre):
+    """Criterion for `model` rows linked to the genre called `genre`.
+
+    It resolves to an IN over the link table's (genre_id, <model>_id) index,
+    reached through the unique index on Genre.name.
+    """
+    table, key = LINKS[model]
+    return model.id.in_(
+        db.select([key]).select_from(table.join(Genre, Genre.id == table.c.genre_id))
+        .where(Genre.name == genre)
+    )
+
+
+def names_by_id(model, ids):
+    """{id: [genre names]} for the given venue or artist ids."""
+    table, key = LINKS[model]
+    names = {id: [] for id in ids}
+    if not names:
+        return names
+    rows = db.session.query(key, Genre.name).select_from(table) \
+        .join(Genre, Genre.id == table.c.genre_id) \
+        .filter(key.in_(list(names))).order_by(key, Genre.name)
+    for id, name in rows:
+        names[id].append(name)
+    return names
@@ -0,0 +1,278 @@
+import csv
+import json
+import os
+import time
+
+import click
+from flask.cli import with_appcontext
+from sqlalchemy.exc import SQLAlchemyError
+from werkzeug.datastructures import MultiDict
+
+import availability
+import counters
+import genres
+import locations
+from cache import cache
+from bulk import bulk_insert
+from models import db, Venue, Artist, Show, VenueGenre, ArtistGenre
+
+#----------------------------------------------------------------------------#
+# Bulk import.
+#----------------------------------------------------------------------------#
+
+# `flask import <entity> <file>` streams CSV or JSONL records through a
+# generator pipeline: parse -> validate with the web form -> build table rows
+# -> insert in batches. A bad record is reported with its line number and
+# skipped; it never aborts the rest of its batch or the import. Shows are
+# booked through availability.book_many(), so an import is held to the same
+# overlap checks as the web forms, and their start times are read as the
+# show forms read them: models.DATETIME_FORMAT, which `flask export`
+# writes, or anything else the forms accept.
+
+BATCH_SIZE = 1000
+# Multi-valued fields are separated by ';' inside a CSV cell.
+LIST_SEPARATOR = ';'
+
+
+class ImportReport(object):
+
+    def __init__(self):
+        self.read = 0
+        self.inserted = 0
+        self.errors = []
+        self.started = time.perf_counter()
+
+    def fail(self, line, message):
+        self.errors.append((line, message))
+
+    @property
+    def rate(self):
+        elapsed = time.perf_counter() - self.started
+        return self.inserted / elapsed if elapsed else 0.0
+
+
+#  Pipeline stages
+#  ----------------------------------------------------------------
+
+def read_records(stream, format):
+    """Yield (line, MultiDict) for each record in a CSV or JSONL stream."""
+    if format == 'csv':
+        for line, row in enumerate(csv.DictReader(stream), start=2):
+            yield line, MultiDict(
+                (key, item.strip())
+                for key, value in row.items() if key and value is not None
+                for item in (value.split(LIST_SEPARATOR) if key == 'genres' else [value])
+            )
+    else:
+        for line, text in enumerate(stream, start=1):
+            if not text.strip():
+                continue
+            try:
+                record = json.loads(text)
+            except ValueError as error:
+                yield line, error
+                continue
+            yield line, MultiDict(
+                (key, str(item))
+                for key, value in record.items() if value is not None
+                for item in (value if isinstance(value, list) else [value])
+            )
+
+
+def validate(records, form_class, report):
+    """Keep the records `form_class` accepts, as (line, form.data)."""
+    for line, formdata in records:
+        report.read += 1
+        if isinstance(formdata, Exception):
+            report.fail(line, 'invalid JSON: %s' % formdata)
+            continue
+        form = form_class(formdata=formdata, meta={'csrf': False})
+        if form.validate():
+            yield line, form.data
+        else:
+            report.fail(line, '; '.join(
+                '%s: %s' % (field, ', '.join(messages)) for field, messages in form.errors.items()))
+
+
+def venue_rows(records, report):
+    locations.warm()
+    genre_ids = genres.ids()
+    for line, data in records:
+        location_id = locations.resolve(data['city'].title().strip(), data['state'].strip())
+        # Committed straight away so a failed batch cannot roll back a
+        # location that later rows already point at. With the id cached this
+        # is a no-op: nothing has been sent since the last commit.
+        db.session.commit()
+        yield line, {
+            'name': data['name'].strip(),
+            'address': data['address'].strip(),
+            'phone': data['phone'].strip(),
+            'genres': [genre_ids[name] for name in data['genres'] if name in genre_ids],
+            'facebook_link': data['facebook_link'].strip(),
+            'image_link': data['image_link'].strip(),
+            'location_id': location_id
+        }
+
+
+def artist_rows(records, report):
+    genre_ids = genres.ids()
+    for line, data in records:
+        yield line, {
+            'name': data['name'].strip(),
+            'city': data['city'].title().strip(),
+            'state': data['state'].strip(),
+            'phone': data['phone'].strip(),
+            'genres': [genre_ids[name] for name in data['genres'] if name in genre_ids],
+            'facebook_link': data['facebook_link'].strip(),
+            'image_link': data['image_link'].strip()
+        }
+
+
+def show_rows(records, report):
+    for line, data in records:
+        try:
+            yield line, {
+                'artist_id': int(data['artist_id']),
+                'venue_id': int(data['venue_id']),
+                'start_time': data['start_time'],
+                'duration': data['duration']
+            }
+        except ValueError:
+            report.fail(line, 'artist_id and venue_id must be integers')
+
+
+def batched(rows, size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+#  Bulk insert
+#  ----------------------------------------------------------------
+
+def insert_rows(table, rows, links=None):
+    """Insert entity rows; with `links`, each row's 'genres' (Genre ids) are
+    written to that association table in the same transaction."""
+    if links is None:
+        bulk_insert(table, rows)
+        return
+    ids = bulk_insert(table, [{k: v for k, v in row.items() if k != 'genres'} for row in rows], returning=True)
+    key = next(column.name for column in links.c if column.name != 'genre_id')
+    pairs = [{key: id, 'genre_id': genre_id} for id, row in zip(ids, rows) for genre_id in row['genres']]
+    if pairs:
+        bulk_insert(links, pairs)
+
+
+def load(table, batches, report, links=None):
+    dbapi_error = db.engine.dialect.dbapi.Error
+    for batch in batches:
+        try:
+            insert_rows(table, [row for _, row in batch], links)
+            db.session.commit()
+            report.inserted += len(batch)
+        except (SQLAlchemyError, dbapi_error):
+            # Replay the batch row by row to isolate the rows that fail.
+            db.session.rollback()
+            for line, row in batch:
+                try:
+                    insert_rows(table, [row], links)
+                    db.session.commit()
+                    report.inserted += 1
+                except (SQLAlchemyError, dbapi_error) as error:
+                    db.session.rollback()
+                    report.fail(line, str(getattr(error, 'orig', None) or error).strip())
+        yield len(batch)
+
+
+def book(batches, report):
+    """Book batches of show rows, rejecting the ones that overlap shows
+    already booked or earlier rows of the import."""
+    dbapi_error = db.engine.dialect.dbapi.Error
+    for batch in batches:
+        bookings = [(row['venue_id'], row['artist_id'], row['start_time'], row['duration']) for _, row in batch]
+        try:
+            results = availability.book_many(bookings)
+            db.session.commit()
+        except (SQLAlchemyError, dbapi_error) as error:
+            db.session.rollback()
+            results = [ValueError(str(getattr(error, 'orig', None) or error).strip())] * len(batch)
+        for (line, _), result in zip(batch, results):
+            if isinstance(result, availability.Conflict):
+                report.fail(line, 'overlaps %s' % result)
+            elif isinstance(result, Exception):
+                report.fail(line, str(result))
+            else:
+                report.inserted += 1
+        yield len(batch)
+
+
+# Forms are named rather than imported, so the app only loads WTForms for
+# the import command when an import runs.
+ENTITIES = {
+    'venues': (Venue, 'VenueForm', venue_rows, VenueGenre),
+    'artists': (Artist, 'ArtistForm', artist_rows, ArtistGenre),
+    'shows': (Show, 'ShowForm', show_rows, None)
+}
+
+
+def import_file(entity, stream, format, batch_size=BATCH_SIZE, progress=None):
+    import forms
+
+    model, form_name, to_rows, links = ENTITIES[entity]
+    form_class = getattr(forms, form_name)
+    report = ImportReport()
+    records = validate(read_records(stream, format), form_class, report)
+    batches = batched(to_rows(records, report), batch_size)
+    if entity == 'shows':
+        steps = book(batches, report)
+    else:
+        steps = load(model.__table__, batches, report, links)
+    for _ in steps:
+        if progress is not None:
+            progress(report)
+
+    cache.invalidate(entity)
+    if entity == 'shows':
+        counters.refresh()
+        db.session.commit()
+        cache.invalidate('venues', 'artists')
+    return report
+
+
+@click.command('import')
+@click.argument('entity', type=click.Choice(sorted(ENTITIES)))
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', type=click.Choice(['csv', 'jsonl']),
+              help='Input format; defaults to the file extension.')
+@click.option('--batch-size', default=BATCH_SIZE, show_default=True)
+@click.option('--errors', 'errors_path', type=click.Path(dir_okay=False),
+              help='Write rejected records to this file as JSONL.')
+@with_appcontext
+def import_command(entity, path, format, batch_size, errors_path):
+    """Bulk-load venues, artists or shows from a CSV or JSONL file."""
+    format = format or ('csv' if os.path.splitext(path)[1].lower() == '.csv' else 'jsonl')
+
+    def progress(report):
+        click.echo('\r%d read, %d inserted, %d rejected, %.0f rows/s' % (
+            report.read, report.inserted, len(report.errors), report.rate), nl=False, err=True)
+
+    with open(path, newline='', encoding='utf-8') as stream:
+        report = import_file(entity, stream, format, batch_size, progress)
+
+    click.echo(err=True)
+    click.echo('Imported %d of %d %s at %.0f rows/s; %d rejected.' % (
+        report.inserted, report.read, entity, report.rate, len(report.errors)))
+    if errors_path:
+        with open(errors_path, 'w') as out:
+            for line, message in report.errors:
+                out.write(json.dumps({'line': line, 'error': message}) + '\n')
+    else:
+        for line, message in report.errors[:20]:
+            click.echo('  line %d: %s' % (line, message))
+        if len(report.errors) > 20:
+            click.echo('  ... %d more; use --errors to write them all out.' % (len(report.errors) - 20))
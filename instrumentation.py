@@ -0,0 +1,162 @@
+import heapq
+import json
+import logging
+import sys
+import time
+
+from flask import g, has_app_context, request
+from jinja2 import Template
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from metrics import metrics
+
+#----------------------------------------------------------------------------#
+# Request instrumentation.
+#----------------------------------------------------------------------------#
+
+# Opt-in (INSTRUMENTATION=1) per-request profile: route, status, wall time,
+# template render time, SQL statement count and time, and the slowest
+# statements. Each request is written as one JSON log line and fed into the
+# histograms on /__metrics. Streamed pages are measured until their last
+# chunk has been sent.
+
+logger = logging.getLogger('instrumentation')
+
+SQL_COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100, 250)
+
+request_seconds = metrics.histogram(
+    'http_request_duration_seconds', 'Wall time per request.', ('route', 'method', 'status'))
+template_seconds = metrics.histogram(
+    'http_request_template_seconds', 'Template render time per request.', ('route',))
+sql_seconds = metrics.histogram(
+    'http_request_sql_seconds', 'Time spent in SQL per request.', ('route',))
+sql_statements = metrics.histogram(
+    'http_request_sql_statements', 'SQL statements per request.', ('route',), buckets=SQL_COUNT_BUCKETS)
+
+
+class RequestProfile(object):
+    __slots__ = ('started', 'status', 'template', 'sql_count', 'sql_time', 'slowest', 'keep')
+
+    def __init__(self, keep):
+        self.started = time.perf_counter()
+        self.status = None
+        self.template = 0.0
+        self.sql_count = 0
+        self.sql_time = 0.0
+        self.slowest = []
+        self.keep = keep
+
+    def statement(self, statement, elapsed):
+        self.sql_count += 1
+        self.sql_time += elapsed
+        entry = (elapsed, self.sql_count, statement)
+        if len(self.slowest) < self.keep:
+            heapq.heappush(self.slowest, entry)
+        elif elapsed > self.slowest[0][0]:
+            heapq.heapreplace(self.slowest, entry)
+
+
+def _profile():
+    return g.get('_profile') if has_app_context() else None
+
+
+class TimedTemplate(Template):
+    """Template that adds its render time to the current request's profile."""
+
+    def render(self, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return super(TimedTemplate, self).render(*args, **kwargs)
+        finally:
+            profile = _profile()
+            if profile is not None:
+                profile.template += time.perf_counter() - started
+
+    def generate(self, *args, **kwargs):
+        # Only the time spent producing chunks counts, not the time the
+        # client takes to receive them.
+        chunks = super(TimedTemplate, self).generate(*args, **kwargs)
+        while True:
+            started = time.perf_counter()
+            try:
+                chunk = next(chunks)
+            except StopIteration:
+                return
+            finally:
+                profile = _profile()
+                if profile is not None:
+                    profile.template += time.perf_counter() - started
+            yield chunk
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _profile() is not None:
+        conn.info.setdefault('instrumentation_started', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profile = _profile()
+    started = conn.info.get('instrumentation_started')
+    if profile is not None and started:
+        profile.statement(statement, time.perf_counter() - started.pop())
+
+
+def init_app(app):
+    if not app.config.get('INSTRUMENTATION'):
+        return
+
+    keep = app.config.get('INSTRUMENTATION_SLOWEST', 3)
+    if not logger.handlers:
+        path = app.config.get('INSTRUMENTATION_LOG')
+        handler = logging.FileHandler(path) if path else logging.StreamHandler(sys.stderr)
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+
+    app.jinja_env.template_class = TimedTemplate
+    if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+    metrics.init_app(app)
+
+    @app.before_request
+    def start_profile():
+        g._profile = RequestProfile(keep)
+
+    @app.after_request
+    def record_status(response):
+        profile = _profile()
+        if profile is not None:
+            profile.status = response.status_code
+        return response
+
+    @app.teardown_request
+    def finish_profile(error=None):
+        profile = g.pop('_profile', None)
+        if profile is None:
+            return
+        wall = time.perf_counter() - profile.started
+        route = request.url_rule.rule if request.url_rule is not None else '<unmatched>'
+        status = profile.status or 500
+
+        request_seconds.observe(wall, route=route, method=request.method, status=status)
+        template_seconds.observe(profile.template, route=route)
+        sql_seconds.observe(profile.sql_time, route=route)
+        sql_statements.observe(profile.sql_count, route=route)
+
+        logger.info(json.dumps({
+            'route': route,
+            'method': request.method,
+            'path': request.full_path.rstrip('?'),
+            'status': status,
+            'wall_ms': round(wall * 1e3, 2),
+            'template_ms': round(profile.template * 1e3, 2),
+            'sql_count': profile.sql_count,
+            'sql_ms': round(profile.sql_time * 1e3, 2),
+            'slowest': [
+                {'ms': round(elapsed * 1e3, 2), 'statement': ' '.join(statement.split())[:300]}
+                for elapsed, _, statement in sorted(profile.slowest, reverse=True)
+            ]
+        }, separators=(',', ':')))
@@ -0,0 +1,83 @@
+from flask import current_app
+from sqlalchemy import event
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from cache import LRUCache
+from models import db, Location
+
+#----------------------------------------------------------------------------#
+# Locations.
+#----------------------------------------------------------------------------#
+
+# A venue's city and state resolve to one Location row, unique on
+# (city, state). Missing rows are created with an upsert in the caller's
+# transaction, so concurrent submissions for a new city agree on a single id
+# and a venue insert commits together with its location. Resolved ids are
+# kept in process, per app, but only once the transaction that saw them has
+# committed: an id from a rolled back insert never reaches the cache.
+
+CACHE_SIZE = 4096
+# Locations are never deleted, so an id stays valid; the TTL only bounds how
+# long a row removed by hand is remembered.
+CACHE_TTL = 24 * 60 * 60
+
+
+def _ids():
+    return current_app.extensions['locations']
+
+
+def resolve(city, state):
+    """Location.id for (city, state), inserting the row if it is missing.
+
+    A cached id costs no round trip. Otherwise PostgreSQL answers with one
+    INSERT ... ON CONFLICT DO UPDATE ... RETURNING, which returns the id
+    whether the row was inserted or already there; other databases insert
+    or ignore and then select the id.
+    """
+    key = (city, state)
+    id = _ids().get(key)
+    if id is not None:
+        return id
+
+    table = Location.__table__
+    if db.engine.dialect.name == 'postgresql':
+        # DO UPDATE rather than DO NOTHING: the no-op update locks the
+        # existing row and makes RETURNING produce its id.
+        statement = pg_insert(table).values(city=city, state=state)
+        statement = statement.on_conflict_do_update(
+            constraint='uq_Location_city_state',
+            set_={'city': statement.excluded.city}
+        ).returning(table.c.id)
+        id = db.session.execute(statement).scalar()
+    else:
+        db.session.execute(table.insert().prefix_with('OR IGNORE').values(city=city, state=state))
+        id = db.session.query(Location.id).filter_by(city=city, state=state).scalar()
+
+    db.session.info.setdefault('locations', {})[key] = id
+    return id
+
+
+def warm():
+    """Cache the id of every existing location."""
+    ids = _ids()
+    for id, city, state in db.session.query(Location.id, Location.city, Location.state):
+        ids.set((city, state), id)
+
+
+@event.listens_for(db.session, 'after_commit')
+def _remember(session):
+    resolved = session.info.pop('locations', None)
+    if resolved:
+        ids = _ids()
+        for key, id in resolved.items():
+            ids.set(key, id)
+
+
+@event.listens_for(db.session, 'after_transaction_end')
+def _forget(session, transaction):
+    if transaction.parent is None:
+        session.info.pop('locations', None)
+
+
+def init_app(app):
+    app.extensions['locations'] = LRUCache(max_entries=CACHE_SIZE, ttl=CACHE_TTL)
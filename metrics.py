@@ -0,0 +1,175 @@
+import threading
+from bisect import bisect_left
+
+from flask import Response
+
+#----------------------------------------------------------------------------#
+# Metrics.
+#----------------------------------------------------------------------------#
+
+# In-process counters, gauges and histograms, served at /__metrics in the
+# Prometheus text format. Values live in this worker process only; scrape
+# every worker (or sum them in the query) when running more than one.
+
+# Seconds; suits both pool waits and request/SQL timings.
+DEFAULT_BUCKETS = (.001, .0025, .005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5, 10, 30)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    return '{%s}' % ','.join('%s="%s"' % (name, _escape(value)) for name, value in pairs)
+
+
+def _number(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric(object):
+    type = None
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def _key(self, labels):
+        return tuple(labels.get(name, '') for name in self.labelnames)
+
+    def render(self):
+        lines = ['# HELP %s %s' % (self.name, self.help), '# TYPE %s %s' % (self.name, self.type)]
+        with self._lock:
+            values = sorted(self._values.items())
+        for key, value in values:
+            lines.extend(self._samples(key, value))
+        return lines
+
+    def _samples(self, key, value):
+        return ['%s%s %s' % (self.name, _labels(self.labelnames, key), _number(value))]
+
+
+class Counter(Metric):
+    type = 'counter'
+
+    def __init__(self, name, help, labelnames=()):
+        super(Counter, self).__init__(name, help, labelnames)
+        if not self.labelnames:
+            self._values[()] = 0
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    """A gauge that is either set directly or read from `fn` on each scrape."""
+    type = 'gauge'
+
+    def __init__(self, name, help, labelnames=(), fn=None):
+        super(Gauge, self).__init__(name, help, labelnames)
+        self.fn = fn
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def render(self):
+        if self.fn is not None:
+            value = self.fn()
+            if value is None:
+                return []
+            with self._lock:
+                self._values[()] = value
+        return super(Gauge, self).render()
+
+
+class Histogram(Metric):
+    type = 'histogram'
+
+    def __init__(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super(Histogram, self).__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        if not self.labelnames:
+            self._values[()] = self._empty()
+
+    def _empty(self):
+        # Per-bucket (non-cumulative) counts, then sum and count.
+        return [[0] * len(self.buckets), 0.0, 0]
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = self._empty()
+            index = bisect_left(self.buckets, value)
+            if index < len(self.buckets):
+                state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def _samples(self, key, state):
+        counts, total, count = state
+        lines = []
+        cumulative = 0
+        for bound, bucket in zip(self.buckets + (float('inf'),), counts + [count - sum(counts)]):
+            cumulative += bucket
+            lines.append('%s_bucket%s %d' % (
+                self.name, _labels(self.labelnames, key, [('le', _number(bound))]), cumulative))
+        lines.append('%s_sum%s %r' % (self.name, _labels(self.labelnames, key), total))
+        lines.append('%s_count%s %d' % (self.name, _labels(self.labelnames, key), count))
+        return lines
+
+
+class Registry(object):
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        if 'metrics' not in app.extensions:
+            app.extensions['metrics'] = self
+            app.add_url_rule('/__metrics', 'metrics', self.view)
+
+    def _get(self, cls, name, *args, **kwargs):
+        # Registering a name twice returns the first metric, so modules can
+        # declare their metrics from init_app without double counting.
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, *args, **kwargs)
+            return metric
+
+    def counter(self, name, help, labelnames=()):
+        return self._get(Counter, name, help, labelnames)
+
+    def gauge(self, name, help, labelnames=(), fn=None):
+        return self._get(Gauge, name, help, labelnames, fn=fn)
+
+    def histogram(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._get(Histogram, name, help, labelnames, buckets=buckets)
+
+    def render(self):
+        with self._lock:
+            metrics = [self._metrics[name] for name in sorted(self._metrics)]
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+    def view(self):
+        return Response(self.render(), mimetype='text/plain; version=0.0.4')
+
+
+metrics = Registry()
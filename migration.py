@@ -0,0 +1,47 @@
+import click
+
+from models import db
+
+#----------------------------------------------------------------------------#
+# Schema migrations.
+#----------------------------------------------------------------------------#
+
+# Flask-Migrate pulls in Alembic, which serving requests never needs, so it
+# is only set up once a `flask db` command runs. The app registers its own
+# lazy `db` group, which loads Flask-Migrate's commands when it is invoked.
+# Flask-Migrate also installs that group as a flask CLI plugin, which the
+# flask command finds before the app's; both read app.extensions['migrate'],
+# so the placeholder there sets up Flask-Migrate on first use either way.
+
+
+class LazyMigrate(object):
+    """Placeholder for app.extensions['migrate'] that replaces itself with
+    Flask-Migrate's own config the first time it is read."""
+
+    def __init__(self, app):
+        self.app = app
+
+    def __getattr__(self, name):
+        from flask_migrate import Migrate
+
+        Migrate(self.app, db)
+        return getattr(self.app.extensions['migrate'], name)
+
+
+class LazyGroup(click.Group):
+    """`flask db`, with its subcommands loaded from Flask-Migrate on use."""
+
+    def _commands(self):
+        from flask_migrate.cli import db as commands
+        return commands
+
+    def list_commands(self, ctx):
+        return self._commands().list_commands(ctx)
+
+    def get_command(self, ctx, name):
+        return self._commands().get_command(ctx, name)
+
+
+def init_app(app):
+    app.extensions['migrate'] = LazyMigrate(app)
+    app.cli.add_command(LazyGroup('db', help='Perform database migrations.'))
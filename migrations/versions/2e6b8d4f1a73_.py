@@ -0,0 +1,28 @@
+"""add Show.duration for availability and conflict checks
+
+Revision ID: 2e6b8d4f1a73
+Revises: 9b1d7f3a2c58
+Create Date: 2026-10-18 16:20:47.318204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '2e6b8d4f1a73'
+down_revision = '9b1d7f3a2c58'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Existing shows take the default length of two hours.
+    op.add_column('Show', sa.Column('duration', sa.Integer(), nullable=False, server_default='120'))
+    op.alter_column('Show', 'duration', server_default=None)
+    op.create_check_constraint('ck_Show_duration', 'Show', 'duration > 0 AND duration <= 1440')
+
+
+def downgrade():
+    op.drop_constraint('ck_Show_duration', 'Show', type_='check')
+    op.drop_column('Show', 'duration')
@@ -0,0 +1,44 @@
+"""add denormalised show counters to Venue and Artist
+
+Revision ID: 5a8f3c1e9b27
+Revises: c41b7e9d2a06
+Create Date: 2026-10-18 12:41:55.209316
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5a8f3c1e9b27'
+down_revision = 'c41b7e9d2a06'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    for table, key in (('Venue', 'venue_id'), ('Artist', 'artist_id')):
+        op.add_column(table, sa.Column('upcoming_shows_count', sa.Integer(), nullable=False, server_default='0'))
+        op.add_column(table, sa.Column('past_shows_count', sa.Integer(), nullable=False, server_default='0'))
+        op.add_column(table, sa.Column('next_show_time', sa.DateTime(), nullable=True))
+        op.alter_column(table, 'upcoming_shows_count', server_default=None)
+        op.alter_column(table, 'past_shows_count', server_default=None)
+        op.create_index('ix_%s_next_show_time' % table, table, ['next_show_time'], unique=False)
+        # Show times are naive local times, hence LOCALTIMESTAMP.
+        op.execute('''
+            UPDATE "{table}" SET
+              upcoming_shows_count = (SELECT count(*) FROM "Show" s
+                                      WHERE s.{key} = "{table}".id AND s.start_time > LOCALTIMESTAMP),
+              past_shows_count = (SELECT count(*) FROM "Show" s
+                                  WHERE s.{key} = "{table}".id AND s.start_time <= LOCALTIMESTAMP),
+              next_show_time = (SELECT min(s.start_time) FROM "Show" s
+                                WHERE s.{key} = "{table}".id AND s.start_time > LOCALTIMESTAMP)
+        '''.format(table=table, key=key))
+
+
+def downgrade():
+    for table in ('Artist', 'Venue'):
+        op.drop_index('ix_%s_next_show_time' % table, table_name=table)
+        op.drop_column(table, 'next_show_time')
+        op.drop_column(table, 'past_shows_count')
+        op.drop_column(table, 'upcoming_shows_count')
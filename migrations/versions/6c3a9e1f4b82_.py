@@ -0,0 +1,31 @@
+"""add Revision counters for the conditional GET validators
+
+Revision ID: 6c3a9e1f4b82
+Revises: 2e6b8d4f1a73
+Create Date: 2026-10-18 19:02:15.604117
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6c3a9e1f4b82'
+down_revision = '2e6b8d4f1a73'
+branch_labels = None
+depends_on = None
+
+TABLES = ('Venue', 'Artist', 'Show')
+
+
+def upgrade():
+    revisions = op.create_table('Revision',
+    sa.Column('name', sa.String(length=32), nullable=False),
+    sa.Column('value', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+    op.bulk_insert(revisions, [{'name': name, 'value': 0} for name in TABLES])
+
+
+def downgrade():
+    op.drop_table('Revision')
@@ -0,0 +1,47 @@
+"""index Show lookups and make Location unique on (city, state)
+
+Revision ID: 8d2e4f6a1b93
+Revises: 3f1c9a2b7d45
+Create Date: 2026-10-18 10:04:17.552931
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8d2e4f6a1b93'
+down_revision = '3f1c9a2b7d45'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_Show_venue_id_start_time', 'Show', ['venue_id', 'start_time'], unique=False)
+    op.create_index('ix_Show_artist_id_start_time', 'Show', ['artist_id', 'start_time'], unique=False)
+    op.create_index('ix_Show_start_time', 'Show', ['start_time'], unique=False)
+    op.create_index('ix_Venue_location_id', 'Venue', ['location_id'], unique=False)
+
+    # Fold duplicate locations into the lowest id before adding the
+    # constraint, repointing their venues first.
+    op.execute('''
+        UPDATE "Venue" SET location_id = (
+            SELECT min(keep.id) FROM "Location" keep, "Location" dup
+            WHERE dup.id = "Venue".location_id
+              AND keep.city = dup.city AND keep.state = dup.state
+        )
+    ''')
+    op.execute('''
+        DELETE FROM "Location" WHERE id NOT IN (
+            SELECT min(id) FROM "Location" GROUP BY city, state
+        )
+    ''')
+    op.create_unique_constraint('uq_Location_city_state', 'Location', ['city', 'state'])
+
+
+def downgrade():
+    op.drop_constraint('uq_Location_city_state', 'Location', type_='unique')
+    op.drop_index('ix_Venue_location_id', table_name='Venue')
+    op.drop_index('ix_Show_start_time', table_name='Show')
+    op.drop_index('ix_Show_artist_id_start_time', table_name='Show')
+    op.drop_index('ix_Show_venue_id_start_time', table_name='Show')
@@ -0,0 +1,87 @@
+"""move genres from array columns to a Genre table with link tables
+
+Revision ID: 9b1d7f3a2c58
+Revises: 5a8f3c1e9b27
+Create Date: 2026-10-18 15:06:12.734981
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '9b1d7f3a2c58'
+down_revision = '5a8f3c1e9b27'
+branch_labels = None
+depends_on = None
+
+DEFAULT_GENRES = (
+    'Alternative', 'Blues', 'Classical', 'Country', 'Electronic', 'Folk',
+    'Funk', 'Hip-Hop', 'Heavy Metal', 'Instrumental', 'Jazz',
+    'Musical Theatre', 'Pop', 'Punk', 'R&B', 'Reggae', 'Rock n Roll', 'Soul',
+    'Other'
+)
+
+LINKS = (('Venue', 'VenueGenre', 'venue_id'), ('Artist', 'ArtistGenre', 'artist_id'))
+
+
+def _names(table):
+    # The initial migration created Artist.genres as VARCHAR while the model
+    # wrote arrays into it, so the column may hold either an ARRAY or the
+    # text form of one ('{Jazz,"Rock n Roll"}'), or a single plain name.
+    return '''
+        CASE WHEN "{table}".genres::text LIKE '{{%}}'
+             THEN "{table}".genres::text::varchar[]
+             ELSE ARRAY["{table}".genres::text]::varchar[] END
+    '''.format(table=table)
+
+
+def upgrade():
+    genre = op.create_table('Genre',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('name', sa.String(length=120), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('name')
+    )
+    for table, links, key in LINKS:
+        op.create_table(links,
+        sa.Column(key, sa.Integer(), nullable=False),
+        sa.Column('genre_id', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint([key], ['%s.id' % table], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['genre_id'], ['Genre.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint(key, 'genre_id')
+        )
+        op.create_index('ix_%s_genre_id_%s' % (links, key), links, ['genre_id', key], unique=False)
+
+    op.bulk_insert(genre, [{'name': name} for name in DEFAULT_GENRES])
+    for table, links, key in LINKS:
+        op.execute('''
+            INSERT INTO "Genre" (name)
+            SELECT DISTINCT trim(name) FROM "{table}" CROSS JOIN LATERAL unnest({names}) AS name
+            WHERE trim(name) <> ''
+            ON CONFLICT (name) DO NOTHING
+        '''.format(table=table, names=_names(table)))
+        op.execute('''
+            INSERT INTO "{links}" ({key}, genre_id)
+            SELECT DISTINCT "{table}".id, "Genre".id
+            FROM "{table}" CROSS JOIN LATERAL unnest({names}) AS name
+            JOIN "Genre" ON "Genre".name = trim(name)
+        '''.format(table=table, links=links, key=key, names=_names(table)))
+        op.drop_column(table, 'genres')
+
+
+def downgrade():
+    for table, links, key in LINKS:
+        op.add_column(table, sa.Column('genres', postgresql.ARRAY(sa.String(length=120)), nullable=True))
+        op.execute('''
+            UPDATE "{table}" SET genres = coalesce((
+                SELECT array_agg("Genre".name ORDER BY "Genre".name)
+                FROM "{links}" JOIN "Genre" ON "Genre".id = "{links}".genre_id
+                WHERE "{links}".{key} = "{table}".id
+            ), '{{}}')
+        '''.format(table=table, links=links, key=key))
+        op.alter_column(table, 'genres', nullable=False)
+        op.drop_index('ix_%s_genre_id_%s' % (links, key), table_name=links)
+        op.drop_table(links)
+    op.drop_table('Genre')
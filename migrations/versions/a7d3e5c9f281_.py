@@ -0,0 +1,30 @@
+"""switch the name trigram indexes from GIN to GiST for nearest-neighbour ranking
+
+Revision ID: a7d3e5c9f281
+Revises: 6c3a9e1f4b82
+Create Date: 2026-10-18 23:41:07.215830
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a7d3e5c9f281'
+down_revision = '6c3a9e1f4b82'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    for table in ('Venue', 'Artist'):
+        op.drop_index('ix_%s_name_trgm' % table, table_name=table)
+        op.create_index('ix_%s_name_trgm' % table, table, ['name'], unique=False,
+                        postgresql_using='gist', postgresql_ops={'name': 'gist_trgm_ops'})
+
+
+def downgrade():
+    for table in ('Venue', 'Artist'):
+        op.drop_index('ix_%s_name_trgm' % table, table_name=table)
+        op.create_index('ix_%s_name_trgm' % table, table, ['name'], unique=False,
+                        postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'})
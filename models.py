@@ -1,4 +1,7 @@
+from datetime import datetime
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event
+from sqlalchemy.ext.associationproxy import association_proxy
 
 db = SQLAlchemy()
 
@@ -6,14 +9,57 @@ db = SQLAlchemy()
 # Models.
 #----------------------------------------------------------------------------#
 
+# Genre links. The primary key serves lookups by venue/artist; the reversed
+# index serves genre filters.
+VenueGenre = db.Table(
+    'VenueGenre',
+    db.Column('venue_id', db.Integer, db.ForeignKey('Venue.id', ondelete='CASCADE'), primary_key=True),
+    db.Column('genre_id', db.Integer, db.ForeignKey('Genre.id', ondelete='CASCADE'), primary_key=True),
+    db.Index('ix_VenueGenre_genre_id_venue_id', 'genre_id', 'venue_id')
+)
+
+ArtistGenre = db.Table(
+    'ArtistGenre',
+    db.Column('artist_id', db.Integer, db.ForeignKey('Artist.id', ondelete='CASCADE'), primary_key=True),
+    db.Column('genre_id', db.Integer, db.ForeignKey('Genre.id', ondelete='CASCADE'), primary_key=True),
+    db.Index('ix_ArtistGenre_genre_id_artist_id', 'genre_id', 'artist_id')
+)
+
+
+class Genre(db.Model):
+    __tablename__ = 'Genre'
+
+    id = db.Column(db.Integer, autoincrement=True, primary_key=True)
+    name = db.Column(db.String(120), nullable=False, unique=True)
+
+    @classmethod
+    def named(cls, name):
+        """The Genre called `name`; genres are reference data, so an unknown
+        name is an error rather than a new row."""
+        with db.session.no_autoflush:
+            genre = cls.query.filter_by(name=name).one_or_none()
+        if genre is None:
+            raise ValueError('Unknown genre: %r' % name)
+        return genre
+
+    def __repr__(self):
+        return f'<Genre {self.id} {self.name}>'
+
+
 class Venue(db.Model):
     __tablename__ = 'Venue'
+    __table_args__ = (
+        db.Index('ix_Venue_name_trgm', 'name',
+                 postgresql_using='gist', postgresql_ops={'name': 'gist_trgm_ops'}),
+        db.Index('ix_Venue_location_id', 'location_id'),
+    )
 
     id = db.Column(db.Integer, autoincrement=True, primary_key=True)
     name = db.Column(db.String, nullable=False)
     address = db.Column(db.String(120))
     phone = db.Column(db.String(120))
-    genres = db.Column(db.ARRAY(db.String(120)), nullable=False)
+    genre_rows = db.relationship('Genre', secondary=VenueGenre, lazy=True, order_by=Genre.name)
+    genres = association_proxy('genre_rows', 'name', creator=Genre.named)
     website = db.Column(db.String(500))
     image_link = db.Column(db.String(500))
     facebook_link = db.Column(db.String(120))
@@ -21,6 +67,10 @@ class Venue(db.Model):
     seeking_description = db.Column(db.String(500))
     shows = db.relationship('Show', backref='Venue', lazy=True)
     location_id = db.Column(db.Integer, db.ForeignKey('Location.id'), nullable=False)
+    upcoming_shows_count = db.Column(db.Integer, nullable=False, default=0)
+    past_shows_count = db.Column(db.Integer, nullable=False, default=0)
+    next_show_time = db.Column(db.DateTime, index=True)
+    updated_at = db.Column(db.DateTime, nullable=False, index=True, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     def __repr__(self):
         return f'<Venue {self.id} {self.name} {self.address} {self.phone} {self.genres} {self.website} {self.image_link} {self.facebook_link} {self.seeking_venue} {self.seeking_description} {self.location_id}>'
@@ -28,36 +78,64 @@ class Venue(db.Model):
 
 class Artist(db.Model):
     __tablename__ = 'Artist'
+    __table_args__ = (
+        db.Index('ix_Artist_name_trgm', 'name',
+                 postgresql_using='gist', postgresql_ops={'name': 'gist_trgm_ops'}),
+    )
 
     id = db.Column(db.Integer, autoincrement=True, primary_key=True)
     name = db.Column(db.String, nullable=False)
     city = db.Column(db.String(120), nullable=False)
     state = db.Column(db.String(120), nullable=False)
     phone = db.Column(db.String(120))
-    genres = db.Column(db.ARRAY(db.String(120)), nullable=False)
+    genre_rows = db.relationship('Genre', secondary=ArtistGenre, lazy=True, order_by=Genre.name)
+    genres = association_proxy('genre_rows', 'name', creator=Genre.named)
     website = db.Column(db.String(500))
     image_link = db.Column(db.String(500))
     facebook_link = db.Column(db.String(120))
     seeking_venue = db.Column(db.Boolean, default=False)
     seeking_description = db.Column(db.String(500))
     shows = db.relationship('Show', backref='Artist', lazy=True)
+    upcoming_shows_count = db.Column(db.Integer, nullable=False, default=0)
+    past_shows_count = db.Column(db.Integer, nullable=False, default=0)
+    next_show_time = db.Column(db.DateTime, index=True)
+    updated_at = db.Column(db.DateTime, nullable=False, index=True, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     def __repr__(self):
         return f'<Artist {self.id} {self.name} {self.city} {self.state} {self.phone} {self.genres} {self.website} {self.image_link} {self.facebook_link} {self.seeking_venue} {self.seeking_description}>'
 
+# Show lengths in minutes. The upper bound lets overlap queries stay range
+# scans on start_time (see availability.py).
+SHOW_DEFAULT_DURATION = 120
+SHOW_MAX_DURATION = 24 * 60
+# How `flask export` writes datetimes and `flask import` reads them first:
+# ISO 8601 to the second, as naive local times like the stored values.
+DATETIME_FORMAT = '%Y-%m-%dT%H:%M:%S'
+
 class Show(db.Model):
     __tablename__ = 'Show'
+    __table_args__ = (
+        db.Index('ix_Show_venue_id_start_time', 'venue_id', 'start_time'),
+        db.Index('ix_Show_artist_id_start_time', 'artist_id', 'start_time'),
+        db.Index('ix_Show_start_time', 'start_time'),
+        db.CheckConstraint('duration > 0 AND duration <= %d' % SHOW_MAX_DURATION, name='ck_Show_duration'),
+    )
 
     id = db.Column(db.Integer, autoincrement=True, primary_key=True)
     venue_id = db.Column(db.Integer, db.ForeignKey('Venue.id'), nullable=False)
     artist_id = db.Column(db.Integer, db.ForeignKey('Artist.id'), nullable=False)
     start_time = db.Column(db.DateTime(), nullable=False)
+    duration = db.Column(db.Integer, nullable=False, default=SHOW_DEFAULT_DURATION)
+    updated_at = db.Column(db.DateTime, nullable=False, index=True, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     def __repr__(self):
         return f'<Show {self.id} {self.venue_id} {self.artist_id}>'
 
 class Location(db.Model):
     __tablename__ = 'Location'
+    __table_args__ = (
+        db.UniqueConstraint('city', 'state', name='uq_Location_city_state'),
+    )
 
     id = db.Column(db.Integer, autoincrement=True, primary_key=True)
     city = db.Column(db.String(120), nullable=False)
@@ -66,3 +144,45 @@ class Location(db.Model):
 
     def __repr__(self):
         return f'<Venue {self.id} {self.city} {self.state}>'
+
+class Revision(db.Model):
+    """A per-table counter for changes that max(updated_at) cannot show,
+    such as deletes. The pages' validators read it by primary key."""
+    __tablename__ = 'Revision'
+
+    TABLES = ('Venue', 'Artist', 'Show')
+
+    name = db.Column(db.String(32), primary_key=True)
+    value = db.Column(db.Integer, nullable=False, default=0)
+
+    @classmethod
+    def bump(cls, *names):
+        """Increment the named counters in the caller's transaction."""
+        db.session.execute(cls.__table__.update()
+                           .where(cls.name.in_(names))
+                           .values(value=cls.value + 1))
+
+    @classmethod
+    def of(cls, name):
+        """Scalar subquery for the current value of one counter."""
+        return db.select([cls.value]).where(cls.name == name).as_scalar()
+
+    def __repr__(self):
+        return f'<Revision {self.name} {self.value}>'
+
+
+@event.listens_for(Revision.__table__, 'after_create')
+def _seed_revisions(table, connection, **kwargs):
+    # Migrations insert these rows themselves; this covers create_all().
+    connection.execute(table.insert(), [{'name': name, 'value': 0} for name in Revision.TABLES])
+
+
+def _touch(target, *args):
+    # Genre links live outside the row, so changing them would not bump
+    # updated_at (and with it the pages' validators) on its own.
+    target.updated_at = datetime.utcnow()
+
+
+for _relationship in (Venue.genre_rows, Artist.genre_rows):
+    event.listen(_relationship, 'append', _touch)
+    event.listen(_relationship, 'remove', _touch)
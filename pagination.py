@@ -0,0 +1,74 @@
+import base64
+import json
+from collections import namedtuple
+from datetime import datetime
+from werkzeug.exceptions import BadRequest
+from models import db
+
+#----------------------------------------------------------------------------#
+# Keyset pagination.
+#----------------------------------------------------------------------------#
+
+# Listings page on a unique, ordered key instead of OFFSET, so every page is
+# an index range scan of at most `limit` + 1 rows, however deep it is.
+# Cursors are the key of the first or last row of a page, carried in the URL.
+
+DEFAULT_PAGE_SIZE = 30
+MAX_PAGE_SIZE = 100
+
+Page = namedtuple('Page', ['items', 'next_cursor', 'prev_cursor'])
+
+
+def encode_cursor(row, keys):
+    values = []
+    for key in keys:
+        value = getattr(row, key.key)
+        values.append(value.isoformat() if isinstance(value, datetime) else value)
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, keys):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+        if len(values) != len(keys):
+            raise ValueError(cursor)
+        return tuple(
+            datetime.fromisoformat(value) if isinstance(key.type, db.DateTime) else value
+            for key, value in zip(keys, values)
+        )
+    except (ValueError, TypeError):
+        raise BadRequest('Invalid page cursor.')
+
+
+def paginate(query, keys, after=None, before=None, limit=DEFAULT_PAGE_SIZE, row_type=None):
+    """Return one Page of `query` ordered by the unique column tuple `keys`.
+
+    Pass the `next_cursor` of a page as `after` to move forward, or its
+    `prev_cursor` as `before` to move back. Rows are converted with
+    `row_type._make` when a row type is given.
+    """
+    limit = max(1, min(limit or DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE))
+    position = db.tuple_(*keys)
+
+    if before:
+        values = db.tuple_(*decode_cursor(before, keys))
+        rows = query.filter(position < values) \
+            .order_by(*[key.desc() for key in keys]).limit(limit + 1).all()
+        has_more = len(rows) > limit
+        rows = rows[:limit][::-1]
+        prev_cursor = encode_cursor(rows[0], keys) if has_more else None
+        next_cursor = encode_cursor(rows[-1], keys) if rows else None
+    else:
+        if after:
+            values = db.tuple_(*decode_cursor(after, keys))
+            query = query.filter(position > values)
+        rows = query.order_by(*keys).limit(limit + 1).all()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1], keys) if has_more else None
+        prev_cursor = encode_cursor(rows[0], keys) if after and rows else None
+
+    if row_type is not None:
+        rows = list(map(row_type._make, rows))
+    return Page(rows, next_cursor, prev_cursor)
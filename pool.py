@@ -0,0 +1,58 @@
+import time
+
+from sqlalchemy import exc
+from sqlalchemy.pool import QueuePool
+
+from metrics import metrics
+from models import db
+
+#----------------------------------------------------------------------------#
+# Connection pool.
+#----------------------------------------------------------------------------#
+
+# Pool settings come from config.py (DB_POOL_*). For a QueuePool this swaps
+# in TimedQueuePool, which records how long every checkout waits, and adds
+# gauges for the pool's current state; all of them are on /__metrics.
+
+checkout_wait = metrics.histogram(
+    'db_pool_checkout_wait_seconds', 'Time spent waiting for a connection from the pool.')
+checkout_timeouts = metrics.counter(
+    'db_pool_checkout_timeouts_total', 'Checkouts that gave up after DB_POOL_TIMEOUT.')
+
+GAUGES = (
+    ('db_pool_size', 'Connections the pool keeps open.', 'size'),
+    ('db_pool_checked_out', 'Connections currently in use.', 'checkedout'),
+    ('db_pool_checked_in', 'Idle connections in the pool.', 'checkedin'),
+    ('db_pool_overflow', 'Connections open beyond the pool size; negative while the pool is filling.', 'overflow')
+)
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that records checkout waits and timeouts."""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super(TimedQueuePool, self)._do_get()
+        except exc.TimeoutError:
+            checkout_timeouts.inc()
+            raise
+        finally:
+            checkout_wait.observe(time.perf_counter() - started)
+
+
+def _reader(method):
+    def read():
+        # Pools other than QueuePool (e.g. SQLite's) do not track these.
+        stat = getattr(db.engine.pool, method, None)
+        return stat() if stat is not None else None
+    return read
+
+
+def init_app(app):
+    options = app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', {})
+    if 'pool_size' in options:
+        options.setdefault('poolclass', TimedQueuePool)
+    metrics.init_app(app)
+    for name, help, method in GAUGES:
+        metrics.gauge(name, help, fn=_reader(method))
@@ -0,0 +1,125 @@
+from itertools import groupby
+import genres
+from models import db, Venue, Artist, Show, Location
+from readmodels import VenueShow, ArtistShow, VenueItem
+
+#----------------------------------------------------------------------------#
+# Queries.
+#----------------------------------------------------------------------------#
+
+# Read-side queries shared by the views. Each one issues a fixed number of
+# statements, however many shows a venue or artist has.
+
+def venue_areas(genre=None):
+    """Yield one {city, state, venues} area per Location that has venues,
+    only counting venues tagged `genre` when one is given.
+
+    A single query returns only the columns the listing renders, with the
+    upcoming show count read from the Venue counters; venues within an area
+    come soonest next show first, and rows are grouped as they stream in.
+    """
+    rows = venue_items(genre).order_by(
+        Location.city.desc(), Location.id,
+        Venue.next_show_time.is_(None), Venue.next_show_time, Venue.name)
+
+    for _, venues in groupby(map(VenueItem._make, rows), key=lambda row: row.location_id):
+        venues = list(venues)
+        yield {
+            "city": venues[0].city,
+            "state": venues[0].state,
+            "venues": venues
+        }
+
+
+def venue_items(genre=None):
+    """Projection of venues for listings, in VenueItem order."""
+    query = db.session.query(
+        Location.id.label('location_id'),
+        Location.city,
+        Location.state,
+        Venue.id,
+        Venue.name,
+        Venue.upcoming_shows_count.label('num_upcoming_shows')
+    ).join(Venue, Venue.location_id == Location.id)
+    if genre:
+        query = query.filter(genres.tagged(Venue, genre))
+    return query
+
+
+def artist_items(genre=None):
+    """Projection of artists for listings, in ArtistItem order."""
+    query = db.session.query(
+        Artist.id,
+        Artist.name,
+        Artist.upcoming_shows_count.label('num_upcoming_shows')
+    )
+    if genre:
+        query = query.filter(genres.tagged(Artist, genre))
+    return query
+
+
+def upcoming_shows(now):
+    """Projection of upcoming shows with the venue and artist columns the
+    listing renders, as plain rows rather than ORM entities. Columns are in
+    ShowTile order."""
+    return db.session.query(
+        Show.id,
+        Show.venue_id,
+        Venue.name.label('venue_name'),
+        Show.artist_id,
+        Artist.name.label('artist_name'),
+        Artist.image_link.label('artist_image_link'),
+        Show.start_time
+    ).join(Venue, Show.venue_id == Venue.id) \
+        .join(Artist, Show.artist_id == Artist.id) \
+        .filter(Show.start_time >= now)
+
+
+def get_venue(venue_id):
+    # Location and genres are joined in so rendering them costs no extra SELECT.
+    return Venue.query.options(db.joinedload(Venue.Location), db.joinedload(Venue.genre_rows)) \
+        .get_or_404(venue_id)
+
+
+def get_artist(artist_id):
+    return Artist.query.options(db.joinedload(Artist.genre_rows)).get_or_404(artist_id)
+
+
+def venue_shows(venue_id, now):
+    """Return (upcoming, past) shows at a venue, split at `now` in SQL."""
+    query = db.session.query(
+        Show.artist_id,
+        Artist.name.label('artist_name'),
+        Artist.image_link.label('artist_image_link'),
+        Show.start_time
+    ).join(Artist, Show.artist_id == Artist.id).filter(Show.venue_id == venue_id)
+
+    return _split_shows(query, now, VenueShow)
+
+
+def artist_shows(artist_id, now):
+    """Return (upcoming, past) shows by an artist, split at `now` in SQL."""
+    query = db.session.query(
+        Show.venue_id,
+        Venue.name.label('venue_name'),
+        Venue.image_link.label('venue_image_link'),
+        Show.start_time
+    ).join(Venue, Show.venue_id == Venue.id).filter(Show.artist_id == artist_id)
+
+    return _split_shows(query, now, ArtistShow)
+
+
+def _split_shows(query, now, row_type):
+    upcoming = query.filter(Show.start_time > now).order_by(Show.start_time.asc())
+    past = query.filter(Show.start_time <= now).order_by(Show.start_time.desc())
+    return list(map(row_type._make, upcoming)), list(map(row_type._make, past))
+
+
+def artist_ids_for_venue(venue_id):
+    """Ids of the artists with a show at the venue, whose pages list it."""
+    return [id for id, in db.session.query(Show.artist_id).filter(Show.venue_id == venue_id).distinct()]
+
+
+def venue_ids_for_artist(artist_id):
+    """Ids of the venues hosting the artist, whose pages list the artist."""
+    return [id for id, in db.session.query(Show.venue_id).filter(Show.artist_id == artist_id).distinct()]
@@ -0,0 +1,29 @@
+from collections import namedtuple
+
+#----------------------------------------------------------------------------#
+# Read models.
+#----------------------------------------------------------------------------#
+
+# Immutable, slotted row types the views hand to the templates. They are
+# filled straight from SQL projections with `_make`, cost no per-row dict,
+# and expose the same attribute names the templates already read.
+
+VenueShow = namedtuple('VenueShow', [
+    'artist_id', 'artist_name', 'artist_image_link', 'start_time'
+])
+
+ArtistShow = namedtuple('ArtistShow', [
+    'venue_id', 'venue_name', 'venue_image_link', 'start_time'
+])
+
+ShowTile = namedtuple('ShowTile', [
+    'id', 'venue_id', 'venue_name', 'artist_id', 'artist_name', 'artist_image_link', 'start_time'
+])
+
+VenueItem = namedtuple('VenueItem', [
+    'location_id', 'city', 'state', 'id', 'name', 'num_upcoming_shows'
+])
+
+ArtistItem = namedtuple('ArtistItem', [
+    'id', 'name', 'num_upcoming_shows'
+])
@@ -0,0 +1,34 @@
+from functools import lru_cache
+
+from wtforms.widgets import Select
+
+#----------------------------------------------------------------------------#
+# Reference data.
+#----------------------------------------------------------------------------#
+
+# Choice lists shared by the forms, as immutable tuples built once per
+# process rather than once per form class or request. Their <option> markup
+# is rendered once per distinct list as well; see options().
+
+STATES = (
+    'AL', 'AK', 'AZ', 'AR', 'CA', 'CO', 'CT', 'DE', 'DC', 'FL', 'GA', 'HI',
+    'ID', 'IL', 'IN', 'IA', 'KS', 'KY', 'LA', 'ME', 'MT', 'NE', 'NV', 'NH',
+    'NJ', 'NM', 'NY', 'NC', 'ND', 'OH', 'OK', 'OR', 'MD', 'MA', 'MI', 'MN',
+    'MS', 'MO', 'PA', 'RI', 'SC', 'SD', 'TN', 'TX', 'UT', 'VT', 'VA', 'WA',
+    'WV', 'WI', 'WY'
+)
+
+STATE_CHOICES = tuple((state, state) for state in STATES)
+
+
+@lru_cache(maxsize=32)
+def options(choices):
+    """(value, markup, selected markup) for each (value, label) in `choices`.
+
+    Escaping and attribute formatting happen here once; rendering a select
+    is then a join over these strings.
+    """
+    return tuple(
+        (value, Select.render_option(value, label, False), Select.render_option(value, label, True))
+        for value, label in choices
+    )
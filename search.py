@@ -0,0 +1,174 @@
+import threading
+from collections import defaultdict
+
+from flask import current_app
+
+import genres
+from models import db
+
+#----------------------------------------------------------------------------#
+# Search.
+#----------------------------------------------------------------------------#
+
+# Name search for venues and artists. On PostgreSQL the substring match and
+# the ranking are both served by the pg_trgm GiST indexes: ILIKE is checked
+# against the index, and ORDER BY name <-> term (trigram distance) is a
+# nearest-neighbour scan, so a page reads about as many rows as it shows
+# instead of sorting every match. On any other backend (SQLite test runs) an
+# in-process trigram index stands in, one per app, kept in
+# app.extensions['search'].
+#
+# A term shorter than a trigram has nothing to look up in either index and
+# could only be answered by scanning the table, so it matches nothing.
+
+PER_PAGE = 10
+# Result totals are only counted this far, so a one-letter term cannot turn
+# every keystroke into a full count of the catalogue.
+MAX_COUNT = 1000
+MIN_TERM_LENGTH = 3
+
+
+def search(model, term, page=1, per_page=PER_PAGE, genre=None):
+    """Return (total, rows) for one page of `model` rows matching `term`,
+    restricted to rows tagged `genre` when one is given.
+
+    Rows carry `id` and `name`, best match first. `total` stops at
+    MAX_COUNT + 1 so callers can render "1000+".
+    """
+    term = term.strip()
+    if len(term) < MIN_TERM_LENGTH:
+        return 0, []
+    offset = (max(page, 1) - 1) * per_page
+    if db.engine.dialect.name == 'postgresql':
+        return _search_sql(model, term, offset, per_page, genre)
+    allowed = None
+    if genre:
+        allowed = {id for id, in db.session.query(model.id).filter(genres.tagged(model, genre))}
+    return _fallback_index(model).search(term, offset, per_page, allowed)
+
+
+def index(model, id, name):
+    """Add or refresh a row in the fallback index, if it has been built."""
+    fallback = _fallbacks().indexes.get(model.__tablename__)
+    if fallback is not None:
+        fallback.add(id, name)
+
+
+def forget(model, id):
+    """Drop a row from the fallback index, if it has been built."""
+    fallback = _fallbacks().indexes.get(model.__tablename__)
+    if fallback is not None:
+        fallback.remove(id)
+
+
+def _search_sql(model, term, offset, limit, genre):
+    escaped = term.replace('!', '!!').replace('%', '!%').replace('_', '!_')
+    query = db.session.query(model.id, model.name) \
+        .filter(model.name.ilike(f'%{escaped}%', escape='!'))
+    if genre:
+        query = query.filter(genres.tagged(model, genre))
+
+    total = query.limit(MAX_COUNT + 1).count()
+    # Distance alone, so the index yields rows already in order; a second
+    # sort key would make PostgreSQL sort every match again.
+    rows = query.order_by(model.name.op('<->')(term)).offset(offset).limit(limit).all()
+    return total, rows
+
+
+#  Fallback index
+#  ----------------------------------------------------------------
+
+class Match(object):
+    __slots__ = ('id', 'name')
+
+    def __init__(self, id, name):
+        self.id = id
+        self.name = name
+
+
+def _trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class TrigramIndex(object):
+    """Inverted index from lower-cased trigrams to row ids."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._names = {}
+        self._postings = defaultdict(set)
+
+    def add(self, id, name):
+        with self._lock:
+            self._discard(id)
+            self._names[id] = name
+            for gram in _trigrams(name.lower()):
+                self._postings[gram].add(id)
+
+    def remove(self, id):
+        with self._lock:
+            self._discard(id)
+
+    def _discard(self, id):
+        name = self._names.pop(id, None)
+        if name is None:
+            return
+        for gram in _trigrams(name.lower()):
+            ids = self._postings[gram]
+            ids.discard(id)
+            if not ids:
+                del self._postings[gram]
+
+    def search(self, term, offset, limit, allowed=None):
+        needle = term.lower()
+        grams = _trigrams(needle)
+        with self._lock:
+            if grams:
+                postings = sorted((self._postings.get(gram, ()) for gram in grams), key=len)
+                candidates = set(postings[0]).intersection(*postings[1:])
+            else:
+                # Terms shorter than a trigram can only be answered by a scan.
+                candidates = self._names.keys()
+            if allowed is not None:
+                candidates = [id for id in candidates if id in allowed]
+            hits = [(id, self._names[id]) for id in candidates if needle in self._names[id].lower()]
+
+        def rank(hit):
+            name_grams = _trigrams(hit[1].lower())
+            union = len(name_grams | grams) or 1
+            return (-len(name_grams & grams) / union, hit[1])
+
+        hits.sort(key=rank)
+        total = min(len(hits), MAX_COUNT + 1)
+        return total, [Match(id, name) for id, name in hits[offset:offset + limit]]
+
+
+class _Fallbacks(object):
+    """One app's fallback indexes, by table name, built on first search."""
+
+    def __init__(self):
+        self.indexes = {}
+        self.build_lock = threading.Lock()
+
+
+def _fallbacks():
+    return current_app.extensions['search']
+
+
+def _fallback_index(model):
+    key = model.__tablename__
+    fallbacks = _fallbacks()
+    fallback = fallbacks.indexes.get(key)
+    if fallback is None:
+        with fallbacks.build_lock:
+            fallback = fallbacks.indexes.get(key)
+            if fallback is None:
+                fallback = TrigramIndex()
+                for id, name in db.session.query(model.id, model.name):
+                    fallback.add(id, name)
+                fallbacks.indexes[key] = fallback
+    return fallback
+
+
+def init_app(app):
+    app.extensions['search'] = _Fallbacks()
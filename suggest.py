@@ -0,0 +1,243 @@
+import threading
+import time
+from bisect import bisect_left, insort
+
+from flask import current_app
+
+from models import db, Venue, Artist, Location
+
+#----------------------------------------------------------------------------#
+# Suggestions.
+#----------------------------------------------------------------------------#
+
+# Type-ahead for the search boxes. Venue names, artist names and cities sit
+# in one sorted array of (key, kind, id) entries, where the keys are the
+# case-folded label from the start of each of its first words, so "no"
+# finds "Blue Note". A prefix query is a bisect to the first key >= prefix
+# and a walk while keys still start with it.
+#
+# Each worker builds its index on its first request and keeps it current
+# through add()/remove(), called by the create, edit and delete handlers.
+# Writes made by other workers or the importer appear once the index is
+# rebuilt, every SUGGEST_TTL seconds. Rebuilds after the first run on a
+# background thread while requests keep using the old index; add() and
+# remove() calls made meanwhile are journaled and replayed onto the new
+# index before it is swapped in, so none are lost. The index holds at most
+# SUGGEST_MAX_ENTRIES keys; labels past that are left out and counted.
+
+# Keys are cut to this many characters; longer queries are checked against
+# the label itself.
+KEY_LENGTH = 24
+# Only this many leading words of a label get a key.
+MAX_WORDS = 4
+MAX_LIMIT = 20
+
+
+def _normalise(text):
+    return ' '.join(text.casefold().split())
+
+
+def _keys(label):
+    text = _normalise(label)
+    starts = [0] + [i + 1 for i, char in enumerate(text) if char == ' ']
+    return sorted({text[start:start + KEY_LENGTH] for start in starts[:MAX_WORDS]})
+
+
+class PrefixIndex(object):
+    """Sorted (key, kind, id) entries searched with bisect."""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self.dropped = 0
+        self._entries = []
+        self._labels = {}
+        self._keys = {}
+        self._lock = threading.Lock()
+
+    def load(self, items):
+        """Fill an empty index from (kind, id, label) items in one sort."""
+        entries = []
+        for kind, id, label in items:
+            keys = _keys(label)
+            if len(entries) + len(keys) > self.max_entries:
+                self.dropped += 1
+                continue
+            self._labels[kind, id] = label
+            self._keys[kind, id] = keys
+            entries.extend((key, kind, id) for key in keys)
+        entries.sort()
+        self._entries = entries
+
+    def add(self, kind, id, label):
+        """Add or relabel one entry. The keys it replaces count towards the
+        cap; if the new ones still do not fit, the old label stays."""
+        keys = _keys(label)
+        with self._lock:
+            replaced = len(self._keys.get((kind, id), ()))
+            if len(self._entries) - replaced + len(keys) > self.max_entries:
+                self.dropped += 1
+                return
+            self._discard(kind, id)
+            self._labels[kind, id] = label
+            self._keys[kind, id] = keys
+            for key in keys:
+                insort(self._entries, (key, kind, id))
+
+    def remove(self, kind, id):
+        with self._lock:
+            self._discard(kind, id)
+
+    def _discard(self, kind, id):
+        keys = self._keys.pop((kind, id), None)
+        if keys is None:
+            return
+        del self._labels[kind, id]
+        for key in keys:
+            index = bisect_left(self._entries, (key, kind, id))
+            if index < len(self._entries) and self._entries[index] == (key, kind, id):
+                del self._entries[index]
+
+    def search(self, prefix, limit):
+        """Up to `limit` (kind, id, label) whose words start with `prefix`."""
+        needle = _normalise(prefix)
+        if not needle:
+            return []
+        key = needle[:KEY_LENGTH]
+        results = []
+        seen = set()
+        with self._lock:
+            entries = self._entries
+            index = bisect_left(entries, (key,))
+            while index < len(entries) and len(results) < limit:
+                entry_key, kind, id = entries[index]
+                if not entry_key.startswith(key):
+                    break
+                index += 1
+                if (kind, id) in seen:
+                    continue
+                seen.add((kind, id))
+                label = self._labels[kind, id]
+                if len(needle) > KEY_LENGTH and (' ' + needle) not in (' ' + _normalise(label)):
+                    continue
+                results.append((kind, id, label))
+        return results
+
+    def stats(self):
+        with self._lock:
+            return {'entries': len(self._entries), 'labels': len(self._labels), 'dropped': self.dropped}
+
+
+def city_label(city, state):
+    return '%s, %s' % (city, state)
+
+
+def _items():
+    for id, name in db.session.query(Venue.id, Venue.name).order_by(Venue.id):
+        yield 'venue', id, name
+    for id, name in db.session.query(Artist.id, Artist.name).order_by(Artist.id):
+        yield 'artist', id, name
+    cities = db.session.query(Location.city, Location.state) \
+        .union(db.session.query(Artist.city, Artist.state))
+    for city, state in cities:
+        if city and state:
+            label = city_label(city, state)
+            yield 'city', label, label
+
+
+class _AppIndex(object):
+    """One app's index and the state of its rebuilds, kept in
+    app.extensions['suggest'] so apps in one process never share it."""
+
+    def __init__(self, max_entries, ttl):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.index = None
+        self.built = 0.0
+        self.journal = None
+        # Held by the one thread building an index.
+        self.build_lock = threading.Lock()
+        # Orders add()/remove() against the rebuild journal and the swap.
+        self.journal_lock = threading.Lock()
+
+
+def _state():
+    return current_app.extensions['suggest']
+
+
+def build():
+    """Build a fresh index from the database and swap it in, replaying the
+    add()/remove() calls made while it was loading."""
+    state = _state()
+    with state.journal_lock:
+        state.journal = []
+    try:
+        fresh = PrefixIndex(state.max_entries)
+        fresh.load(_items())
+        with state.journal_lock:
+            for operation, args in state.journal:
+                getattr(fresh, operation)(*args)
+            state.index = fresh
+            state.built = time.monotonic()
+    finally:
+        with state.journal_lock:
+            state.journal = None
+    return fresh
+
+
+def _rebuild(app, state):
+    try:
+        with app.app_context():
+            build()
+    except Exception:
+        app.logger.exception('Rebuilding the suggestion index failed')
+        # Wait out another TTL rather than retrying on every request.
+        state.built = time.monotonic()
+    finally:
+        state.build_lock.release()
+
+
+def get():
+    """The current index. The first call builds it; once it is older than
+    SUGGEST_TTL, one call starts a rebuild in the background and every call
+    returns the old index until the new one is swapped in."""
+    state = _state()
+    index = state.index
+    if index is None:
+        with state.build_lock:
+            if state.index is None:
+                build()
+        return state.index
+    if time.monotonic() - state.built > state.ttl and state.build_lock.acquire(blocking=False):
+        app = current_app._get_current_object()
+        threading.Thread(target=_rebuild, args=(app, state), daemon=True).start()
+    return index
+
+
+def _record(operation, *args):
+    state = _state()
+    with state.journal_lock:
+        if state.index is not None:
+            getattr(state.index, operation)(*args)
+        if state.journal is not None:
+            state.journal.append((operation, args))
+
+
+def add(kind, id, label):
+    """Add or refresh one label, if this worker has built its index or is
+    building it."""
+    _record('add', kind, id, label)
+
+
+def remove(kind, id):
+    _record('remove', kind, id)
+
+
+def add_city(city, state):
+    label = city_label(city, state)
+    add('city', label, label)
+
+
+def init_app(app):
+    app.extensions['suggest'] = _AppIndex(
+        app.config.get('SUGGEST_MAX_ENTRIES', 100000), app.config.get('SUGGEST_TTL', 300))
+    app.before_first_request(get)
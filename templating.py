@@ -0,0 +1,61 @@
+import os
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from jinja2 import FileSystemBytecodeCache
+from markupsafe import Markup
+
+from cache import LRUCache
+
+#----------------------------------------------------------------------------#
+# Template caching.
+#----------------------------------------------------------------------------#
+
+# Compiled templates are kept on disk in TEMPLATE_CACHE_DIR, so a new worker
+# loads their bytecode instead of parsing and compiling every template again;
+# `flask compile-templates` fills the directory ahead of a deploy.
+#
+# Repeated markup such as show tiles goes through the `fragment` template
+# global:
+#
+#     {% call fragment('shows/tile', show) %} ... {% endcall %}
+#
+# The body is rendered once per distinct (name, row) and then served from an
+# in-process LRU, one per app (app.extensions['fragments']). Rows are the immutable read models from readmodels.py and
+# hold every value the fragment prints, so a changed name, image, start time
+# or counter makes a new key, and nothing needs invalidating.
+
+def fragment(name, row, caller):
+    fragments = current_app.extensions['fragments']
+    key = (name, row)
+    markup = fragments.get(key)
+    if markup is None:
+        markup = Markup(caller())
+        fragments.set(key, markup)
+    return markup
+
+
+@click.command('compile-templates')
+@with_appcontext
+def compile_command():
+    """Compile every template into the bytecode cache."""
+    env = current_app.jinja_env
+    if env.bytecode_cache is None:
+        raise click.ClickException('TEMPLATE_CACHE_DIR is not set.')
+    names = env.list_templates(extensions=['html'])
+    for name in names:
+        env.get_template(name)
+    click.echo('Compiled %d templates into %s' % (len(names), current_app.config['TEMPLATE_CACHE_DIR']))
+
+
+def init_app(app):
+    directory = app.config.get('TEMPLATE_CACHE_DIR')
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+        app.jinja_env.bytecode_cache = FileSystemBytecodeCache(directory)
+
+    app.extensions['fragments'] = LRUCache(
+        app.config.get('FRAGMENT_CACHE_MAX_ENTRIES', 10000), app.config.get('FRAGMENT_CACHE_TTL', 3600))
+    app.jinja_env.globals['fragment'] = fragment
+    app.cli.add_command(compile_command)
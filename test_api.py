@@ -0,0 +1,87 @@
+"""The /api/v1 JSON endpoints.
+
+    python test_api.py -v
+"""
+import unittest
+
+from benchmarks.bench_locations import form
+from testing import AppTestCase, unique
+
+
+class ApiTest(AppTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super(ApiTest, cls).setUpClass()
+        cls.tag = unique('Qa').split()[1]
+        cls.venue_name = '%s Supper Club' % cls.tag
+        # Through the create form, which keeps the search index current, from
+        # a second client so the flashed message does not block 304s.
+        data = dict(form(cls.venue_name, 'Oakland'), genres=['Blues'])
+        assert cls.app.test_client().post('/venues/create', data=data).status_code == 302
+        from models import Venue
+        with cls.app.app_context():
+            cls.venue_id = Venue.query.filter_by(name=cls.venue_name).one().id
+        cls.jazz_venue_id = cls.add_venue()
+        cls.artist_id = cls.add_artist('%s Quartet' % cls.tag)
+        cls.past_show = cls.add_show(cls.venue_id, cls.artist_id, cls.hours_from_now(-48))
+        cls.upcoming_show = cls.add_show(cls.venue_id, cls.artist_id, cls.hours_from_now(48))
+
+    def get(self, path, status=200):
+        response = self.client.get('/api/v1' + path)
+        self.assertEqual(response.status_code, status, path)
+        self.assertEqual(response.mimetype, 'application/json')
+        return response
+
+    def test_listings(self):
+        venues = self.get('/venues').get_json()
+        self.assertEqual(set(venues), {'data', 'next', 'prev'})
+        self.assertIn({'id': self.venue_id, 'name': self.venue_name, 'city': 'Oakland', 'state': 'CA',
+                       'num_upcoming_shows': 1}, venues['data'])
+        self.assertEqual([row['id'] for row in self.get('/venues?genre=Blues').get_json()['data']],
+                         [self.venue_id])
+
+        artists = self.get('/artists?fields=id,name').get_json()['data']
+        self.assertEqual(artists, [{'id': self.artist_id, 'name': '%s Quartet' % self.tag}])
+
+        shows = self.get('/shows').get_json()['data']
+        self.assertEqual([show['id'] for show in shows], [self.upcoming_show])
+        self.assertEqual(shows[0]['venue_name'], self.venue_name)
+        self.assertEqual(shows[0]['start_time'], self.hours_from_now(48).isoformat())
+
+    def test_details(self):
+        venue = self.get('/venues/%d' % self.venue_id).get_json()
+        self.assertEqual((venue['name'], venue['city'], venue['genres']), (self.venue_name, 'Oakland', ['Blues']))
+        self.assertEqual((venue['upcoming_shows_count'], venue['past_shows_count']), (1, 1))
+        self.assertEqual(venue['upcoming_shows'][0]['artist_id'], self.artist_id)
+
+        artist = self.get('/artists/%d?fields=name,past_shows_count' % self.artist_id).get_json()
+        self.assertEqual(artist, {'name': '%s Quartet' % self.tag, 'past_shows_count': 1})
+
+    def test_errors_are_json(self):
+        for path, status in (('/venues/%d' % (self.venue_id + 1000), 404),
+                             ('/artists/%d' % (self.artist_id + 1000), 404),
+                             ('/venues?fields=id,secret', 400),
+                             ('/shows?after=nonsense', 400)):
+            error = self.get(path, status).get_json()['error']
+            self.assertEqual(error['status'], status, path)
+            self.assertTrue(error['message'], path)
+        self.assertIn('secret', self.get('/venues?fields=secret', 400).get_json()['error']['message'])
+
+    def test_search(self):
+        found = self.get('/venues/search?q=%s+supper' % self.tag).get_json()
+        self.assertEqual(found['data'], [{'id': self.venue_id, 'name': self.venue_name}])
+        self.assertEqual((found['count'], found['page'], found['has_next'], found['more']), (1, 1, False, False))
+        self.assertEqual(self.get('/venues/search?q=%s&genre=Jazz' % self.tag).get_json()['count'], 0)
+        self.assertEqual(self.get('/artists/search?q=zz').get_json()['data'], [])
+
+    def test_conditional_get(self):
+        for path in ('/venues', '/venues/%d' % self.venue_id, '/artists/%d' % self.artist_id, '/shows'):
+            etag = self.get(path).headers['ETag']
+            response = self.client.get('/api/v1' + path, headers={'If-None-Match': etag})
+            self.assertEqual(response.status_code, 304, path)
+            self.assertNotEqual(self.get(path + '?fields=id').headers['ETag'], etag, path)
+
+
+if __name__ == '__main__':
+    unittest.main()
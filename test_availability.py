@@ -0,0 +1,151 @@
+"""Overlap checks for single and batch bookings.
+
+    python test_availability.py -v
+"""
+import unittest
+from datetime import timedelta
+
+from testing import AppTestCase
+
+
+def _note_ids(conflict):
+    # Conflict shows are detached once the app context ends; keep their ids.
+    conflict.ids = [show.id for show in conflict.shows]
+    return conflict
+
+
+class BookingTest(AppTestCase):
+
+    def setUp(self):
+        self.venue_id, self.other_venue_id = self.add_venue(), self.add_venue()
+        self.artist_id, self.other_artist_id = self.add_artist(), self.add_artist()
+        self.start = self.hours_from_now(48)
+        # The show every case is checked against: 60 minutes at the venue.
+        self.show_id = self.add_show(self.venue_id, self.artist_id, self.start)
+
+    def at(self, minutes):
+        return self.start + timedelta(minutes=minutes)
+
+    def book(self, venue_id, artist_id, minutes, duration=60):
+        import availability
+        from models import db
+
+        with self.app.app_context():
+            try:
+                show = availability.book(venue_id, artist_id, self.at(minutes), duration)
+                db.session.commit()
+                return show.id
+            except availability.Conflict as conflict:
+                raise _note_ids(conflict)
+            finally:
+                db.session.rollback()
+
+    def book_many(self, bookings):
+        import availability
+        from models import db
+
+        with self.app.app_context():
+            results = availability.book_many([(venue_id, artist_id, self.at(minutes), duration)
+                                              for venue_id, artist_id, minutes, duration in bookings])
+            for result in results:
+                if isinstance(result, availability.Conflict):
+                    _note_ids(result)
+            db.session.commit()
+            return results
+
+    def show(self, id):
+        from models import Show
+
+        with self.app.app_context():
+            show = Show.query.get(id)
+            return show.venue_id, show.artist_id, show.start_time, show.duration
+
+    def test_overlaps_conflict(self):
+        import availability
+
+        # The same venue, the same artist, inside and straddling either end.
+        for venue_id, artist_id, minutes, duration in (
+                (self.venue_id, self.other_artist_id, 30, 10),
+                (self.other_venue_id, self.artist_id, -30, 31),
+                (self.venue_id, self.other_artist_id, 59, 60)):
+            with self.assertRaises(availability.Conflict) as raised:
+                self.book(venue_id, artist_id, minutes, duration)
+            self.assertEqual(raised.exception.ids, [self.show_id])
+
+    def test_adjacent_and_unrelated_bookings(self):
+        before = self.book(self.venue_id, self.artist_id, -60)
+        after = self.book(self.venue_id, self.artist_id, 60)
+        elsewhere = self.book(self.other_venue_id, self.other_artist_id, 0)
+        self.assertEqual(self.show(after)[2], self.at(60))
+        self.assertEqual(len({before, after, elsewhere, self.show_id}), 4)
+
+    def test_missing_parties(self):
+        with self.assertRaises(LookupError):
+            self.book(self.venue_id + 1000, self.other_artist_id, 120)
+        with self.assertRaises(LookupError):
+            self.book(self.other_venue_id, self.artist_id + 1000, 120)
+
+    def test_book_many(self):
+        import availability
+
+        results = self.book_many([
+            (self.other_venue_id, self.other_artist_id, 200, 60),
+            (self.other_venue_id, self.artist_id + 1000, 0, 60),
+            # Overlaps the first booking, earlier in the batch.
+            (self.other_venue_id, self.other_artist_id, 230, 30),
+            (self.venue_id, self.other_artist_id, 120, 30),
+            # Overlaps the show already booked.
+            (self.venue_id, self.other_artist_id, 45, 30),
+            (self.venue_id + 1000, self.other_artist_id, 0, 60),
+            (self.venue_id, self.artist_id, 60, 15),
+        ])
+
+        self.assertIsInstance(results[1], LookupError)
+        self.assertIsInstance(results[2], availability.Conflict)
+        self.assertEqual(results[2].ids, [None])
+        self.assertIsInstance(results[4], availability.Conflict)
+        self.assertEqual(results[4].ids, [self.show_id])
+        self.assertIsInstance(results[5], LookupError)
+        # Each id is the row for its own booking.
+        for position, minutes, duration in ((0, 200, 60), (3, 120, 30), (6, 60, 15)):
+            self.assertIsInstance(results[position], int)
+            venue_id, artist_id = (self.other_venue_id, self.other_artist_id) if position == 0 else \
+                (self.venue_id, self.other_artist_id if position == 3 else self.artist_id)
+            self.assertEqual(self.show(results[position]), (venue_id, artist_id, self.at(minutes), duration))
+
+    def test_batch_json(self):
+        response = self.client.post('/shows/batch', json=[
+            {'venue_id': self.other_venue_id, 'artist_id': self.other_artist_id,
+             'start_time': self.at(300).isoformat(), 'duration': 45},
+            {'venue_id': self.venue_id, 'artist_id': self.other_artist_id,
+             'start_time': self.at(10).isoformat()},
+            {'venue_id': self.venue_id + 1000, 'artist_id': self.artist_id,
+             'start_time': self.at(600).isoformat()},
+            {'venue_id': self.venue_id, 'start_time': self.at(600).isoformat()},
+            {'venue_id': self.venue_id, 'artist_id': self.artist_id,
+             'start_time': self.at(600).isoformat(), 'duration': 100000},
+        ])
+        self.assertEqual(response.status_code, 200)
+        payload = response.get_json()
+        self.assertEqual((payload['booked'], payload['rejected']), (1, 4))
+        self.assertEqual([result['row'] for result in payload['results']], [1, 2, 3, 4, 5])
+        self.assertEqual([result['status'] for result in payload['results']],
+                         ['booked', 'conflict', 'missing', 'invalid', 'invalid'])
+        self.assertEqual(self.show(payload['results'][0]['id']),
+                         (self.other_venue_id, self.other_artist_id, self.at(300), 45))
+
+    def test_batch_form(self):
+        lines = ['%d, %d, %s, 30' % (self.other_artist_id, self.other_venue_id, self.at(400).isoformat()),
+                 '%d, %d, %s' % (self.artist_id, self.venue_id, self.at(0).isoformat()),
+                 'not, a, show']
+        response = self.client.post('/shows/batch', data={'shows': '\n'.join(lines)})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('1 of 3 shows were listed.', response.get_data(as_text=True))
+
+    def test_batch_rejects_bad_payloads(self):
+        self.assertEqual(self.client.post('/shows/batch', json={'venue_id': 1}).status_code, 400)
+        self.assertEqual(self.client.post('/shows/batch', json=[{}] * 501).status_code, 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+"""Writes and `flask rollover-shows` drop the cached pages they change.
+
+    python test_cache.py -v
+"""
+import unittest
+
+from benchmarks.bench_locations import form
+from testing import AppTestCase, unique
+
+
+class InvalidationTest(AppTestCase):
+    CONFIG = {'CACHE_BACKEND': 'memory'}
+
+    def hits(self):
+        return self.app.extensions['response_cache'].hits
+
+    def assertCached(self, path, cached=True):
+        hits = self.hits()
+        response = self.client.get(path)
+        self.assertEqual(response.status_code, 200, path)
+        # Streamed pages are stored once their body has been read.
+        response.get_data()
+        self.assertEqual(self.hits() - hits, 1 if cached else 0, path)
+
+    def warm(self, *paths):
+        for path in paths:
+            self.client.get(path).get_data()
+            self.assertCached(path)
+
+    def writer(self):
+        # A second client, so no flashed message rides on the reading session.
+        return self.app.test_client()
+
+    def test_show_write_drops_its_pages(self):
+        venue_id, other_id = self.add_venue(), self.add_venue()
+        artist_id = self.add_artist()
+        related = ('/shows', '/venues', '/artists', '/venues/%d' % venue_id, '/artists/%d' % artist_id)
+        self.warm(*related + ('/venues/%d' % other_id,))
+
+        response = self.writer().post('/shows/create', data={
+            'venue_id': venue_id, 'artist_id': artist_id,
+            'start_time': self.hours_from_now(3).strftime('%Y-%m-%d %H:%M'), 'duration': 60})
+        self.assertEqual(response.status_code, 302)
+        for path in related:
+            self.assertCached(path, False)
+        self.assertCached('/venues/%d' % other_id)
+
+    def test_batch_drops_its_pages(self):
+        venue_id, artist_id = self.add_venue(), self.add_artist()
+        related = ('/shows', '/venues/%d' % venue_id, '/artists/%d' % artist_id)
+        self.warm(*related)
+
+        response = self.writer().post('/shows/batch', json=[{
+            'venue_id': venue_id, 'artist_id': artist_id,
+            'start_time': self.hours_from_now(5).isoformat(), 'duration': 30}])
+        self.assertEqual(response.get_json()['booked'], 1)
+        for path in related:
+            self.assertCached(path, False)
+
+    def test_venue_writes_drop_its_pages(self):
+        name = unique('Venue')
+        writer = self.writer()
+        self.warm('/venues')
+        self.assertEqual(writer.post('/venues/create', data=form(name, unique('City'))).status_code, 302)
+        self.assertCached('/venues', False)
+
+        from models import Venue
+        with self.app.app_context():
+            venue_id = Venue.query.filter_by(name=name).one().id
+        path = '/venues/%d' % venue_id
+        self.warm('/venues', path)
+        response = writer.post(path + '/edit', data=form(name + ' renamed', unique('City')))
+        self.assertEqual(response.status_code, 302)
+        self.assertCached('/venues', False)
+        self.assertCached(path, False)
+        self.assertIn(name + ' renamed', self.client.get(path).get_data(as_text=True))
+
+        self.warm('/venues')
+        writer.delete(path)
+        self.assertCached('/venues', False)
+        self.assertEqual(self.client.get(path).status_code, 404)
+
+    def test_rollover_drops_listings(self):
+        for path in ('/shows', '/venues', '/artists'):
+            self.client.get(path).get_data()
+            self.assertCached(path)
+
+        result = self.app.test_cli_runner().invoke(args=['rollover-shows'])
+        self.assertEqual(result.exit_code, 0, result.output)
+        for path in ('/shows', '/venues', '/artists'):
+            self.assertCached(path, False)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+"""ETags and 304s on the cached listing and detail pages.
+
+    python test_conditional.py -v
+
+With the response cache on, a page revalidated after a write or after one
+of its shows starts must come back as a fresh 200, never as the cached
+body under a new tag.
+"""
+import time
+import unittest
+from datetime import datetime, timedelta
+
+from testing import AppTestCase, unique
+
+
+class ConditionalGetTest(AppTestCase):
+    CONFIG = {'CACHE_BACKEND': 'memory'}
+
+    def setUp(self):
+        self.artist_name = unique('Artist')
+        self.venue_id = self.add_venue()
+        self.artist_id = self.add_artist(self.artist_name)
+
+    def get(self, path, etag=None):
+        headers = {'If-None-Match': etag} if etag else {}
+        return self.client.get(path, headers=headers)
+
+    def revalidate(self, path):
+        """The page's ETag, after checking it answers If-None-Match."""
+        response = self.get(path)
+        self.assertEqual(response.status_code, 200, path)
+        etag = response.headers['ETag']
+        self.assertEqual(self.get(path, etag).status_code, 304, path)
+        return etag, response.get_data(as_text=True)
+
+    def test_write_changes_etag(self):
+        paths = ('/venues/%d' % self.venue_id, '/artists/%d' % self.artist_id, '/shows')
+        etags = {path: self.revalidate(path)[0] for path in paths}
+
+        # Another client, so no flashed message rides on our session.
+        writer = self.app.test_client()
+        response = writer.post('/shows/create', data={
+            'venue_id': self.venue_id, 'artist_id': self.artist_id,
+            'start_time': self.hours_from_now(2).strftime('%Y-%m-%d %H:%M'), 'duration': 60})
+        self.assertEqual(response.status_code, 302)
+
+        for path in paths:
+            response = self.get(path, etags[path])
+            self.assertEqual(response.status_code, 200, path)
+            self.assertNotEqual(response.headers['ETag'], etags[path], path)
+            self.assertEqual(self.get(path, response.headers['ETag']).status_code, 304, path)
+        self.assertIn(self.artist_name, self.get('/shows').get_data(as_text=True))
+        self.assertIn('1 Upcoming Show<', self.get(paths[0]).get_data(as_text=True))
+
+    def test_show_starting_changes_etag(self):
+        start = datetime.now() + timedelta(seconds=2)
+        self.add_show(self.venue_id, self.artist_id, start)
+        venue = '/venues/%d' % self.venue_id
+
+        shows_etag, body = self.revalidate('/shows')
+        self.assertIn(self.artist_name, body)
+        venue_etag, body = self.revalidate(venue)
+        self.assertIn('1 Upcoming Show<', body)
+
+        time.sleep(max(0, (start - datetime.now()).total_seconds()) + 0.5)
+
+        response = self.get('/shows', shows_etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn(self.artist_name, response.get_data(as_text=True))
+        self.assertEqual(self.get('/shows', response.headers['ETag']).status_code, 304)
+
+        response = self.get(venue, venue_etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('1 Past Show<', response.get_data(as_text=True))
+        self.assertEqual(self.get(venue, response.headers['ETag']).status_code, 304)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,49 @@
+"""Apps made by create_app() in one process share no caches or indexes.
+
+    python test_factory.py -v
+"""
+import os
+import tempfile
+import unittest
+
+from benchmarks.support import load_app
+from testing import AppTestCase, unique
+
+
+class AppIsolationTest(AppTestCase):
+    CONFIG = {'CACHE_BACKEND': 'memory'}
+
+    def setUp(self):
+        self.name = unique('Isolated')
+        self.venue_id = self.add_venue(self.name)
+        # Build this app's indexes and caches before the second app exists.
+        for path in ('/suggest?q=isolated', '/venues/search?search_term=isolated',
+                     '/venues/create', '/venues/%d' % self.venue_id):
+            self.assertEqual(self.client.get(path).status_code, 200, path)
+
+        self.other_directory = tempfile.TemporaryDirectory()
+        self.other = load_app('sqlite:///' + os.path.join(self.other_directory.name, 'other.db'),
+                              CACHE_BACKEND='none', FRAGMENT_CACHE_MAX_ENTRIES=1)
+        with self.other.app_context():
+            import genres
+            from models import db
+            genres.ensure_defaults()
+            db.session.commit()
+
+    def tearDown(self):
+        self.other_directory.cleanup()
+
+    def test_second_app_has_its_own_state(self):
+        client = self.other.test_client()
+        self.assertNotIn(self.name, client.get('/suggest?q=isolated').get_data(as_text=True))
+        self.assertNotIn(self.name, client.get('/venues/search?search_term=isolated').get_data(as_text=True))
+        self.assertIsNone(self.other.extensions['response_cache'].backend)
+
+        self.assertIsNotNone(self.app.extensions['response_cache'].backend)
+        self.assertIsNot(self.app.extensions['fragments'], self.other.extensions['fragments'])
+        self.assertIn(self.name, self.client.get('/suggest?q=isolated').get_data(as_text=True))
+        self.assertIn(self.name, self.client.get('/venues/search?search_term=isolated').get_data(as_text=True))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+"""`flask import` reads show times as the forms do, and reads back what
+`flask export` writes.
+
+    python test_importer.py -v
+"""
+import io
+import json
+import unittest
+from datetime import datetime
+
+from testing import AppTestCase
+
+
+class ShowImportTest(AppTestCase):
+
+    def setUp(self):
+        self.venue_id = self.add_venue()
+        self.artist_id = self.add_artist()
+
+    def import_shows(self, text, format='jsonl'):
+        import importer
+
+        with self.app.app_context():
+            return importer.import_file('shows', io.StringIO(text), format)
+
+    def export_shows(self, format):
+        """This venue's shows as `flask export shows` writes them."""
+        import exporter
+
+        with self.app.app_context():
+            text = ''.join(exporter.encode('shows', format))
+        if format == 'csv':
+            lines = text.splitlines(True)
+            return lines[0] + ''.join(line for line in lines[1:]
+                                      if line.split(',')[1] == str(self.venue_id))
+        return ''.join(line for line in text.splitlines(True)
+                       if json.loads(line)['venue_id'] == self.venue_id)
+
+    def start_times(self):
+        from models import db, Show
+
+        with self.app.app_context():
+            return [start for start, in db.session.query(Show.start_time)
+                    .filter_by(venue_id=self.venue_id).order_by(Show.start_time)]
+
+    def delete_shows(self):
+        from models import db, Show
+
+        with self.app.app_context():
+            Show.query.filter_by(venue_id=self.venue_id).delete()
+            db.session.commit()
+
+    def record(self, start_time):
+        return json.dumps({'venue_id': self.venue_id, 'artist_id': self.artist_id,
+                           'start_time': start_time, 'duration': 60}) + '\n'
+
+    def test_form_formats(self):
+        report = self.import_shows(
+            self.record('2031-05-21 21:30') + self.record('2031-05-22 21:30:00') +
+            self.record('2031-05-23T21:30:00'))
+        self.assertEqual(report.errors, [])
+        self.assertEqual(self.start_times(), [datetime(2031, 5, day, 21, 30) for day in (21, 22, 23)])
+
+    def test_bad_time_is_reported(self):
+        report = self.import_shows(self.record('next tuesday-ish') + self.record(''))
+        self.assertEqual(report.inserted, 0)
+        (_, bad), (_, missing) = report.errors
+        self.assertIn("Not a valid date and time: 'next tuesday-ish'", bad)
+        self.assertIn('This field is required', missing)
+        self.assertNotIn('required', bad)
+
+    def test_export_round_trip(self):
+        for day in (1, 2, 3):
+            self.add_show(self.venue_id, self.artist_id, datetime(2032, 1, day, 20))
+        before = self.start_times()
+
+        for format in ('jsonl', 'csv'):
+            exported = self.export_shows(format)
+            self.assertIn('2032-01-01T20:00:00', exported)
+            self.delete_shows()
+            report = self.import_shows(exported, format)
+            self.assertEqual(report.errors, [], format)
+            self.assertEqual(report.inserted, 3, format)
+            self.assertEqual(self.start_times(), before, format)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+"""Parallel venue creates for one new city share a single Location.
+
+    python test_locations.py -v
+
+Runs against a throwaway SQLite database, or TEST_DATABASE_URL when set.
+"""
+import os
+import tempfile
+import unittest
+import uuid
+
+from benchmarks.bench_locations import race
+from benchmarks.support import load_app
+
+
+class LocationRaceTest(unittest.TestCase):
+    THREADS = 8
+    ROUNDS = 3
+
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.TemporaryDirectory()
+        database_url = os.getenv('TEST_DATABASE_URL') or \
+            'sqlite:///' + os.path.join(cls.directory.name, 'fyyur.db')
+        cls.app = load_app(database_url, CACHE_BACKEND='none')
+        with cls.app.app_context():
+            import genres
+            from models import db
+            genres.ensure_defaults()
+            db.session.commit()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.directory.cleanup()
+
+    def test_parallel_creates_share_one_location(self):
+        from models import db, Venue, Location
+
+        for _ in range(self.ROUNDS):
+            city = ('Racetown %s' % uuid.uuid4().hex[:8]).title()
+            names, _, failures = race(self.app, city, self.THREADS)
+            self.assertEqual(failures, [])
+
+            with self.app.app_context():
+                location_ids = [id for id, in db.session.query(Location.id).filter_by(city=city, state='CA')]
+                venue_locations = [location_id for location_id, in
+                                   db.session.query(Venue.location_id).filter(Venue.name.in_(names))]
+            self.assertEqual(len(location_ids), 1, city)
+            self.assertEqual(len(venue_locations), self.THREADS)
+            self.assertEqual(set(venue_locations), set(location_ids))
+
+
+if __name__ == '__main__':
+    unittest.main()
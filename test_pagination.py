@@ -0,0 +1,99 @@
+"""Keyset pagination of the listings, through the pages and the API.
+
+    python test_pagination.py -v
+"""
+import html
+import re
+import unittest
+from datetime import timedelta
+
+from testing import AppTestCase
+
+NEXT = re.compile(r'<li class="next"><a href="([^"]+)">')
+PREVIOUS = re.compile(r'<li class="previous"><a href="([^"]+)">')
+
+
+class PaginationTest(AppTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super(PaginationTest, cls).setUpClass()
+        cls.venue_ids = [cls.add_venue() for _ in range(3)]
+        cls.artist_ids = [cls.add_artist() for _ in range(3)]
+        # Pairs of shows share a start time, so pages also split on the id.
+        start = cls.hours_from_now(24)
+        cls.show_ids = []
+        for number in range(7):
+            cls.show_ids.append(cls.add_show(
+                cls.venue_ids[number % 3], cls.artist_ids[number % 3], start + timedelta(hours=number // 2)))
+        # Only the first venue's last show runs in this window.
+        cls.busy_from = start + timedelta(hours=3)
+
+    def api(self, path):
+        response = self.client.get(path)
+        self.assertEqual(response.status_code, 200, path)
+        return response.get_json()
+
+    def walk(self, path, limit):
+        """Every id of an API listing, page by page forward, then back."""
+        forward = []
+        page = self.api('%s?limit=%d' % (path, limit))
+        self.assertIsNone(page['prev'])
+        pages = [page]
+        while page['next']:
+            page = self.api('%s?limit=%d&after=%s' % (path, limit, page['next']))
+            pages.append(page)
+        for page in pages:
+            self.assertLessEqual(len(page['data']), limit)
+            forward.extend(row['id'] for row in page['data'])
+
+        backward = []
+        while page['prev']:
+            page = self.api('%s?limit=%d&before=%s' % (path, limit, page['prev']))
+            backward[:0] = [row['id'] for row in page['data']]
+        self.assertIsNone(page['prev'])
+        self.assertEqual(backward, forward[:len(backward)])
+        return forward, len(pages)
+
+    def test_shows_pages_neither_overlap_nor_skip(self):
+        for limit in (1, 2, 3, 7, 8):
+            ids, pages = self.walk('/api/v1/shows', limit)
+            self.assertEqual(ids, self.show_ids, limit)
+            self.assertEqual(pages, -(-len(self.show_ids) // limit), limit)
+
+    def test_venues_pages_neither_overlap_nor_skip(self):
+        ids, pages = self.walk('/api/v1/venues', 2)
+        self.assertEqual(ids, sorted(self.venue_ids))
+        self.assertEqual(pages, 2)
+
+    def test_pager_links(self):
+        body = self.client.get('/shows?limit=3').get_data(as_text=True)
+        self.assertIsNone(PREVIOUS.search(body))
+        pages = 1
+        while NEXT.search(body):
+            link = html.unescape(NEXT.search(body).group(1))
+            self.assertIn('limit=3', link)
+            body = self.client.get(link).get_data(as_text=True)
+            self.assertIsNotNone(PREVIOUS.search(body))
+            pages += 1
+        self.assertEqual(pages, 3)
+
+    def test_available_venues(self):
+        window = 'from=%s&to=%s' % (
+            self.busy_from.isoformat(), (self.busy_from + timedelta(minutes=30)).isoformat())
+        body = self.client.get('/venues/available?limit=1&' + window).get_data(as_text=True)
+        link = html.unescape(NEXT.search(body).group(1))
+        self.assertIn('from=', link)
+        found = re.findall(r'href="/venues/(\d+)"', body)
+        found += re.findall(r'href="/venues/(\d+)"', self.client.get(link).get_data(as_text=True))
+        self.assertEqual(sorted(map(int, found)), sorted(self.venue_ids[1:]))
+
+    def test_bad_cursors(self):
+        for query in ('after=nonsense', 'before=%%%', 'after=WzFd'):
+            self.assertEqual(self.client.get('/shows?' + query).status_code, 400, query)
+        response = self.client.get('/venues/available?from=2030-01-02T00:00&to=2030-01-01T00:00')
+        self.assertEqual(response.status_code, 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
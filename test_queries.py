@@ -0,0 +1,101 @@
+"""Venue and artist pages issue a fixed number of statements, whatever the
+number of shows they list.
+
+    python test_queries.py -v
+
+Runs against a throwaway SQLite database, or TEST_DATABASE_URL when set.
+"""
+import os
+import tempfile
+import unittest
+import uuid
+from datetime import datetime, timedelta
+
+from benchmarks.support import load_app, count_statements
+
+# Statements per detail page: the page's validators, then the entity, its
+# genres, and its past and upcoming shows.
+MAX_STATEMENTS = 5
+
+
+class DetailQueryCountTest(unittest.TestCase):
+    SHOWS = 20
+
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.TemporaryDirectory()
+        database_url = os.getenv('TEST_DATABASE_URL') or \
+            'sqlite:///' + os.path.join(cls.directory.name, 'fyyur.db')
+        # The response cache would answer the second request from memory.
+        cls.app = load_app(database_url, CACHE_BACKEND='none')
+        cls.client = cls.app.test_client()
+        with cls.app.app_context():
+            import genres
+            from models import db
+            genres.ensure_defaults()
+            db.session.commit()
+            cls.engine = db.engine
+        # The first request also builds the /suggest index.
+        cls.client.get('/')
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.directory.cleanup()
+
+    def setUp(self):
+        from models import db, Venue, Artist, Location
+
+        name = uuid.uuid4().hex[:8]
+        with self.app.app_context():
+            location = Location(city='City %s' % name, state='CA')
+            venue = Venue(name='Venue %s' % name, genres=['Jazz', 'Folk'], Location=location)
+            artist = Artist(name='Artist %s' % name, city='City %s' % name, state='CA', genres=['Jazz'])
+            db.session.add_all([venue, artist])
+            db.session.commit()
+            self.venue_id, self.artist_id = venue.id, artist.id
+        self.paths = ('/venues/%d' % self.venue_id, '/artists/%d' % self.artist_id)
+
+    def add_shows(self, count):
+        """`count` shows between the venue and artist, half of them past."""
+        import counters
+        from models import db, Show
+
+        now = datetime.now().replace(second=0, microsecond=0)
+        with self.app.app_context():
+            db.session.add_all(
+                Show(venue_id=self.venue_id, artist_id=self.artist_id,
+                     start_time=now + timedelta(hours=3 * (i - count // 2) + 1))
+                for i in range(count))
+            db.session.flush()
+            counters.refresh(venue_ids=[self.venue_id], artist_ids=[self.artist_id])
+            db.session.commit()
+
+    def statements(self):
+        counts = {}
+        for path in self.paths:
+            with count_statements(self.engine) as statements:
+                response = self.client.get(path)
+            self.assertEqual(response.status_code, 200, path)
+            counts[path] = len(statements)
+        return counts
+
+    def test_statements_do_not_grow_with_shows(self):
+        self.add_shows(self.SHOWS)
+        few = self.statements()
+        self.add_shows(self.SHOWS * 9)
+        many = self.statements()
+
+        self.assertEqual(few, many)
+        for path, count in many.items():
+            self.assertLessEqual(count, MAX_STATEMENTS, path)
+
+    def test_pages_list_every_show(self):
+        self.add_shows(self.SHOWS)
+        for path in self.paths:
+            body = self.client.get(path).get_data(as_text=True)
+            self.assertIn('%d Upcoming Shows' % (self.SHOWS // 2), body)
+            self.assertIn('%d Past Shows' % (self.SHOWS // 2), body)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,52 @@
+"""Name search for venues and artists, through the pages and the API.
+
+    python test_search.py -v
+
+SQLite runs exercise the in-process fallback index; set TEST_DATABASE_URL
+to a PostgreSQL database to run the same cases against the trigram indexes.
+"""
+import unittest
+
+from benchmarks.bench_locations import form
+from testing import AppTestCase, unique
+
+
+class SearchTest(AppTestCase):
+
+    def setUp(self):
+        self.tag = unique('Zq').split()[1]
+        self.names = ['%s Jazz Club' % self.tag, 'The %s Jazz Bar' % self.tag, '%s Rock Hall' % self.tag]
+        # Through the create form, which keeps the fallback index current.
+        for name in self.names:
+            data = dict(form(name, unique('City')), genres=['Blues'] if 'Rock' in name else ['Jazz'])
+            self.assertEqual(self.client.post('/venues/create', data=data).status_code, 302)
+        from models import Venue
+        with self.app.app_context():
+            self.ids = [Venue.query.filter_by(name=name).one().id for name in self.names]
+
+    def api(self, query):
+        response = self.client.get('/api/v1/venues/search?' + query)
+        self.assertEqual(response.status_code, 200)
+        return response.get_json()
+
+    def test_substring_matches(self):
+        found = self.api('q=%s+jazz' % self.tag)
+        self.assertEqual(sorted(row['name'] for row in found['data']), sorted(self.names[:2]))
+        self.assertEqual(found['count'], 2)
+
+    def test_genre_filter(self):
+        found = self.api('q=%s&genre=Blues' % self.tag)
+        self.assertEqual([row['id'] for row in found['data']], [self.ids[2]])
+
+    def test_short_terms_match_nothing(self):
+        self.assertEqual(self.api('q=' + self.tag[:2])['data'], [])
+        self.assertEqual(len(self.api('q=' + self.tag[:3])['data']), 3)
+
+    def test_search_page(self):
+        body = self.client.post('/venues/search', data={'search_term': self.tag}).get_data(as_text=True)
+        for name in self.names:
+            self.assertIn(name, body)
+
+
+if __name__ == '__main__':
+    unittest.main()
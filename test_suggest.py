@@ -0,0 +1,114 @@
+"""The /suggest prefix index: matching, the write paths, rebuilds and the cap.
+
+    python test_suggest.py -v
+"""
+import unittest
+from unittest import mock
+
+import suggest
+from benchmarks.bench_locations import form
+from testing import AppTestCase, unique
+
+
+class PrefixIndexTest(unittest.TestCase):
+
+    def test_prefix_of_any_leading_word(self):
+        index = suggest.PrefixIndex(100)
+        index.load([('venue', 1, 'The Blue  Note'), ('venue', 2, 'Bluebird'), ('artist', 3, 'Note Takers')])
+        self.assertEqual(index.search('blue', 10), [('venue', 1, 'The Blue  Note'), ('venue', 2, 'Bluebird')])
+        self.assertEqual(index.search(' NOTE', 10), [('venue', 1, 'The Blue  Note'), ('artist', 3, 'Note Takers')])
+        self.assertEqual(index.search('blue note', 10), [('venue', 1, 'The Blue  Note')])
+        self.assertEqual(index.search('blue', 1), [('venue', 1, 'The Blue  Note')])
+        self.assertEqual(index.search('', 10), [])
+
+    def test_words_past_the_first_few_are_not_keys(self):
+        index = suggest.PrefixIndex(100)
+        index.load([('venue', 1, 'one two three four five')])
+        self.assertTrue(index.search('four', 10))
+        self.assertEqual(index.search('five', 10), [])
+
+    def test_long_queries_check_the_label(self):
+        index = suggest.PrefixIndex(100)
+        label = 'a' * suggest.KEY_LENGTH
+        index.load([('venue', 1, label + 'xyz'), ('venue', 2, label + 'abc')])
+        self.assertEqual(index.search(label + 'ab', 10), [('venue', 2, label + 'abc')])
+
+    def test_relabel_and_remove(self):
+        index = suggest.PrefixIndex(100)
+        index.load([('venue', 1, 'Old Hall')])
+        index.add('venue', 1, 'New Hall')
+        self.assertEqual(index.search('old', 10), [])
+        self.assertEqual(index.search('hall', 10), [('venue', 1, 'New Hall')])
+        index.remove('venue', 1)
+        index.remove('venue', 1)
+        self.assertEqual(index.search('hall', 10), [])
+        self.assertEqual(index.stats(), {'entries': 0, 'labels': 0, 'dropped': 0})
+
+    def test_cap(self):
+        index = suggest.PrefixIndex(4)
+        index.load([('venue', 1, 'Blue Note'), ('venue', 2, 'Red Room'), ('venue', 3, 'Jazz')])
+        self.assertEqual(index.stats(), {'entries': 4, 'labels': 2, 'dropped': 1})
+        # Relabelling within the cap replaces the old keys...
+        index.add('venue', 2, 'Green Room')
+        self.assertEqual(index.search('green', 10), [('venue', 2, 'Green Room')])
+        # ...but a label that would not fit leaves the index as it was.
+        index.add('venue', 1, 'The Blue Note Club')
+        self.assertEqual(index.search('blue', 10), [('venue', 1, 'Blue Note')])
+        index.add('venue', 3, 'Jazz')
+        self.assertEqual(index.search('jazz', 10), [])
+        self.assertEqual(index.stats(), {'entries': 4, 'labels': 2, 'dropped': 3})
+
+
+class SuggestRouteTest(AppTestCase):
+
+    def suggest(self, query):
+        response = self.client.get('/suggest', query_string={'q': query})
+        self.assertEqual(response.status_code, 200)
+        return [(row['type'], row['label'], row['url']) for row in response.get_json()['suggestions']]
+
+    def test_create_and_delete(self):
+        tag = unique('Qx').split()[1]
+        name, city = 'The %s Lounge' % tag, unique('Town %s' % tag)
+        self.assertEqual(self.suggest(tag), [])
+
+        self.assertEqual(self.client.post('/venues/create', data=form(name, city)).status_code, 302)
+        from models import Venue
+        with self.app.app_context():
+            venue_id = Venue.query.filter_by(name=name).one().id
+        self.assertEqual(sorted(self.suggest(tag.lower())), [
+            ('city', '%s, CA' % city.title(), None),
+            ('venue', name, '/venues/%d' % venue_id)])
+
+        self.client.delete('/venues/%d' % venue_id)
+        self.assertEqual(self.suggest(tag), [('city', '%s, CA' % city.title(), None)])
+
+    def test_limit(self):
+        tag = unique('Qy').split()[1]
+        for number in range(3):
+            self.add_artist('%s Trio %d' % (tag, number))
+        with self.app.app_context():
+            suggest.build()
+        self.assertEqual(len(self.suggest(tag)), 3)
+        response = self.client.get('/suggest', query_string={'q': tag, 'limit': 2})
+        self.assertEqual(len(response.get_json()['suggestions']), 2)
+
+    def test_rebuild_keeps_writes_made_while_loading(self):
+        tag = unique('Qz').split()[1]
+        stale_id = self.add_artist('%s Stale' % tag)
+        items = suggest._items
+
+        def items_during_writes():
+            # Writes that land after the rebuild has read the rows.
+            rows = list(items())
+            suggest.add('artist', 10 ** 6, '%s Added' % tag)
+            suggest.remove('artist', stale_id)
+            return rows
+
+        with self.app.app_context():
+            with mock.patch.object(suggest, '_items', items_during_writes):
+                suggest.build()
+        self.assertEqual(self.suggest(tag), [('artist', '%s Added' % tag, '/artists/%d' % 10 ** 6)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+"""Shared set-up for the test_*.py suites.
+
+Each TestCase class gets its own app against a throwaway SQLite database,
+or TEST_DATABASE_URL when set, with the default genres loaded. Rows are
+named with a random suffix so suites can share a database.
+"""
+import os
+import tempfile
+import unittest
+import uuid
+from datetime import datetime, timedelta
+
+from benchmarks.support import load_app
+
+
+def unique(prefix):
+    return '%s %s' % (prefix, uuid.uuid4().hex[:8])
+
+
+class AppTestCase(unittest.TestCase):
+    # Settings for this class's app; the response cache is off unless a
+    # suite is about caching.
+    CONFIG = {'CACHE_BACKEND': 'none'}
+
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.TemporaryDirectory()
+        database_url = os.getenv('TEST_DATABASE_URL') or \
+            'sqlite:///' + os.path.join(cls.directory.name, 'fyyur.db')
+        cls.app = load_app(database_url, **cls.CONFIG)
+        cls.client = cls.app.test_client()
+        with cls.app.app_context():
+            import genres
+            from models import db
+            genres.ensure_defaults()
+            db.session.commit()
+            cls.engine = db.engine
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.directory.cleanup()
+
+    @classmethod
+    def add_venue(cls, name=None, city=None, genres=('Jazz',)):
+        from models import db, Venue, Location
+
+        with cls.app.app_context():
+            location = Location(city=city or unique('City'), state='CA')
+            venue = Venue(name=name or unique('Venue'), genres=list(genres), Location=location)
+            db.session.add(venue)
+            db.session.commit()
+            return venue.id
+
+    @classmethod
+    def add_artist(cls, name=None, genres=('Jazz',)):
+        from models import db, Artist
+
+        with cls.app.app_context():
+            artist = Artist(name=name or unique('Artist'), city=unique('City'), state='CA', genres=list(genres))
+            db.session.add(artist)
+            db.session.commit()
+            return artist.id
+
+    @classmethod
+    def add_show(cls, venue_id, artist_id, start_time, duration=60):
+        """Book a show the way the write paths do, counters included."""
+        import counters
+        from models import db, Show
+
+        with cls.app.app_context():
+            show = Show(venue_id=venue_id, artist_id=artist_id, start_time=start_time, duration=duration)
+            db.session.add(show)
+            db.session.flush()
+            counters.refresh(venue_ids=[venue_id], artist_ids=[artist_id])
+            db.session.commit()
+            return show.id
+
+    @staticmethod
+    def hours_from_now(hours):
+        return datetime.now().replace(microsecond=0) + timedelta(hours=hours)